@@ -0,0 +1,87 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from auto_player.app import create_auto_player
+
+SOURCE_DIRECTORY = str(Path(__file__).resolve().parent.parent / "src")
+# Same code path as the installed auto-player console script.
+ENTRY_POINT = [sys.executable, "-c", "from auto_player.client import main; main()"]
+
+
+def make_library(root: Path, shows: int, episodes: int, config_path: str) -> None:
+    os.chdir(root)
+    app = create_auto_player(config_path=config_path)
+    for show_number in range(shows):
+        directory = root / f"show_{show_number}"
+        directory.mkdir()
+        for episode_number in range(episodes):
+            (directory / f"episode_{episode_number:04}.mkv").touch()
+        app.add_show(name=directory.name, video_dir=str(directory), video_regex=".+")
+
+
+def time_command(argv: List[str], environment: Dict[str, str], runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(argv, env=environment, stdout=subprocess.DEVNULL, check=True)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare in-process and daemon CLI")
+    parser.add_argument("--shows", type=int, default=50)
+    parser.add_argument("--episodes", type=int, default=100)
+    parser.add_argument("--runs", type=int, default=20)
+    arguments = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        root = Path(directory)
+        config_path = str(root / "config.json")
+        socket_path = str(root / "daemon.sock")
+        make_library(root, arguments.shows, arguments.episodes, config_path)
+
+        environment = dict(os.environ)
+        environment["PYTHONPATH"] = SOURCE_DIRECTORY
+        environment["AUTO_PLAYER_SOCKET"] = socket_path
+        results = {
+            "python_startup_ms": time_command(
+                [sys.executable, "-c", "pass"], environment, arguments.runs
+            )
+        }
+        for command in ("list", "info"):
+            argv = ENTRY_POINT + ["--config", config_path]
+            results[f"{command}_in_process_ms"] = time_command(
+                argv + [command], environment, arguments.runs
+            )
+
+        daemon = subprocess.Popen(
+            ENTRY_POINT + ["--config", config_path, "daemon"],
+            env=environment,
+            stdout=subprocess.DEVNULL,
+        )
+        try:
+            while not os.path.exists(socket_path):
+                time.sleep(0.01)
+            for command in ("list", "info"):
+                argv = ENTRY_POINT + ["--config", config_path]
+                time_command(argv + [command], environment, 1)
+                results[f"{command}_daemon_ms"] = time_command(
+                    argv + [command], environment, arguments.runs
+                )
+        finally:
+            daemon.terminate()
+            daemon.wait()
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from auto_player.file_group.packed import PackedPaths
+from auto_player.show import EpisodeSet
+
+DIRECTORY = Path("/library/archive/Some Long Running Show (1999)")
+
+
+@dataclass
+class DictEpisodeSet:
+    # EpisodeSet as it was before __slots__.
+    video_file: Path
+    audio_file: Optional[Path] = None
+    subtitles_file: Optional[Path] = None
+
+
+def make_names(entries: int) -> List[str]:
+    return [
+        f"Some Long Running Show - {number:06} [1080p].mkv" for number in range(entries)
+    ]
+
+
+def measure(build: Callable[[], object]) -> Dict[str, float]:
+    # Timed and traced separately, tracing slows allocations down a lot.
+    gc.collect()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    del result
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return {"mib": size / 2**20, "ms": elapsed * 1000}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Memory of large file groups")
+    parser.add_argument("--entries", type=int, default=100_000)
+    arguments = parser.parse_args()
+    names = make_names(arguments.entries)
+
+    def path_list() -> List[Path]:
+        return sorted(DIRECTORY / name for name in names)
+
+    def packed() -> PackedPaths:
+        return PackedPaths(DIRECTORY, sorted(names))
+
+    paths = path_list()
+    packed_paths = packed()
+    results = {
+        "entries": arguments.entries,
+        "path_list": measure(path_list),
+        "packed_paths": measure(packed),
+        "dict_episode_sets": measure(
+            lambda: [DictEpisodeSet(video_file=path) for path in paths]
+        ),
+        "slots_episode_sets": measure(
+            lambda: [EpisodeSet(video_file=path) for path in paths]
+        ),
+        "path_list_index_all": measure(lambda: [paths[i] for i in range(len(paths))]),
+        "packed_paths_index_all": measure(
+            lambda: [packed_paths[i] for i in range(len(packed_paths))]
+        ),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
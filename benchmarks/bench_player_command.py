@@ -0,0 +1,77 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from auto_player.app import DEFAULT_CONFIG
+from auto_player.player import CunstuctorPlayer
+from auto_player.show import EpisodeSet
+
+
+def make_episode(root: Path, depth: int) -> EpisodeSet:
+    files = []
+    for name in ["video.mkv", "audio.mka", "subtitles.ass"]:
+        target = root / "storage" / name
+        target.parent.mkdir(exist_ok=True)
+        target.touch()
+        for level in range(depth):
+            link = root / f"link_{level}" / name
+            link.parent.mkdir(exist_ok=True)
+            link.symlink_to(target)
+            target = link
+        files.append(Path(os.path.relpath(target, root)))
+    return EpisodeSet(video_file=files[0], audio_file=files[1], subtitles_file=files[2])
+
+
+def per_element_command(player: CunstuctorPlayer, episode_set: EpisodeSet) -> List[str]:
+    # Command construction before templates were compiled: every element
+    # re-resolved the episode set and re-parsed its template.
+    def list_format(templates: List[str]) -> List[str]:
+        return [x.format(episode=episode_set.fix_simlinks()) for x in templates]
+
+    command = list_format(player.base)
+    command += list_format(player.video_file_wrapper)
+    command += list_format(player.audio_file_wrapper)
+    command += list_format(player.subtitles_file_wrapper)
+    command += list_format(player.appendix)
+    return command
+
+
+def measure(action: Callable[[], object], runs: int) -> float:
+    start = time.perf_counter()
+    for _ in range(runs):
+        action()
+    return (time.perf_counter() - start) / runs * 1000000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure player command building")
+    parser.add_argument("--depths", type=int, nargs="+", default=[0, 1, 4])
+    parser.add_argument("--runs", type=int, default=2000)
+    arguments = parser.parse_args()
+
+    player = CunstuctorPlayer(**DEFAULT_CONFIG["player"]["params"])
+    results: Dict[str, Dict[str, float]] = {}
+    for depth in arguments.depths:
+        with tempfile.TemporaryDirectory() as directory:
+            os.chdir(directory)
+            episode_set = make_episode(Path(directory).resolve(), depth)
+            assert per_element_command(player, episode_set) == (
+                player._construct_command(episode_set)
+            )
+            results[str(depth)] = {
+                "per_element_us": measure(
+                    lambda: per_element_command(player, episode_set), arguments.runs
+                ),
+                "compiled_us": measure(
+                    lambda: player._construct_command(episode_set), arguments.runs
+                ),
+            }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
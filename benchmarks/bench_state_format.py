@@ -0,0 +1,85 @@
+import argparse
+import json
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from auto_player.backend import Backend
+from auto_player.backend.compactbackend import CompactBackend
+from auto_player.backend.localfilebackend import LocalfileBackend
+from auto_player.file_group import FilesGroupType
+from auto_player.file_group.regex_file_group import RegexFileGroup
+from auto_player.show import Show
+from auto_player.show.statefull import StatefullShowWrapper
+from auto_player.state import State
+
+
+def make_state(shows: int) -> State:
+    regex = re.compile(r".+\.(mkv|mp4)")
+    return State(
+        shows=[
+            StatefullShowWrapper(
+                show=Show(
+                    name=f"show {number}",
+                    video_group=RegexFileGroup(
+                        group_type=FilesGroupType.VIDEO,
+                        directory=Path(f"/library/show {number}"),
+                        regex=regex,
+                    ),
+                ),
+                counter=number % 24,
+            )
+            for number in range(shows)
+        ]
+    )
+
+
+def measure(action: Callable[[], object], runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        action()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def bench_backend(backend: Backend, state: State, runs: int) -> Dict[str, float]:
+    backend.save(state)
+    middle = str(len(state.shows) // 2 + 1)
+    return {
+        "save_ms": measure(lambda: backend.save(state), runs),
+        "load_ms": measure(backend.load, runs),
+        "load_and_get_show_ms": measure(
+            lambda: backend.load().get_show_by_number(int(middle)), runs
+        ),
+        "file_bytes": os.path.getsize(backend._get_filename()),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare state file formats")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 100000])
+    parser.add_argument("--runs", type=int, default=5)
+    arguments = parser.parse_args()
+
+    results: Dict[str, Dict[str, Dict[str, float]]] = {}
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        for size in arguments.sizes:
+            state = make_state(size)
+            backends: List[Backend] = [
+                LocalfileBackend(session="bench"),
+                CompactBackend(session="bench", migrate_localfile=False),
+            ]
+            results[str(size)] = {
+                backend.NAME: bench_backend(backend, state, arguments.runs)
+                for backend in backends
+            }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
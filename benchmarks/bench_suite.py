@@ -0,0 +1,157 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from synthetic_library import PRESETS, LibrarySpec, describe, make_library
+
+from auto_player.app import create_auto_player
+from auto_player.backend.localfilebackend import LocalfileBackend
+from auto_player.cli import cli
+from auto_player.file_group import FilesGroupType
+from auto_player.file_group.regex_file_group import RegexFileGroup
+
+DEFAULT_THRESHOLD = 0.2
+
+
+def measure(action: Callable[[], object], runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        action()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def run_cli(config_path: Path, argv: List[str]) -> None:
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        cli.main(["--config", str(config_path)] + argv, standalone_mode=False)
+
+
+def bench_library(config_path: Path, runs: int) -> Dict[str, float]:
+    app = create_auto_player(config_path=str(config_path))
+    middle = str(len(app.state.shows) // 2 + 1)
+    show = app.state.get_show_by_number(int(middle))
+    assert show is not None
+    backend = LocalfileBackend(session="default")
+    state = backend.load()
+
+    def index_group(group: RegexFileGroup) -> None:
+        for index in range(len(group)):
+            group[index]
+
+    def fresh_group() -> RegexFileGroup:
+        return RegexFileGroup(
+            group_type=FilesGroupType.VIDEO,
+            directory=show.video_group.directory,
+            regex=show.video_group.regex,
+        )
+
+    warm_group = fresh_group()
+    index_group(warm_group)
+    return {
+        "list_ms": measure(lambda: run_cli(config_path, ["list"]), runs),
+        "info_full_ms": measure(
+            lambda: run_cli(config_path, ["info", "--full", middle]), runs
+        ),
+        "play_ms": measure(
+            lambda: run_cli(config_path, ["play", "-e", "1", middle]), runs
+        ),
+        "backend_load_ms": measure(backend.load, runs),
+        "backend_save_ms": measure(lambda: backend.save(state), runs),
+        "group_index_fresh_ms": measure(lambda: index_group(fresh_group()), runs),
+        "group_index_warm_ms": measure(lambda: index_group(warm_group), runs),
+    }
+
+
+def git_revision() -> str:
+    directory = Path(__file__).resolve().parent
+    process = subprocess.run(
+        ["git", "rev-parse", "--short", "HEAD"],
+        cwd=directory,
+        capture_output=True,
+        text=True,
+    )
+    return process.stdout.strip() or "unknown"
+
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    regressions = []
+    for preset, timings in results["results"].items():
+        for name, value in timings.items():
+            old_value = baseline["results"].get(preset, {}).get(name)
+            if old_value and value > old_value * (1 + threshold):
+                regressions.append(
+                    f"{preset}.{name}: {old_value:.2f} -> {value:.2f}"
+                    f" (+{(value / old_value - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time commands on synthetic libraries")
+    parser.add_argument(
+        "--presets", nargs="+", choices=list(PRESETS), default=["small", "medium"]
+    )
+    parser.add_argument("--shows", type=int, help="Custom library: number of shows")
+    parser.add_argument("--episodes", type=int, default=24)
+    parser.add_argument("--symlinked", action="store_true")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", help="Write results to this file too")
+    parser.add_argument("--compare", help="Results file of an earlier run")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    arguments = parser.parse_args()
+
+    specs = {name: PRESETS[name] for name in arguments.presets}
+    if arguments.shows is not None:
+        specs = {
+            "custom": LibrarySpec(
+                shows=arguments.shows,
+                episodes=arguments.episodes,
+                symlinked=arguments.symlinked,
+            )
+        }
+
+    results: Dict = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "libraries": {name: describe(spec) for name, spec in specs.items()},
+        "results": {},
+    }
+    cwd = os.getcwd()
+    for name, spec in specs.items():
+        with tempfile.TemporaryDirectory() as directory:
+            root = Path(directory)
+            config_path = root / "config.json"
+            make_library(root, spec, config_path)
+            os.chdir(root)
+            try:
+                results["results"][name] = bench_library(config_path, arguments.runs)
+            finally:
+                os.chdir(cwd)
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if arguments.output:
+        with open(arguments.output, "w") as file:
+            file.write(output)
+    if arguments.compare:
+        with open(arguments.compare) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, arguments.threshold)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
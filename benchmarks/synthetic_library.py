@@ -0,0 +1,89 @@
+import json
+import os
+import random
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict
+
+from auto_player.app import DEFAULT_CONFIG, Error, create_auto_player
+
+
+@dataclass
+class LibrarySpec:
+    shows: int = 100
+    episodes: int = 24
+    audio_ratio: float = 0.3
+    subtitles_ratio: float = 0.7
+    symlinked: bool = False
+    seed: int = 0
+
+
+PRESETS = {
+    "small": LibrarySpec(shows=1, episodes=10),
+    "medium": LibrarySpec(shows=100, episodes=24, symlinked=True),
+    "large": LibrarySpec(shows=5000, episodes=20),
+}
+
+
+def write_config(path: Path) -> None:
+    config: Dict[str, Any] = dict(DEFAULT_CONFIG)
+    config["scan_cache"] = None
+    with open(path, "w") as file:
+        json.dump(config, file, indent=2)
+
+
+def make_show_files(
+    directory: Path, spec: LibrarySpec, extras: Dict[str, bool]
+) -> None:
+    directory.mkdir(parents=True)
+    for episode in range(1, spec.episodes + 1):
+        name = f"Show - {episode:03}"
+        (directory / f"{name}.mkv").touch()
+        if extras["audio"]:
+            (directory / f"{name}.mka").touch()
+        if extras["subtitles"]:
+            (directory / f"{name}.ass").touch()
+
+
+def make_library(root: Path, spec: LibrarySpec, config_path: Path) -> None:
+    # Placeholder files only; a symlinked library points every show
+    # directory at a separate storage tree, like a media server's links.
+    random_generator = random.Random(spec.seed)
+    write_config(config_path)
+    cwd = os.getcwd()
+    os.chdir(root)
+    try:
+        app = create_auto_player(config_path=str(config_path))
+        for number in range(spec.shows):
+            extras = {
+                "audio": random_generator.random() < spec.audio_ratio,
+                "subtitles": random_generator.random() < spec.subtitles_ratio,
+            }
+            directory = root / "library" / f"show_{number:05}"
+            if spec.symlinked:
+                storage = root / "storage" / f"show_{number:05}"
+                make_show_files(storage, spec, extras)
+                directory.parent.mkdir(exist_ok=True)
+                directory.symlink_to(storage, target_is_directory=True)
+            else:
+                make_show_files(directory, spec, extras)
+            show = app.add_show(
+                name=directory.name,
+                test=True,
+                video_dir=str(directory),
+                video_regex=r".+\.mkv",
+                audio_dir=str(directory),
+                audio_regex=r".+\.mka",
+                subtitles_dir=str(directory),
+                subtitles_regex=r".+\.ass",
+                watched=number % (spec.episodes + 1),
+            )
+            assert not isinstance(show, Error)
+            app.state.add_show(show.show)
+        app.save_state()
+    finally:
+        os.chdir(cwd)
+
+
+def describe(spec: LibrarySpec) -> Dict[str, Any]:
+    return asdict(spec)
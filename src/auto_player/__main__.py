@@ -1,3 +1,3 @@
-from .cli import cli
+from .client import main
 
-cli(prog_name="auto_player")
+main(prog_name="auto_player")
@@ -1,76 +1,186 @@
-import importlib
-import json
 import os
-from pathlib import Path
-from typing import Any, Dict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 from ..backend import Backend
+from ..catalog import (
+    Catalog,
+    CatalogShow,
+    CatalogSource,
+    encode_fingerprint,
+    get_catalog,
+    set_catalog,
+)
+from ..file_group.scan_cache import ScanCache, get_scan_cache, set_scan_cache
+from ..metrics import (
+    MetricsRecorder,
+    MetricsSink,
+    SocketSink,
+    TextfileSink,
+    get_metrics_recorder,
+    set_metrics_recorder,
+)
 from ..player import Player
-from .base import AutoPlayer, Error, Rezult
-
-DEFAULT_CONFIG_PATH = f"{Path.home()}/.autoplayer"
-
-DEFAULT_CONFIG = {
-    "backend": {
-        "class": "auto_player.backend.localfilebackend.LocalfileBackend",
-        "params": {},
-    },
-    "player": {
-        "class": "auto_player.player.CunstuctorPlayer",
-        "params": {
-            "base": ["echo"],
-            "video_file_wrapper": ["{episode.video_file}"],
-            "audio_file_wrapper": ["{episode.audio_file}"],
-            "subtitles_file_wrapper": ["{episode.subtitles_file}"],
-            "appendix": [],
-        },
-    },
-}
-
-
-def read_config(config_path: str) -> Dict[str, Any]:
-    if not os.path.exists(config_path):
-        with open(config_path, "w") as file:
-            json.dump(DEFAULT_CONFIG, file, indent=2)
-    with open(config_path, "r") as file:
-        user_config = json.load(file)
-    config = DEFAULT_CONFIG.copy()
-    config.update(user_config)
-    return config
-
-
-def get_class(class_path: str) -> type:
-    class_name = class_path.split(".")[-1]
-    class_module = ".".join(class_path.split(".")[:-1])
-    module = importlib.import_module(class_module)
-    class_object = getattr(module, class_name)
-    return class_object
-
-
-def create_backend(config: Dict[str, Any], session: str) -> Backend:
-    backend_config = config["backend"]
-    class_path = backend_config["class"]
-    params = backend_config["params"]
-    backend = get_class(class_path)(session=session, **params)
-    if isinstance(backend, Backend):
-        return backend
-    raise Exception("Provided backend class is not a Backend")
-
-
-def create_player(config: Dict[str, Any]) -> Player:
-    backend_config = config["player"]
-    class_path = backend_config["class"]
-    params = backend_config["params"]
-    player = get_class(class_path)(**params)
-    if isinstance(player, Player):
-        return player
-    raise Exception("Provided player class is not a Player")
+from ..probe import ProbeCache, get_probe_cache, set_probe_cache
+from ..processes import process_pool_context
+from ..profiling import span
+from .base import AutoPlayer, Error, ImportResult, Rezult
+from .config import (
+    DEFAULT_CONFIG,
+    DEFAULT_CONFIG_PATH,
+    CompiledConfig,
+    ConfigError,
+    load_config,
+)
+
+
+def create_backend(config: CompiledConfig, session: str) -> Backend:
+    return config.backend_class(session=session, **config.backend_params)
+
+
+def create_player(config: CompiledConfig) -> Player:
+    return config.player_class(**config.player_params)
+
+
+def configure_scan_cache(config: Dict[str, Any]) -> None:
+    scan_cache_config = config.get("scan_cache")
+    if scan_cache_config is None:
+        set_scan_cache(None)
+        return
+    cache = ScanCache(**scan_cache_config)
+    current_cache = get_scan_cache()
+    if current_cache is not None and current_cache.same_settings(cache):
+        return
+    set_scan_cache(cache)
+
+
+def configure_probe_cache(config: Dict[str, Any]) -> None:
+    probe_cache_config = config.get("probe_cache")
+    if probe_cache_config is None:
+        set_probe_cache(None)
+        return
+    cache = ProbeCache(**probe_cache_config)
+    current_cache = get_probe_cache()
+    if current_cache is not None and current_cache.same_settings(cache):
+        return
+    set_probe_cache(cache)
+
+
+def configure_catalog(config: Dict[str, Any]) -> None:
+    catalog_config = config.get("catalog")
+    if catalog_config is None:
+        set_catalog(None)
+        return
+    catalog = Catalog(**catalog_config)
+    current_catalog = get_catalog()
+    if current_catalog is not None and current_catalog.same_settings(catalog):
+        return
+    set_catalog(catalog)
+
+
+def configure_metrics(config: Dict[str, Any]) -> None:
+    metrics_config = config.get("metrics")
+    current_recorder = get_metrics_recorder()
+    if metrics_config is None:
+        if current_recorder is not None:
+            current_recorder.flush()
+        set_metrics_recorder(None)
+        return
+    sink: MetricsSink
+    if "textfile" in metrics_config:
+        sink = TextfileSink(metrics_config["textfile"])
+    else:
+        sink = SocketSink(metrics_config["socket"])
+    if current_recorder is not None and current_recorder.sink.same_settings(sink):
+        return
+    if current_recorder is not None:
+        current_recorder.flush()
+    recorder = MetricsRecorder(sink)
+    recorder.register_flush()
+    set_metrics_recorder(recorder)
 
 
 def create_auto_player(
     config_path: str = DEFAULT_CONFIG_PATH, session: str = "default"
 ) -> AutoPlayer:
-    config = read_config(config_path)
-    backend = create_backend(config, session)
-    player = create_player(config)
-    return AutoPlayer(backend, player)
+    with span("read_config"):
+        config = load_config(config_path)
+    configure_scan_cache(config.data)
+    configure_probe_cache(config.data)
+    configure_metrics(config.data)
+    configure_catalog(config.data)
+    with span("create_backend"):
+        backend = create_backend(config, session)
+    with span("create_player"):
+        player = create_player(config)
+    write_behind = config.data.get("write_behind")
+    return AutoPlayer(
+        backend,
+        player,
+        write_behind=write_behind is not None,
+        flush_delay=None if write_behind is None else write_behind.get("delay"),
+    )
+
+
+DEFAULT_REINDEX_JOBS = 4
+
+IndexedSource = Tuple[CatalogSource, Optional[List[CatalogShow]]]
+
+
+def safe_length(show: Any) -> Optional[int]:
+    try:
+        return len(show)
+    except Exception:
+        return None
+
+
+def index_source(config_path: str, source: CatalogSource, force: bool) -> IndexedSource:
+    # Runs in a worker process: backends find their files through the cwd.
+    os.chdir(source.directory)
+    config = load_config(config_path)
+    configure_scan_cache(config.data)
+    backend = create_backend(config, source.session)
+    fingerprint = encode_fingerprint(backend.fingerprint())
+    indexed = CatalogSource(
+        directory=source.directory,
+        session=source.session,
+        backend=backend.NAME,
+        fingerprint=fingerprint,
+    )
+    if not force and fingerprint is not None and fingerprint == source.fingerprint:
+        return indexed, None
+    shows = [
+        CatalogShow(name=show.name, counter=show.counter, length=safe_length(show))
+        for show in backend.load().shows
+    ]
+    return indexed, shows
+
+
+def reindex(
+    config_path: str,
+    catalog: Catalog,
+    sources: List[CatalogSource],
+    jobs: int = DEFAULT_REINDEX_JOBS,
+    force: bool = False,
+) -> Iterator[Tuple[CatalogSource, Rezult[Optional[int]]]]:
+    config_path = os.path.abspath(config_path)
+    with ProcessPoolExecutor(
+        max_workers=max(jobs, 1), mp_context=process_pool_context()
+    ) as executor:
+        futures = [
+            executor.submit(index_source, config_path, source, force)
+            for source in sources
+        ]
+        for source, future in zip(sources, futures):
+            try:
+                indexed, shows = future.result()
+            except FileNotFoundError:
+                catalog.remove(source.directory, source.session)
+                yield source, Error("Directory is gone, removed from catalog")
+                continue
+            except Exception as e:
+                yield source, Error(str(e))
+                continue
+            if shows is not None:
+                catalog.update(indexed, shows)
+            yield indexed, None if shows is None else len(shows)
@@ -1,16 +1,58 @@
+import os
+import re
+import sqlite3
 from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, TypeVar, Union
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    MutableSequence,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
 from ..backend import Backend
+from ..catalog import (
+    Catalog,
+    CatalogEntry,
+    CatalogSource,
+    catalog_shows,
+    encode_fingerprint,
+    get_catalog,
+)
 from ..file_group import FilesGroup, FilesGroupType
 from ..player import Player
+from ..metrics import count, timed
+from ..prefetch import prefetch_episode
+from ..probe import DEFAULT_PROBE_JOBS, probe_stream
+from ..profiling import span
 from ..show import Show
 from ..show.statefull import StatefullShowWrapper
-from .file_group_factory import make_counter, make_files_group
+from .file_group_factory import (
+    DEFAULT_AUDIO_REGEX,
+    DEFAULT_SUBTITLES_REGEX,
+    DEFAULT_VIDEO_REGEX,
+    make_alignment,
+    make_counter,
+    make_files_group,
+)
+from .importer import DEFAULT_IMPORT_JOBS, discover_shows
+from .parallel import DaemonWorkers
+from .write_behind import WriteBehind
 
 T = TypeVar("T")
 
+DEFAULT_SCAN_JOBS = 8
+DEFAULT_SCAN_TIMEOUT = 10.0
+
 
 @dataclass
 class Error:
@@ -20,6 +62,12 @@ class Error:
 Rezult = Union[Error, T]
 
 
+@dataclass
+class ImportResult:
+    added: List["ShowCommandWrapper"]
+    skipped: List[Tuple[str, str]]
+
+
 @dataclass
 class ShowCommandWrapper:
     show: StatefullShowWrapper
@@ -30,28 +78,60 @@ class ShowCommandWrapper:
             show=self.show, episode_number=episode_number, correct_zero=correct_zero
         )
 
-    def info(self) -> Rezult[Dict[str, Any]]:
+    def play_continuous(
+        self, on_episode: Callable[[int], None] = lambda _: None
+    ) -> Rezult[None]:
+        return self.app.play_continuous(show=self.show, on_episode=on_episode)
+
+    def info(
+        self, stream: bool = False, media: bool = False, jobs: int = DEFAULT_PROBE_JOBS
+    ) -> Rezult[Dict[str, Any]]:
+        # With stream the length (and duration) are only filled in once the
+        # video files were consumed, so a walk of a large tree prints as it
+        # goes instead of finishing first.
         info = OrderedDict()
         info["name"] = self.show.name
-        info["length"] = len(self.show)
         info["watched"] = self.show.counter
+        if not stream:
+            info["length"] = len(self.show)
         directory = self.show.video_group.directory
 
+        def path_info(path: Path) -> Dict[str, Any]:
+            relative_path = path.relative_to(directory)
+            file_info = OrderedDict()
+            file_info["path"] = str(path)
+            file_info["relative_path"] = str(relative_path)
+            return file_info
+
         def files_group_info(files_group: Optional[FilesGroup]) -> Dict[str, Any]:
             group_info: Dict[str, Any] = OrderedDict()
             if files_group is None:
                 return group_info
             group_info["class"] = type(files_group)
-            group_info["files"] = []
-            for path in files_group:
-                relative_path = path.relative_to(directory)
-                file_info = OrderedDict()
-                file_info["path"] = str(path)
-                file_info["relative_path"] = str(relative_path)
-                group_info["files"].append(file_info)
+            # Lazy, so groups that walk large trees print while they walk.
+            group_info["files"] = (path_info(path) for path in files_group)
             return group_info
 
-        info["video_group"] = files_group_info(self.show.video_group)
+        def media_files(files_group: FilesGroup) -> Iterator[Dict[str, Any]]:
+            duration = 0.0
+            for path, media_info in probe_stream(files_group, jobs=jobs):
+                file_info = path_info(path)
+                file_info["media"] = media_info
+                if media_info is not None and media_info.duration:
+                    duration += media_info.duration
+                yield file_info
+            info["duration"] = duration or None
+
+        def video_files(files: Iterator[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+            yield from files
+            info["length"] = len(self.show)
+
+        video_group_info = files_group_info(self.show.video_group)
+        if media:
+            video_group_info["files"] = media_files(self.show.video_group)
+        if stream:
+            video_group_info["files"] = video_files(video_group_info["files"])
+        info["video_group"] = video_group_info
         info["audio_group"] = files_group_info(self.show.audio_group)
         info["subtitles_group"] = files_group_info(self.show.subtitles_group)
         return info
@@ -66,6 +146,7 @@ class ShowCommandWrapper:
             group_type=FilesGroupType.SUBTITLES, **kwargs
         )
         counter = make_counter(**kwargs)
+        alignment = make_alignment(**kwargs)
 
         if video_group is not None:
             self.show.show.video_group = video_group
@@ -75,6 +156,9 @@ class ShowCommandWrapper:
             self.show.show.subtitles_group = subtitles_group
         if counter is not None:
             self.show.counter = counter
+        if alignment is not None:
+            self.show.show.alignment = alignment
+        self.show.mark_dirty()
 
         if not test:
             self.app.save_state()
@@ -83,10 +167,21 @@ class ShowCommandWrapper:
 
 
 class AutoPlayer:
-    def __init__(self, backend: Backend, player: Player):
+    def __init__(
+        self,
+        backend: Backend,
+        player: Player,
+        write_behind: bool = False,
+        flush_delay: Optional[float] = None,
+    ):
         self.backend = backend
         self.player = player
-        self.state = backend.load()
+        self.write_behind = (
+            WriteBehind(self.flush_state, delay=flush_delay) if write_behind else None
+        )
+        with span("backend.load"):
+            self.state = backend.load()
+        self.state.mark_clean()
 
     def play(
         self,
@@ -104,7 +199,9 @@ class AutoPlayer:
             )
         except Exception as e:
             return Error(str(e))
-        status = self.player.play(episode_set)
+        with span("player.play"):
+            status = self.player.play(episode_set)
+        count("player_exits", code=status.return_code)
         if not status.failed:
             self.save_state()
             return None
@@ -112,24 +209,108 @@ class AutoPlayer:
             return Error(str(status.error))
         return Error("Failed to play episode")
 
-    def list_shows(self) -> List[StatefullShowWrapper]:
+    def play_continuous(
+        self,
+        show: StatefullShowWrapper,
+        on_episode: Callable[[int], None] = lambda _: None,
+    ) -> Rezult[None]:
+        if show.counter >= len(show):
+            return Error("No more video files in that show")
+        prefetcher = ThreadPoolExecutor(max_workers=1)
+        saver = ThreadPoolExecutor(max_workers=1)
+        saved: Optional[Future] = None
+
+        def prefetch(index: int) -> Optional[Future]:
+            if index >= len(show):
+                return None
+            return prefetcher.submit(prefetch_episode, show, index)
+
+        def wait_saved() -> Rezult[None]:
+            # A lost save would silently drop the progress made so far.
+            if saved is None:
+                return None
+            try:
+                saved.result()
+            except Exception as e:
+                return Error(f"Failed to save state: {e}")
+            return None
+
+        def play_episodes() -> Rezult[None]:
+            nonlocal saved
+            index = show.counter
+            next_episode = prefetch(index)
+            while next_episode is not None:
+                try:
+                    episode_set = next_episode.result()
+                except Exception as e:
+                    return Error(str(e))
+                next_episode = prefetch(index + 1)
+                on_episode(index + 1)
+                with span("player.play"):
+                    status = self.player.play(episode_set)
+                count("player_exits", code=status.return_code)
+                if status.failed:
+                    if status.error is not None:
+                        return Error(str(status.error))
+                    return Error("Failed to play episode")
+                index += 1
+                show.set_counter(index)
+                error = wait_saved()
+                if error is not None:
+                    return error
+                saved = saver.submit(self.save_state)
+            return None
+
+        try:
+            rezult = play_episodes()
+        finally:
+            prefetcher.shutdown(cancel_futures=True)
+            saver.shutdown()
+        save_rezult = wait_saved()
+        return rezult if isinstance(rezult, Error) else save_rezult
+
+    def list_shows(self) -> MutableSequence[StatefullShowWrapper]:
         return self.state.shows
 
-    def get_show(self, name_or_number: str) -> Rezult[ShowCommandWrapper]:
+    def show_lengths(
+        self,
+        shows: Optional[Iterable[StatefullShowWrapper]] = None,
+        jobs: int = DEFAULT_SCAN_JOBS,
+        timeout: Optional[float] = DEFAULT_SCAN_TIMEOUT,
+    ) -> Iterator[Tuple[StatefullShowWrapper, Rezult[int]]]:
+        shows = list(self.list_shows() if shows is None else shows)
+        workers = DaemonWorkers(len, shows, jobs=max(jobs, 1))
         try:
-            number = int(name_or_number)
-        except Exception:
-            number = -1
-        if number > 0:
-            show = self.state.get_show_by_number(number)
+            for index, show in enumerate(shows):
+                try:
+                    length = workers.result(index, timeout=timeout)
+                except Exception as e:
+                    yield show, Error(str(e))
+                    continue
+                yield show, length
+        finally:
+            workers.cancel()
+
+    def get_show(self, name_or_number: str) -> Rezult[ShowCommandWrapper]:
+        if name_or_number.isdigit() and int(name_or_number) > 0:
+            show = self.state.get_show_by_number(int(name_or_number))
         else:
             name = name_or_number
             show = self.state.get_show_by_name(name)
+            if show is None:
+                names = self.state.find_show_names(name)
+                if len(names) > 1:
+                    return Error(f"Ambiguous show name, candidates: {', '.join(names)}")
+                if len(names) == 1:
+                    show = self.state.get_show_by_name(names[0])
         if show is None:
             return Error("No such show")
         show_wrapper = ShowCommandWrapper(app=self, show=show)
         return show_wrapper
 
+    def find_show_names(self, prefix: str) -> List[str]:
+        return self.state.find_show_names(prefix)
+
     def add_show(
         self, name: str, test: bool = False, **kwargs
     ) -> Rezult[ShowCommandWrapper]:
@@ -139,6 +320,7 @@ class AutoPlayer:
             group_type=FilesGroupType.SUBTITLES, **kwargs
         )
         counter = make_counter(**kwargs)
+        alignment = make_alignment(**kwargs)
 
         if video_group is None:
             return Error("Video files not specified")
@@ -150,19 +332,102 @@ class AutoPlayer:
             video_group=video_group,
             audio_group=audio_group,
             subtitles_group=subtitles_group,
+            alignment=alignment,
         )
         statefull_show = StatefullShowWrapper(show=show, counter=counter)
 
         if not test:
-            self.state.shows.append(statefull_show)
-            self.backend.save(self.state)
+            self.state.add_show(statefull_show)
+            self.save_state()
         show_wrapper = ShowCommandWrapper(app=self, show=statefull_show)
         return show_wrapper
 
+    def import_shows(
+        self,
+        root: str,
+        test: bool = False,
+        jobs: int = DEFAULT_IMPORT_JOBS,
+        on_progress: Callable[[int, int], None] = lambda directories, shows: None,
+        video_regex: str = DEFAULT_VIDEO_REGEX,
+        audio_regex: str = DEFAULT_AUDIO_REGEX,
+        subtitles_regex: str = DEFAULT_SUBTITLES_REGEX,
+    ) -> ImportResult:
+        regexes = {
+            FilesGroupType.VIDEO: re.compile(video_regex),
+            FilesGroupType.AUDIO: re.compile(audio_regex),
+            FilesGroupType.SUBTITLES: re.compile(subtitles_regex),
+        }
+        with span("import.discover"):
+            shows, errors = discover_shows(Path(root), regexes, jobs, on_progress)
+        result = ImportResult(
+            added=[], skipped=[(str(path), message) for path, message in errors]
+        )
+        used_directories = {
+            os.path.realpath(show.video_group.directory) for show in self.state.shows
+        }
+        for show in shows:
+            if self.state.get_show_by_name(show.name) is not None:
+                result.skipped.append((show.name, "a show with that name exists"))
+                continue
+            if os.path.realpath(show.video_group.directory) in used_directories:
+                result.skipped.append((show.name, "directory is already a show"))
+                continue
+            statefull_show = StatefullShowWrapper(show=show)
+            if not test:
+                self.state.add_show(statefull_show)
+            result.added.append(ShowCommandWrapper(app=self, show=statefull_show))
+        # One save for the whole import, however many shows it found.
+        if result.added and not test:
+            self.save_state()
+        return result
+
     def delete_show(self, show: StatefullShowWrapper) -> Rezult[None]:
-        self.state.shows.remove(show)
-        self.backend.save(self.state)
+        self.state.remove_show(show)
+        self.save_state()
         return None
 
     def save_state(self) -> None:
-        self.backend.save(self.state)
+        if self.write_behind is not None:
+            self.write_behind.request()
+            return
+        self.flush_state()
+
+    def flush_state(self) -> None:
+        changes = self.state.take_changes()
+        if changes == []:
+            return
+        try:
+            with span("backend.save"), timed("save_seconds", backend=self.backend.NAME):
+                if changes is None:
+                    self.backend.save(self.state)
+                else:
+                    self.backend.save_shows(self.state, changes)
+        except BaseException:
+            self.state.mark_changed()
+            raise
+        catalog = get_catalog()
+        if catalog is not None:
+            with span("catalog.update"):
+                self._update_catalog(catalog)
+
+    def _update_catalog(self, catalog: Catalog) -> None:
+        source = CatalogSource(
+            directory=os.getcwd(),
+            session=self.backend.session,
+            backend=self.backend.NAME,
+            fingerprint=encode_fingerprint(self.backend.fingerprint()),
+        )
+        try:
+            catalog.update(source, catalog_shows(self.state.shows))
+        except sqlite3.Error:
+            # The catalog is only an index, a locked one must not fail a save.
+            pass
+
+    def search_catalog(self, text: Optional[str] = None) -> Rezult[List[CatalogEntry]]:
+        catalog = get_catalog()
+        if catalog is None:
+            return Error("Catalog is disabled, set catalog.path in config")
+        try:
+            return catalog.search(text)
+        except sqlite3.Error as e:
+            return Error(f"Can't read catalog {catalog.path}: {e}")
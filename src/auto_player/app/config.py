@@ -0,0 +1,228 @@
+import copy
+import importlib
+import inspect
+import json
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from ..backend import Backend
+from ..player import Player
+
+DEFAULT_CONFIG_PATH = f"{Path.home()}/.autoplayer"
+
+DEFAULT_CONFIG = {
+    "backend": {
+        "class": "auto_player.backend.localfilebackend.LocalfileBackend",
+        "params": {},
+    },
+    "player": {
+        "class": "auto_player.player.CunstuctorPlayer",
+        "params": {
+            "base": ["echo"],
+            "video_file_wrapper": ["{episode.video_file}"],
+            "audio_file_wrapper": ["{episode.audio_file}"],
+            "subtitles_file_wrapper": ["{episode.subtitles_file}"],
+            "appendix": [],
+        },
+    },
+    "scan_cache": {
+        "path": f"{Path.home()}/.autoplayer_scan_cache",
+        "max_entries": 1024,
+    },
+    "probe_cache": {
+        "path": f"{Path.home()}/.autoplayer_probe_cache",
+        "max_entries": 16384,
+    },
+    "metrics": None,
+    # Opt-in, every save would write to it otherwise.
+    "catalog": None,
+    "write_behind": None,
+}
+
+ConfigKey = Tuple[int, int, int]
+
+
+class ConfigError(Exception):
+    def __init__(self, location: str, message: str):
+        super().__init__(f"{location}: {message}")
+        self.location = location
+        self.message = message
+
+
+@dataclass
+class CompiledConfig:
+    data: Dict[str, Any]
+    backend_class: type
+    backend_params: Dict[str, Any]
+    player_class: type
+    player_params: Dict[str, Any]
+
+
+def deep_merge(defaults: Dict[str, Any], overrides: Dict[str, Any]) -> Dict[str, Any]:
+    merged = copy.deepcopy(defaults)
+    for key, value in overrides.items():
+        default = merged.get(key)
+        if isinstance(default, dict) and isinstance(value, dict):
+            merged[key] = deep_merge(default, value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+def merge_config(user_config: Dict[str, Any]) -> Dict[str, Any]:
+    defaults = copy.deepcopy(DEFAULT_CONFIG)
+    # Default params only make sense for the default class.
+    for section in ("backend", "player"):
+        user_section = user_config.get(section)
+        if not isinstance(user_section, dict):
+            continue
+        default_class = defaults[section]["class"]
+        if user_section.get("class", default_class) != default_class:
+            defaults[section]["params"] = {}
+    return deep_merge(defaults, user_config)
+
+
+def read_config(config_path: str) -> Dict[str, Any]:
+    if not os.path.exists(config_path):
+        with open(config_path, "w") as file:
+            json.dump(DEFAULT_CONFIG, file, indent=2)
+    with open(config_path, "r") as file:
+        try:
+            user_config = json.load(file)
+        except ValueError as e:
+            raise ConfigError(config_path, f"invalid JSON: {e}")
+    if not isinstance(user_config, dict):
+        raise ConfigError(config_path, "expected a JSON object")
+    return merge_config(user_config)
+
+
+def get_class(class_path: str) -> type:
+    class_name = class_path.split(".")[-1]
+    class_module = ".".join(class_path.split(".")[:-1])
+    module = importlib.import_module(class_module)
+    class_object = getattr(module, class_name)
+    return class_object
+
+
+def expect_dict(value: Any, location: str) -> Dict[str, Any]:
+    if not isinstance(value, dict):
+        raise ConfigError(location, f"expected an object, got {json.dumps(value)}")
+    return value
+
+
+def expect_type(section: Dict[str, Any], key: str, kind: type, location: str) -> Any:
+    if key not in section:
+        raise ConfigError(f"{location}.{key}", "is missing")
+    value = section[key]
+    if kind is float and isinstance(value, int) and not isinstance(value, bool):
+        return float(value)
+    if not isinstance(value, kind) or isinstance(value, bool) != (kind is bool):
+        raise ConfigError(
+            f"{location}.{key}", f"expected {kind.__name__}, got {json.dumps(value)}"
+        )
+    return value
+
+
+def resolve_class(
+    section: Dict[str, Any], location: str, base: type, **fixed_params: Any
+) -> Tuple[type, Dict[str, Any]]:
+    class_path = expect_type(section, "class", str, location)
+    try:
+        class_object = get_class(class_path)
+    except (ImportError, AttributeError, ValueError) as e:
+        raise ConfigError(f"{location}.class", f"can't import '{class_path}': {e}")
+    if not isinstance(class_object, type) or not issubclass(class_object, base):
+        raise ConfigError(
+            f"{location}.class", f"'{class_path}' is not a {base.__name__}"
+        )
+    params = expect_dict(section.get("params", {}), f"{location}.params")
+    try:
+        inspect.signature(class_object).bind(**fixed_params, **params)
+    except TypeError as e:
+        raise ConfigError(f"{location}.params", str(e))
+    return class_object, params
+
+
+def validate_optional_section(
+    config: Dict[str, Any],
+    name: str,
+    keys: Dict[str, type],
+    required: Tuple[str, ...] = (),
+) -> None:
+    section = config.get(name)
+    if section is None:
+        return
+    section = expect_dict(section, name)
+    unknown = set(section) - set(keys)
+    if unknown:
+        raise ConfigError(name, f"unknown keys {sorted(unknown)}")
+    for key in required:
+        if key not in section:
+            raise ConfigError(f"{name}.{key}", "is missing")
+    for key, kind in keys.items():
+        if key in section:
+            expect_type(section, key, kind, name)
+
+
+def compile_config(config: Dict[str, Any]) -> CompiledConfig:
+    backend_class, backend_params = resolve_class(
+        expect_dict(config.get("backend"), "backend"),
+        "backend",
+        Backend,
+        session="default",
+    )
+    player_class, player_params = resolve_class(
+        expect_dict(config.get("player"), "player"), "player", Player
+    )
+    validate_optional_section(
+        config, "scan_cache", {"path": str, "max_entries": int}, required=("path",)
+    )
+    validate_optional_section(
+        config, "probe_cache", {"path": str, "max_entries": int}, required=("path",)
+    )
+    validate_optional_section(config, "write_behind", {"delay": float})
+    validate_optional_section(config, "catalog", {"path": str}, required=("path",))
+    validate_optional_section(config, "metrics", {"textfile": str, "socket": str})
+    if config.get("metrics") is not None and len(config["metrics"]) != 1:
+        raise ConfigError("metrics", "expected exactly one of 'textfile', 'socket'")
+    return CompiledConfig(
+        data=config,
+        backend_class=backend_class,
+        backend_params=backend_params,
+        player_class=player_class,
+        player_params=player_params,
+    )
+
+
+_snapshots: Dict[str, Tuple[ConfigKey, CompiledConfig]] = {}
+_snapshots_lock = threading.Lock()
+
+
+def config_key(config_path: str) -> Optional[ConfigKey]:
+    try:
+        stat = os.stat(config_path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+def load_config(config_path: str) -> CompiledConfig:
+    config_path = os.path.abspath(config_path)
+    key = config_key(config_path)
+    with _snapshots_lock:
+        snapshot = _snapshots.get(config_path)
+    if key is not None and snapshot is not None and snapshot[0] == key:
+        return snapshot[1]
+    data = read_config(config_path)
+    key = config_key(config_path)
+    try:
+        compiled = compile_config(data)
+    except ConfigError as e:
+        raise ConfigError(f"{config_path}: {e.location}", e.message)
+    if key is not None:
+        with _snapshots_lock:
+            _snapshots[config_path] = (key, compiled)
+    return compiled
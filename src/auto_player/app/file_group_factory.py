@@ -3,7 +3,14 @@ from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 from ..file_group import FilesGroup, FilesGroupType
+from ..file_group.ordering import NaturalOrdering, Ordering
+from ..file_group.recursive_file_group import RecursiveFileGroup
 from ..file_group.regex_file_group import RegexFileGroup
+from ..show.alignment import EpisodeAlignment
+
+DEFAULT_VIDEO_REGEX = r".+\.(mkv|mp4)"
+DEFAULT_AUDIO_REGEX = r".+\.(i don't remember audio resolutions)"
+DEFAULT_SUBTITLES_REGEX = r".+\.(ass|srt)"
 
 FILE_GROUP_TYPES_PREFIXES = {
     FilesGroupType.VIDEO: "video_",
@@ -17,6 +24,9 @@ class FileGroupFactory:
     def mandatory_options(self) -> List[str]:
         return ["group_type"]
 
+    def fits(self, options: Dict[str, Any]) -> bool:
+        return set(self.mandatory_options).issubset(set(options.keys()))
+
     def create(self, options: Dict[str, Any]) -> FilesGroup:
         ...
 
@@ -35,20 +45,44 @@ class RegexFileGroupFactory(FileGroupFactory):
             group_type=group_type,
             directory=directory,
             regex=regex,
+            order=options.get("order", None) or Ordering.NAME,
         )
         return regex_file_group
 
 
+class RecursiveFileGroupFactory(FileGroupFactory):
+    @property
+    def mandatory_options(self) -> List[str]:
+        return super().mandatory_options + ["regex", "dir", "recursive"]
+
+    def fits(self, options: Dict[str, Any]) -> bool:
+        return super().fits(options) and bool(options["recursive"])
+
+    def create(self, options: Dict[str, Any]) -> RecursiveFileGroup:
+        group_type = options["group_type"]
+        directory = Path(options["dir"])
+        regex = re.compile(options["regex"])
+        exclude = options.get("exclude", None)
+
+        recursive_file_group = RecursiveFileGroup(
+            group_type=group_type,
+            directory=directory,
+            regex=regex,
+            exclude=re.compile(exclude) if exclude is not None else None,
+            order=options.get("order", None) or NaturalOrdering.NAME,
+        )
+        return recursive_file_group
+
+
 FILES_GROUPS_FACTORIES: List[FileGroupFactory] = [
+    RecursiveFileGroupFactory(),
     RegexFileGroupFactory(),
 ]
 
 
 def try_files_factories(options: Dict[str, Any]) -> Optional[FilesGroup]:
     for factory in FILES_GROUPS_FACTORIES:
-        mandatory_options = factory.mandatory_options
-        fit = set(mandatory_options).issubset(set(options.keys()))
-        if fit:
+        if factory.fits(options):
             files_group = factory.create(options)
             return files_group
     return None
@@ -76,3 +110,12 @@ def make_files_group(group_type: FilesGroupType, **kwargs) -> Optional[FilesGrou
 
 def make_counter(**kwargs) -> Optional[int]:
     return kwargs.get("watched", None)
+
+
+def make_alignment(**kwargs) -> Optional[EpisodeAlignment]:
+    episode_regex = kwargs.get("episode_regex", None)
+    if episode_regex is not None:
+        return EpisodeAlignment(regex=re.compile(episode_regex))
+    if kwargs.get("align", False):
+        return EpisodeAlignment()
+    return None
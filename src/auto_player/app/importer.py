@@ -0,0 +1,157 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Pattern, Tuple
+
+from ..file_group import FilesGroup, FilesGroupType, directory_stat_key
+from ..file_group.ordering import natural_key
+from ..file_group.regex_file_group import RegexFileGroup
+from ..file_group.scan_cache import StatKey
+from ..file_group.scanner import get_directory_scanner
+from ..show import Show
+
+DEFAULT_IMPORT_JOBS = 8
+
+Regexes = Dict[FilesGroupType, Pattern[str]]
+
+
+@dataclass
+class Listing:
+    files: List[str]
+    subdirectories: List[Path]
+
+
+@dataclass
+class DiscoveredDirectory:
+    directory: Path
+    subdirectories: List[Path] = field(default_factory=list)
+    show: Optional[Show] = None
+
+
+def list_directory(directory: Path) -> Listing:
+    files = []
+    subdirectories = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_file():
+                files.append(entry.name)
+            # Linked directories could lead out of the root or back into it.
+            elif entry.is_dir(follow_symlinks=False):
+                subdirectories.append(directory / entry.name)
+    subdirectories.sort(key=lambda path: natural_key(path.name))
+    return Listing(files=files, subdirectories=subdirectories)
+
+
+def show_name(root: Path, directory: Path) -> str:
+    parts = directory.relative_to(root).parts
+    return " - ".join(parts) if parts else root.resolve().name
+
+
+def prime_scanner(
+    directory: Path, key: StatKey, files: List[str], regexes: Iterable[Pattern[str]]
+) -> None:
+    # The walk listed the directory already; the groups created for it pick
+    # their files from that listing instead of reading the directory again.
+    scanner = get_directory_scanner()
+    absolute_directory = os.path.abspath(directory)
+    for regex in regexes:
+        scanner.register(absolute_directory, regex)
+    scanner.prime(absolute_directory, key, files)
+
+
+def make_group(
+    group_type: FilesGroupType, directory: Path, regex: Pattern[str], files: List[str]
+) -> Optional[FilesGroup]:
+    if not any(regex.match(name) for name in files):
+        return None
+    group = RegexFileGroup(group_type=group_type, directory=directory, regex=regex)
+    len(group)
+    return group
+
+
+def find_group(
+    group_type: FilesGroupType, directory: Path, regex: Pattern[str], listing: Listing
+) -> Optional[FilesGroup]:
+    group = make_group(group_type, directory, regex, listing.files)
+    # Audio and subtitles often sit in a subdirectory like "Subs".
+    for subdirectory in listing.subdirectories:
+        if group is not None:
+            break
+        try:
+            key = directory_stat_key(subdirectory)
+            files = list_directory(subdirectory).files
+        except OSError:
+            continue
+        prime_scanner(subdirectory, key, files, [regex])
+        group = make_group(group_type, subdirectory, regex, files)
+    return group
+
+
+def discover_directory(
+    root: Path, directory: Path, regexes: Regexes
+) -> DiscoveredDirectory:
+    key = directory_stat_key(directory)
+    listing = list_directory(directory)
+    video_regex = regexes[FilesGroupType.VIDEO]
+    if not any(video_regex.match(name) for name in listing.files):
+        return DiscoveredDirectory(directory, subdirectories=listing.subdirectories)
+    prime_scanner(directory, key, listing.files, regexes.values())
+    video_group = make_group(
+        FilesGroupType.VIDEO, directory, video_regex, listing.files
+    )
+    assert video_group is not None
+    show = Show(
+        name=show_name(root, directory),
+        video_group=video_group,
+        audio_group=find_group(
+            FilesGroupType.AUDIO, directory, regexes[FilesGroupType.AUDIO], listing
+        ),
+        subtitles_group=find_group(
+            FilesGroupType.SUBTITLES,
+            directory,
+            regexes[FilesGroupType.SUBTITLES],
+            listing,
+        ),
+    )
+    # Subdirectories of a show are its extras or subtitles, not other shows.
+    return DiscoveredDirectory(directory, show=show)
+
+
+def discover_shows(
+    root: Path,
+    regexes: Regexes,
+    jobs: int = DEFAULT_IMPORT_JOBS,
+    on_progress: Callable[[int, int], None] = lambda directories, shows: None,
+) -> Tuple[List[Show], List[Tuple[Path, str]]]:
+    shows: List[Show] = []
+    errors: List[Tuple[Path, str]] = []
+    directories = 0
+    with ThreadPoolExecutor(max_workers=max(jobs, 1)) as executor:
+        pending: Dict[Future, Path] = {
+            executor.submit(discover_directory, root, root, regexes): root
+        }
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                directory = pending.pop(future)
+                directories += 1
+                try:
+                    discovered = future.result()
+                except OSError as e:
+                    errors.append((directory, str(e)))
+                    continue
+                if discovered.show is not None:
+                    shows.append(discovered.show)
+                for subdirectory in discovered.subdirectories:
+                    future = executor.submit(
+                        discover_directory, root, subdirectory, regexes
+                    )
+                    pending[future] = subdirectory
+            on_progress(directories, len(shows))
+    shows.sort(
+        key=lambda show: [
+            natural_key(part) for part in show.video_group.directory.parts
+        ]
+    )
+    return shows, errors
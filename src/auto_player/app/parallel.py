@@ -0,0 +1,76 @@
+import threading
+import time
+from concurrent.futures import Future, wait
+from queue import Empty, SimpleQueue
+from typing import Any, Callable, Generic, List, Optional, Sequence, Set, TypeVar
+
+T = TypeVar("T")
+
+
+class DaemonWorkers(Generic[T]):
+    # Daemon threads instead of ThreadPoolExecutor: a worker stuck on a hung
+    # mount must not keep the process alive at exit.
+    def __init__(self, function: Callable[[T], Any], items: Sequence[T], jobs: int):
+        self._function = function
+        self._items = items
+        self.futures: List[Future] = [Future() for _ in items]
+        self._started: List[Optional[float]] = [None] * len(items)
+        self._replaced: Set[int] = set()
+        self._lock = threading.Lock()
+        self._queue: SimpleQueue[int] = SimpleQueue()
+        for index in range(len(items)):
+            self._queue.put(index)
+        for _ in range(min(jobs, len(items))):
+            self._start_worker()
+
+    def _start_worker(self) -> None:
+        threading.Thread(target=self._work, daemon=True).start()
+
+    def _work(self) -> None:
+        while True:
+            try:
+                index = self._queue.get_nowait()
+            except Empty:
+                return
+            future = self.futures[index]
+            if not future.set_running_or_notify_cancel():
+                continue
+            self._started[index] = time.monotonic()
+            try:
+                future.set_result(self._function(self._items[index]))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def _replace_stuck_workers(self, timeout: float) -> None:
+        # A worker past the timeout may never come back, queued items get a
+        # new worker instead of waiting behind it.
+        now = time.monotonic()
+        with self._lock:
+            for index, started in enumerate(self._started):
+                if (
+                    started is None
+                    or index in self._replaced
+                    or self.futures[index].done()
+                    or now - started < timeout
+                ):
+                    continue
+                self._replaced.add(index)
+                self._start_worker()
+
+    def result(self, index: int, timeout: Optional[float] = None) -> Any:
+        future = self.futures[index]
+        while timeout is not None and not future.done():
+            self._replace_stuck_workers(timeout)
+            started = self._started[index]
+            if started is None:
+                wait([future], timeout=timeout)
+                continue
+            remaining = started + timeout - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"Timed out after {timeout} seconds")
+            wait([future], timeout=remaining)
+        return future.result()
+
+    def cancel(self) -> None:
+        for future in self.futures:
+            future.cancel()
@@ -0,0 +1,39 @@
+import atexit
+import threading
+from typing import Callable, Optional
+
+
+class WriteBehind:
+    # Collects save requests and runs flush once: on an explicit flush, at
+    # exit, or when delay seconds passed without another request.
+    def __init__(self, flush: Callable[[], None], delay: Optional[float] = None):
+        self._flush = flush
+        self.delay = delay
+        self._pending = False
+        self._timer: Optional[threading.Timer] = None
+        self._exit_registered = False
+        self._lock = threading.Lock()
+
+    def request(self) -> None:
+        with self._lock:
+            self._pending = True
+            if not self._exit_registered:
+                atexit.register(self.flush)
+                self._exit_registered = True
+            if self.delay is None:
+                return
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending:
+                return
+            self._pending = False
+        self._flush()
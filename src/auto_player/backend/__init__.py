@@ -1,3 +1,7 @@
+import os
+from typing import Hashable, List, Optional
+
+from ..metrics import gauge, get_metrics_recorder
 from ..state import State
 
 
@@ -12,3 +16,20 @@ class Backend:
 
     def load(self) -> State:
         pass
+
+    def save_shows(self, state: State, positions: List[int]) -> None:
+        # Only the shows at positions changed since the last save or load;
+        # backends that can write single shows override this.
+        self.save(state)
+
+    def fingerprint(self) -> Optional[Hashable]:
+        return None
+
+    def _report_state_size(self, filename: str) -> None:
+        if get_metrics_recorder() is None:
+            return
+        try:
+            size = os.path.getsize(filename)
+        except OSError:
+            size = 0
+        gauge("state_bytes", size, backend=self.NAME, session=self.session)
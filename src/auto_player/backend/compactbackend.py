@@ -0,0 +1,210 @@
+import json
+import mmap
+import os
+import re
+import struct
+from dataclasses import dataclass
+from typing import Dict, Hashable, List, Optional, Union
+
+from ..file_group.codec import decode_files_group, encode_files_group
+from ..show import Show
+from ..show.alignment import EpisodeAlignment
+from ..show.statefull import StatefullShowWrapper
+from ..state import LazyShowList, State
+from . import Backend
+from .localfilebackend import LocalfileBackend
+
+# See "State file format" in README.md.
+FORMAT_MAGIC = b"APST"
+FORMAT_VERSION = 2
+SUPPORTED_VERSIONS = (1, 2)
+HEADER = struct.Struct(">4sHHI")
+OFFSET = struct.Struct(">Q")
+RECORD_LENGTH = struct.Struct(">I")
+NAME_LENGTH = struct.Struct(">H")
+COUNTER = struct.Struct(">I")
+GROUPS_LENGTH = struct.Struct(">I")
+
+Buffer = Union[bytes, mmap.mmap]
+
+
+@dataclass
+class ShowRecord:
+    buffer: Buffer
+    offset: int
+
+    @property
+    def length(self) -> int:
+        (length,) = RECORD_LENGTH.unpack_from(self.buffer, self.offset)
+        return length
+
+    def raw(self) -> bytes:
+        start = self.offset + RECORD_LENGTH.size
+        end = start + self.length
+        return bytes(self.buffer[start:end])
+
+    def name(self) -> str:
+        offset = self.offset + RECORD_LENGTH.size
+        (length,) = NAME_LENGTH.unpack_from(self.buffer, offset)
+        start = offset + NAME_LENGTH.size
+        end = start + length
+        return bytes(self.buffer[start:end]).decode()
+
+
+def encode_alignment(alignment: Optional[EpisodeAlignment]) -> Optional[Dict]:
+    if alignment is None:
+        return None
+    if alignment.regex is None:
+        return {"regex": None}
+    return {"regex": alignment.regex.pattern, "flags": alignment.regex.flags}
+
+
+def decode_alignment(data: Optional[Dict]) -> Optional[EpisodeAlignment]:
+    if data is None:
+        return None
+    if data["regex"] is None:
+        return EpisodeAlignment()
+    return EpisodeAlignment(regex=re.compile(data["regex"], data.get("flags", 0)))
+
+
+def encode_groups(show: StatefullShowWrapper) -> List[Optional[Dict]]:
+    return [
+        encode_files_group(show.video_group),
+        encode_files_group(show.audio_group),
+        encode_files_group(show.subtitles_group),
+        encode_alignment(show.show.alignment),
+    ]
+
+
+def decode_groups(
+    name: str, counter: int, groups: List[Optional[Dict]]
+) -> StatefullShowWrapper:
+    video, audio, subtitles, *alignment = groups
+    video_group = decode_files_group(video)
+    assert video_group is not None
+    show = Show(
+        name=name,
+        video_group=video_group,
+        audio_group=decode_files_group(audio),
+        subtitles_group=decode_files_group(subtitles),
+        alignment=decode_alignment(alignment[0] if alignment else None),
+    )
+    return StatefullShowWrapper(show=show, counter=counter)
+
+
+def encode_show(show: StatefullShowWrapper) -> bytes:
+    name = show.name.encode()
+    groups = json.dumps(encode_groups(show), separators=(",", ":")).encode()
+    return b"".join(
+        [
+            NAME_LENGTH.pack(len(name)),
+            name,
+            COUNTER.pack(show.counter),
+            GROUPS_LENGTH.pack(len(groups)),
+            groups,
+        ]
+    )
+
+
+def decode_show(data: bytes) -> StatefullShowWrapper:
+    (name_length,) = NAME_LENGTH.unpack_from(data)
+    start = NAME_LENGTH.size
+    end = start + name_length
+    name = data[start:end].decode()
+    (counter,) = COUNTER.unpack_from(data, end)
+    (groups_length,) = GROUPS_LENGTH.unpack_from(data, end + COUNTER.size)
+    start = end + COUNTER.size + GROUPS_LENGTH.size
+    end = start + groups_length
+    return decode_groups(name, counter, json.loads(data[start:end]))
+
+
+def decode_record(record: ShowRecord) -> StatefullShowWrapper:
+    return decode_show(record.raw())
+
+
+def decode_record_name(record: ShowRecord) -> str:
+    return record.name()
+
+
+def encode_state(shows: List[bytes]) -> bytes:
+    header = HEADER.pack(FORMAT_MAGIC, FORMAT_VERSION, 0, len(shows))
+    offset = HEADER.size + OFFSET.size * len(shows)
+    offsets = []
+    for data in shows:
+        offsets.append(OFFSET.pack(offset))
+        offset += RECORD_LENGTH.size + len(data)
+    records = (RECORD_LENGTH.pack(len(data)) + data for data in shows)
+    return header + b"".join(offsets) + b"".join(records)
+
+
+def read_state(buffer: Buffer) -> LazyShowList:
+    magic, version, _, count = HEADER.unpack_from(buffer)
+    if magic != FORMAT_MAGIC:
+        raise Exception("Not an auto_player state file")
+    if version not in SUPPORTED_VERSIONS:
+        raise Exception(f"Unsupported state file version {version}")
+    records = [
+        ShowRecord(buffer, OFFSET.unpack_from(buffer, HEADER.size + i * OFFSET.size)[0])
+        for i in range(count)
+    ]
+    return LazyShowList(
+        tokens=records, decode=decode_record, decode_name=decode_record_name
+    )
+
+
+class CompactBackend(Backend):
+    NAME = "compact"
+
+    def __init__(self, session: str, migrate_localfile: bool = True):
+        super().__init__(session=session)
+        self.migrate_localfile = migrate_localfile
+
+    def _get_filename(self) -> str:
+        directory = os.getcwd()
+        filename = f"{directory}//.autoplayer_{self.session}.state"
+        return filename
+
+    def save(self, state: State) -> None:
+        filename = self._get_filename()
+        shows = state.shows
+        records = []
+        for index in range(len(shows)):
+            if isinstance(shows, LazyShowList) and not shows.is_decoded(index):
+                token = shows.token(index)
+                if isinstance(token, ShowRecord):
+                    records.append(token.raw())
+                    continue
+            records.append(encode_show(shows[index]))
+        temporary_filename = f"{filename}.tmp"
+        with open(temporary_filename, "wb") as file:
+            file.write(encode_state(records))
+        os.replace(temporary_filename, filename)
+        self._report_state_size(filename)
+
+    def load(self) -> State:
+        filename = self._get_filename()
+        if not os.path.exists(filename):
+            if self.migrate_localfile:
+                return convert_localfile(self.session, self)
+            return State()
+        with open(filename, "rb") as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return State()
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return State(shows=read_state(buffer))
+
+    def fingerprint(self) -> Optional[Hashable]:
+        try:
+            stat = os.stat(self._get_filename())
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+def convert_localfile(session: str, target: Optional[CompactBackend] = None) -> State:
+    source = LocalfileBackend(session=session)
+    target = target or CompactBackend(session=session, migrate_localfile=False)
+    state = source.load()
+    if not state.is_empty():
+        target.save(state)
+    return state
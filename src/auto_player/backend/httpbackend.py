@@ -0,0 +1,326 @@
+import atexit
+import hashlib
+import http.client
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+from urllib.parse import quote, urlsplit
+
+from ..show.statefull import StatefullShowWrapper
+from ..state import LazyShowList, State
+from . import Backend
+from .compactbackend import decode_groups, encode_groups
+
+# See "HTTP sync" in README.md for the protocol.
+DEFAULT_TIMEOUT = 5.0
+DEFAULT_CACHE_TTL = 30.0
+POOL_SIZE = 4
+
+Record = Dict[str, Any]
+Response = Tuple[int, Optional[str], bytes]
+
+
+def default_cache_directory() -> str:
+    return os.environ.get("XDG_CACHE_HOME") or f"{Path.home()}/.cache"
+
+
+class ConnectionPool:
+    # Keep-alive connections; a saver thread and the main thread may both
+    # talk to the server, so idle connections are handed out under a lock.
+    def __init__(self, url: str, timeout: float):
+        parsed = urlsplit(url)
+        if parsed.scheme not in ("http", "https"):
+            raise Exception(f"Unsupported sync url '{url}'")
+        self.scheme = parsed.scheme
+        self.netloc = parsed.netloc
+        self.base_path = parsed.path.rstrip("/")
+        self.timeout = timeout
+        self._idle: List[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+
+    def _new_connection(self) -> http.client.HTTPConnection:
+        if self.scheme == "https":
+            return http.client.HTTPSConnection(self.netloc, timeout=self.timeout)
+        return http.client.HTTPConnection(self.netloc, timeout=self.timeout)
+
+    def _acquire(self) -> Tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), True
+        return self._new_connection(), False
+
+    def _release(self, connection: http.client.HTTPConnection) -> None:
+        with self._lock:
+            if len(self._idle) < POOL_SIZE:
+                self._idle.append(connection)
+                return
+        connection.close()
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        body: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Response:
+        connection, reused = self._acquire()
+        headers = dict(headers or {})
+        if body is not None:
+            headers["Content-Type"] = "application/json"
+        while True:
+            try:
+                connection.request(method, self.base_path + path, body, headers)
+                response = connection.getresponse()
+                data = response.read()
+            except (
+                http.client.RemoteDisconnected,
+                ConnectionResetError,
+                BrokenPipeError,
+            ):
+                connection.close()
+                # The server may drop an idle keep-alive connection at any time.
+                if not reused:
+                    raise
+                connection, reused = self._new_connection(), False
+                continue
+            except BaseException:
+                connection.close()
+                raise
+            break
+        if response.will_close:
+            connection.close()
+        else:
+            self._release(connection)
+        return response.status, response.getheader("ETag"), data
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+
+_pools: Dict[Tuple[str, float], ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_connection_pool(url: str, timeout: float) -> ConnectionPool:
+    with _pools_lock:
+        pool = _pools.get((url, timeout))
+        if pool is None:
+            pool = ConnectionPool(url, timeout)
+            _pools[(url, timeout)] = pool
+        return pool
+
+
+def encode_record(show: StatefullShowWrapper) -> Record:
+    return {"name": show.name, "counter": show.counter, "groups": encode_groups(show)}
+
+
+def decode_record(record: Record) -> StatefullShowWrapper:
+    return decode_groups(record["name"], record["counter"], record["groups"])
+
+
+def decode_record_name(record: Record) -> str:
+    return record["name"]
+
+
+class HttpBackend(Backend):
+    NAME = "http"
+
+    def __init__(
+        self,
+        session: str,
+        url: str,
+        cache_path: Optional[str] = None,
+        cache_ttl: float = DEFAULT_CACHE_TTL,
+        timeout: float = DEFAULT_TIMEOUT,
+        batch_delay: float = 0.0,
+    ):
+        super().__init__(session=session)
+        self.url = url
+        if cache_path is None:
+            digest = hashlib.sha1(f"{url}\0{session}".encode()).hexdigest()[:16]
+            cache_path = f"{default_cache_directory()}/autoplayer_http_{digest}.json"
+        self.cache_path = cache_path
+        self.cache_ttl = cache_ttl
+        self.batch_delay = batch_delay
+        self._pool = get_connection_pool(url, timeout)
+        self._path = f"/sessions/{quote(session, safe='')}"
+        self._etag: Optional[str] = None
+        self._synced: Optional[List[Record]] = None
+        self._pending: Dict[str, int] = {}
+        self._pending_lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._flush_registered = False
+
+    def _read_cache(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.cache_path, "r") as file:
+                cache = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(cache, dict) or cache.get("url") != self.url:
+            return None
+        return cache
+
+    def _write_cache(self, records: List[Record]) -> None:
+        cache = {"url": self.url, "etag": self._etag, "shows": records}
+        os.makedirs(os.path.dirname(os.path.abspath(self.cache_path)), exist_ok=True)
+        temporary_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        with open(temporary_path, "w") as file:
+            json.dump(cache, file, separators=(",", ":"))
+        os.replace(temporary_path, self.cache_path)
+
+    def _remove_cache(self) -> None:
+        try:
+            os.remove(self.cache_path)
+        except FileNotFoundError:
+            pass
+
+    def _cache_is_fresh(self) -> bool:
+        try:
+            age = time.time() - os.path.getmtime(self.cache_path)
+        except OSError:
+            return False
+        return age < self.cache_ttl
+
+    def _fetch(self, cache: Optional[Dict[str, Any]]) -> List[Record]:
+        headers = {}
+        if cache is not None and cache.get("etag"):
+            headers["If-None-Match"] = cache["etag"]
+        try:
+            status, etag, data = self._pool.request("GET", self._path, headers=headers)
+        except OSError:
+            # Offline: the last known state is better than nothing.
+            if cache is None:
+                raise
+            self._etag = cache.get("etag")
+            return cache["shows"]
+        if status == 304 and cache is not None:
+            self._etag = cache.get("etag")
+            os.utime(self.cache_path)
+            return cache["shows"]
+        if status == 404:
+            self._etag = None
+            records: List[Record] = []
+        elif status == 200:
+            self._etag = etag
+            records = json.loads(data)["shows"]
+        else:
+            raise Exception(f"Sync server answered {status}: {data.decode()}")
+        self._write_cache(records)
+        return records
+
+    def load(self) -> State:
+        cache = self._read_cache()
+        if cache is not None and self._cache_is_fresh():
+            self._etag = cache.get("etag")
+            records = cache["shows"]
+        else:
+            records = self._fetch(cache)
+        self._synced = list(records)
+        shows = LazyShowList(
+            tokens=records, decode=decode_record, decode_name=decode_record_name
+        )
+        return State(shows=shows)
+
+    def _records(self, state: State) -> List[Record]:
+        shows = state.shows
+        records = []
+        for index in range(len(shows)):
+            if isinstance(shows, LazyShowList) and not shows.is_decoded(index):
+                records.append(shows.token(index))
+            else:
+                records.append(encode_record(shows[index]))
+        return records
+
+    def _changed_counters(self, records: List[Record]) -> Optional[Dict[str, int]]:
+        if self._synced is None or len(self._synced) != len(records):
+            return None
+        counters = {}
+        for synced, record in zip(self._synced, records):
+            if synced["name"] != record["name"] or synced["groups"] != record["groups"]:
+                return None
+            if synced["counter"] != record["counter"]:
+                counters[record["name"]] = record["counter"]
+        return counters
+
+    def _check(self, status: int, data: bytes) -> None:
+        if status == 412:
+            # Someone else changed the session, the next load has to refetch.
+            self._remove_cache()
+            raise Exception("Session changed on the sync server, run the command again")
+        if status != 200:
+            raise Exception(f"Sync server answered {status}: {data.decode()}")
+
+    def _put(self, records: List[Record]) -> None:
+        headers = {"If-Match": self._etag} if self._etag else {"If-None-Match": "*"}
+        body = json.dumps({"shows": records}).encode()
+        with self._pending_lock:
+            status, etag, data = self._pool.request(
+                "PUT", self._path, body=body, headers=headers
+            )
+            self._check(status, data)
+            self._etag = etag
+            # The full state carries every counter that was waiting.
+            self._pending.clear()
+
+    def flush(self) -> None:
+        with self._pending_lock:
+            self._timer = None
+            if not self._pending:
+                return
+            body = json.dumps({"counters": self._pending}).encode()
+            status, etag, data = self._pool.request(
+                "POST", f"{self._path}/counters", body=body
+            )
+            self._check(status, data)
+            previous = json.loads(data).get("previous")
+            self._pending.clear()
+            # Only keep the new ETag if nobody else wrote in between; the
+            # cache must carry it too, or the next process's first PUT fails.
+            if previous == self._etag and self._synced is not None:
+                self._etag = etag
+                self._write_cache(self._synced)
+            else:
+                self._etag = None
+                self._remove_cache()
+
+    def _schedule_flush(self) -> None:
+        if self.batch_delay <= 0:
+            self.flush()
+            return
+        with self._pending_lock:
+            if not self._flush_registered:
+                atexit.register(self.flush)
+                self._flush_registered = True
+            if self._timer is not None:
+                return
+            self._timer = threading.Timer(self.batch_delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def save(self, state: State) -> None:
+        records = self._records(state)
+        counters = self._changed_counters(records)
+        if counters is None:
+            self._put(records)
+        elif counters:
+            with self._pending_lock:
+                self._pending.update(counters)
+            self._schedule_flush()
+        with self._pending_lock:
+            self._synced = records
+            self._write_cache(records)
+        self._report_state_size(self.cache_path)
+
+    def fingerprint(self) -> Optional[Hashable]:
+        try:
+            stat = os.stat(self.cache_path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
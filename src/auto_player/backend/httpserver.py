@@ -0,0 +1,190 @@
+import argparse
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import unquote
+
+# Reference server for HttpBackend. Keeps sessions in memory and, with
+# --data, in a JSON file rewritten after every change.
+DEFAULT_PORT = 8765
+MAX_BODY_SIZE = 16 * 1024 * 1024
+
+Session = Tuple[int, List[Dict[str, Any]]]
+
+
+class SyncStore:
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.sessions: Dict[str, Session] = {}
+        self.lock = threading.Lock()
+        if path is not None and os.path.exists(path):
+            with open(path, "r") as file:
+                data = json.load(file)
+            self.sessions = {
+                name: (revision, shows) for name, (revision, shows) in data.items()
+            }
+
+    def _persist(self) -> None:
+        if self.path is None:
+            return
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w") as file:
+            json.dump(self.sessions, file)
+        os.replace(temporary_path, self.path)
+
+    def get(self, name: str) -> Optional[Session]:
+        with self.lock:
+            return self.sessions.get(name)
+
+    def put(
+        self, name: str, shows: List[Dict[str, Any]], if_match: Optional[str]
+    ) -> Optional[int]:
+        with self.lock:
+            current = self.sessions.get(name)
+            current_etag = None if current is None else etag(current[0])
+            if if_match != current_etag:
+                return None
+            revision = 1 if current is None else current[0] + 1
+            self.sessions[name] = (revision, shows)
+            self._persist()
+            return revision
+
+    def set_counters(
+        self, name: str, counters: Dict[str, int]
+    ) -> Optional[Tuple[int, int]]:
+        with self.lock:
+            current = self.sessions.get(name)
+            if current is None:
+                return None
+            revision, shows = current
+            # Copy on write: a GET may be serializing the old list right now.
+            shows = [
+                dict(show, counter=counters[show["name"]])
+                if show["name"] in counters
+                else show
+                for show in shows
+            ]
+            self.sessions[name] = (revision + 1, shows)
+            self._persist()
+            return revision, revision + 1
+
+
+def etag(revision: int) -> str:
+    return f'"{revision}"'
+
+
+class SyncRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "SyncServer"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _session(self) -> Tuple[Optional[str], bool]:
+        parts = self.path.strip("/").split("/")
+        if len(parts) == 2 and parts[0] == "sessions":
+            return unquote(parts[1]), False
+        if len(parts) == 3 and parts[0] == "sessions" and parts[2] == "counters":
+            return unquote(parts[1]), True
+        return None, False
+
+    def _read_json(self) -> Any:
+        length = int(self.headers.get("Content-Length", 0))
+        if length > MAX_BODY_SIZE:
+            raise ValueError("Request too large")
+        return json.loads(self.rfile.read(length))
+
+    def _reply(
+        self, status: int, body: Optional[Dict] = None, revision: Optional[int] = None
+    ) -> None:
+        data = b"" if body is None else json.dumps(body).encode()
+        self.send_response(status)
+        if revision is not None:
+            self.send_header("ETag", etag(revision))
+        if body is not None:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        name, counters = self._session()
+        if name is None or counters:
+            self._reply(404, {"error": "Not found"})
+            return
+        session = self.server.store.get(name)
+        if session is None:
+            self._reply(404, {"error": "No such session"})
+        elif self.headers.get("If-None-Match") == etag(session[0]):
+            self._reply(304, revision=session[0])
+        else:
+            self._reply(200, {"shows": session[1]}, revision=session[0])
+
+    def do_PUT(self) -> None:
+        name, counters = self._session()
+        if name is None or counters:
+            self._reply(404, {"error": "Not found"})
+            return
+        try:
+            shows = self._read_json()["shows"]
+        except (ValueError, KeyError, TypeError) as e:
+            self._reply(400, {"error": str(e)})
+            return
+        revision = self.server.store.put(name, shows, self.headers.get("If-Match"))
+        if revision is None:
+            self._reply(412, {"error": "Session changed"})
+        else:
+            self._reply(200, {}, revision=revision)
+
+    def do_POST(self) -> None:
+        name, counters = self._session()
+        if name is None or not counters:
+            self._reply(404, {"error": "Not found"})
+            return
+        try:
+            values = self._read_json()["counters"]
+        except (ValueError, KeyError, TypeError) as e:
+            self._reply(400, {"error": str(e)})
+            return
+        revisions = self.server.store.set_counters(name, values)
+        if revisions is None:
+            self._reply(404, {"error": "No such session"})
+            return
+        previous, revision = revisions
+        self._reply(200, {"previous": etag(previous)}, revision=revision)
+
+
+class SyncServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self, address: Tuple[str, int], store: SyncStore, verbose: bool = False
+    ):
+        super().__init__(address, SyncRequestHandler)
+        self.store = store
+        self.verbose = verbose
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Reference auto_player sync server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--data", help="Keep sessions in this JSON file")
+    arguments = parser.parse_args()
+    server = SyncServer(
+        (arguments.host, arguments.port), SyncStore(arguments.data), verbose=True
+    )
+    print(f"Serving on http://{arguments.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
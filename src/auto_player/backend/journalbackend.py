@@ -0,0 +1,252 @@
+import os
+import pickle
+import struct
+import zlib
+from dataclasses import dataclass
+from typing import Hashable, List, Optional, Tuple
+
+from ..show import Show
+from ..show.alignment import EpisodeAlignment
+from ..show.statefull import StatefullShowWrapper
+from ..state import State
+from . import Backend
+
+JOURNAL_MAGIC = b"APJ1"
+RECORD_HEADER = struct.Struct(">BII")
+POSITION = struct.Struct(">I")
+POSITION_SIZE = POSITION.size
+COUNTER = struct.Struct(">Iq")
+
+SNAPSHOT = 1
+SHOW_ADDED = 2
+SHOW_REMOVED = 3
+COUNTER_SET = 4
+GROUP_EDITED = 5
+
+DEFAULT_COMPACT_THRESHOLD = 1024 * 1024
+
+
+def encode_record(record_type: int, payload: bytes) -> bytes:
+    header = RECORD_HEADER.pack(record_type, len(payload), zlib.crc32(payload))
+    return header + payload
+
+
+def split_position(payload: bytes) -> Tuple[int, bytes]:
+    (position,) = POSITION.unpack_from(payload)
+    return position, payload[POSITION_SIZE:]
+
+
+@dataclass
+class TrackedShow:
+    wrapper: StatefullShowWrapper
+    counter: int
+    show: Show
+    groups: Tuple[object, object, object]
+    name: str
+    alignment: Optional[EpisodeAlignment]
+
+    @classmethod
+    def track(cls, wrapper: StatefullShowWrapper) -> "TrackedShow":
+        return cls(
+            wrapper=wrapper,
+            counter=wrapper.counter,
+            show=wrapper.show,
+            groups=(wrapper.video_group, wrapper.audio_group, wrapper.subtitles_group),
+            name=wrapper.name,
+            alignment=wrapper.show.alignment,
+        )
+
+    def show_changed(self) -> bool:
+        current = self.track(self.wrapper)
+        return (
+            current.show is not self.show
+            or current.name != self.name
+            or any(a is not b for a, b in zip(current.groups, self.groups))
+            or current.alignment != self.alignment
+        )
+
+
+class JournalBackend(Backend):
+    NAME = "journal"
+
+    def __init__(
+        self,
+        session: str,
+        compact_threshold: int = DEFAULT_COMPACT_THRESHOLD,
+        fsync: bool = True,
+    ):
+        super().__init__(session=session)
+        self.compact_threshold = compact_threshold
+        self.fsync = fsync
+        self._tracked: Optional[List[TrackedShow]] = None
+        self._valid_size: Optional[int] = None
+
+    def _get_filename(self) -> str:
+        directory = os.getcwd()
+        filename = f"{directory}//.autoplayer_{self.session}.journal"
+        return filename
+
+    def _track(self, state: State) -> None:
+        self._tracked = [TrackedShow.track(show) for show in state.shows]
+
+    def _replay(self, data: bytes) -> List[StatefullShowWrapper]:
+        shows: List[StatefullShowWrapper] = []
+        offset = len(JOURNAL_MAGIC)
+        while offset + RECORD_HEADER.size <= len(data):
+            record_type, length, checksum = RECORD_HEADER.unpack_from(data, offset)
+            start = offset + RECORD_HEADER.size
+            end = start + length
+            payload = data[start:end]
+            if len(payload) != length or zlib.crc32(payload) != checksum:
+                break
+            if record_type == SNAPSHOT:
+                shows = pickle.loads(payload)
+            elif record_type == SHOW_ADDED:
+                position, show_data = split_position(payload)
+                shows.insert(position, pickle.loads(show_data))
+            elif record_type == SHOW_REMOVED:
+                position, _ = split_position(payload)
+                del shows[position]
+            elif record_type == COUNTER_SET:
+                position, counter = COUNTER.unpack_from(payload)
+                shows[position].counter = counter
+            elif record_type == GROUP_EDITED:
+                position, show_data = split_position(payload)
+                shows[position].show = pickle.loads(show_data)
+            else:
+                break
+            offset = end
+        self._valid_size = offset
+        return shows
+
+    def load(self) -> State:
+        filename = self._get_filename()
+        if not os.path.exists(filename):
+            state = State()
+        else:
+            with open(filename, "rb") as file:
+                data = file.read()
+            if not data.startswith(JOURNAL_MAGIC):
+                raise Exception(f"{filename} is not an auto_player journal")
+            state = State(shows=self._replay(data))
+        self._track(state)
+        return state
+
+    def _diff(self, state: State) -> Optional[List[bytes]]:
+        if self._tracked is None:
+            return None
+        records = []
+        current_ids = set(id(show) for show in state.shows)
+        for position in reversed(range(len(self._tracked))):
+            if id(self._tracked[position].wrapper) not in current_ids:
+                records.append(encode_record(SHOW_REMOVED, POSITION.pack(position)))
+        survivors = [
+            tracked for tracked in self._tracked if id(tracked.wrapper) in current_ids
+        ]
+        survivor_index = 0
+        for position, show in enumerate(state.shows):
+            if (
+                survivor_index < len(survivors)
+                and survivors[survivor_index].wrapper is show
+            ):
+                tracked = survivors[survivor_index]
+                survivor_index += 1
+                if tracked.counter != show.counter:
+                    payload = COUNTER.pack(position, show.counter)
+                    records.append(encode_record(COUNTER_SET, payload))
+                if tracked.show_changed():
+                    payload = POSITION.pack(position) + pickle.dumps(show.show)
+                    records.append(encode_record(GROUP_EDITED, payload))
+            else:
+                payload = POSITION.pack(position) + pickle.dumps(show)
+                records.append(encode_record(SHOW_ADDED, payload))
+        if survivor_index != len(survivors):
+            return None
+        return records
+
+    def _sync(self, file_descriptor: int) -> None:
+        if self.fsync:
+            os.fsync(file_descriptor)
+
+    def compact(self, state: State) -> None:
+        filename = self._get_filename()
+        temporary_filename = f"{filename}.tmp"
+        payload = pickle.dumps(list(state.shows))
+        with open(temporary_filename, "wb") as file:
+            file.write(JOURNAL_MAGIC + encode_record(SNAPSHOT, payload))
+            file.flush()
+            self._sync(file.fileno())
+        os.replace(temporary_filename, filename)
+        self._valid_size = None
+        self._track(state)
+
+    def _append(self, records: List[bytes]) -> None:
+        with open(self._get_filename(), "r+b") as file:
+            if self._valid_size is not None:
+                file.truncate(self._valid_size)
+            file.seek(0, os.SEEK_END)
+            file.write(b"".join(records))
+            file.flush()
+            self._sync(file.fileno())
+            self._valid_size = file.tell()
+
+    def save(self, state: State) -> None:
+        filename = self._get_filename()
+        if state.is_empty():
+            if os.path.exists(filename):
+                os.remove(filename)
+            self._track(state)
+            return
+        records = self._diff(state)
+        if records is not None and not records and os.path.exists(filename):
+            return
+        if (
+            records is None
+            or not os.path.exists(filename)
+            or os.path.getsize(filename) + sum(map(len, records))
+            > self.compact_threshold
+        ):
+            self.compact(state)
+        else:
+            self._append(records)
+            self._track(state)
+        self._report_state_size(filename)
+
+    def save_shows(self, state: State, positions: List[int]) -> None:
+        filename = self._get_filename()
+        tracked = self._tracked
+        if (
+            tracked is None
+            or len(tracked) != len(state.shows)
+            or not os.path.exists(filename)
+        ):
+            self.save(state)
+            return
+        records = []
+        for position in positions:
+            show = state.shows[position]
+            if tracked[position].wrapper is not show:
+                self.save(state)
+                return
+            if tracked[position].counter != show.counter:
+                payload = COUNTER.pack(position, show.counter)
+                records.append(encode_record(COUNTER_SET, payload))
+            if tracked[position].show_changed():
+                payload = POSITION.pack(position) + pickle.dumps(show.show)
+                records.append(encode_record(GROUP_EDITED, payload))
+        if not records:
+            return
+        if os.path.getsize(filename) + sum(map(len, records)) > self.compact_threshold:
+            self.compact(state)
+        else:
+            self._append(records)
+            for position in positions:
+                tracked[position] = TrackedShow.track(state.shows[position])
+        self._report_state_size(filename)
+
+    def fingerprint(self) -> Optional[Hashable]:
+        try:
+            stat = os.stat(self._get_filename())
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
@@ -1,5 +1,6 @@
 import os
 import pickle
+from typing import Hashable, Optional
 
 from ..state import State
 from . import Backend
@@ -20,6 +21,7 @@ class LocalfileBackend(Backend):
             return
         with open(filename, "wb") as file:
             pickle.dump(state, file)
+        self._report_state_size(filename)
 
     def load(self) -> State:
         filename = self._get_filename()
@@ -29,3 +31,10 @@ class LocalfileBackend(Backend):
             with open(filename, "rb") as file:
                 state = pickle.load(file)
         return state
+
+    def fingerprint(self) -> Optional[Hashable]:
+        try:
+            stat = os.stat(self._get_filename())
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
@@ -0,0 +1,200 @@
+import os
+import pickle
+import sqlite3
+from dataclasses import dataclass
+from typing import Hashable, List, Optional, Set
+
+from ..show.statefull import StatefullShowWrapper
+from ..state import LazyShowList, State
+from . import Backend
+from .localfilebackend import LocalfileBackend
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS shows (
+    id INTEGER PRIMARY KEY,
+    session TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    counter INTEGER NOT NULL,
+    show BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS shows_session_position ON shows (session, position);
+CREATE INDEX IF NOT EXISTS shows_session_name ON shows (session, name);
+CREATE TABLE IF NOT EXISTS migrations (
+    session TEXT NOT NULL,
+    source TEXT NOT NULL,
+    PRIMARY KEY (session, source)
+);
+"""
+
+
+@dataclass
+class ShowRow:
+    id: int
+    position: int
+    name: str
+    counter: int
+    show: bytes
+
+
+class SqliteBackend(Backend):
+    NAME = "sqlite"
+
+    def __init__(
+        self, session: str, path: Optional[str] = None, migrate_localfile: bool = True
+    ):
+        super().__init__(session=session)
+        self.path = path
+        self.migrate_localfile = migrate_localfile
+        self._connection: Optional[sqlite3.Connection] = None
+        self._row_ids: Set[int] = set()
+
+    def _get_filename(self) -> str:
+        if self.path is not None:
+            return self.path
+        return os.path.join(os.getcwd(), ".autoplayer.sqlite3")
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            connection = sqlite3.connect(self._get_filename())
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    @staticmethod
+    def _decode(row: ShowRow) -> StatefullShowWrapper:
+        return StatefullShowWrapper(show=pickle.loads(row.show), counter=row.counter)
+
+    @staticmethod
+    def _decode_name(row: ShowRow) -> str:
+        return row.name
+
+    def _migrate(self, connection: sqlite3.Connection) -> None:
+        source = LocalfileBackend(session=self.session)
+        if not os.path.exists(source._get_filename()):
+            return
+        with connection:
+            cursor = connection.execute(
+                "INSERT OR IGNORE INTO migrations (session, source) VALUES (?, ?)",
+                (self.session, source._get_filename()),
+            )
+            if cursor.rowcount == 0:
+                return
+            state = source.load()
+            for position, show in enumerate(state.shows):
+                self._insert(connection, position, show)
+
+    def _select_rows(self, connection: sqlite3.Connection) -> List[ShowRow]:
+        cursor = connection.execute(
+            "SELECT id, position, name, counter, show FROM shows"
+            " WHERE session = ? ORDER BY position",
+            (self.session,),
+        )
+        return [ShowRow(*row) for row in cursor]
+
+    def load(self) -> State:
+        connection = self._connect()
+        if self.migrate_localfile:
+            self._migrate(connection)
+        rows = self._select_rows(connection)
+        self._row_ids = {row.id for row in rows}
+        shows = LazyShowList(
+            tokens=rows, decode=self._decode, decode_name=self._decode_name
+        )
+        return State(shows=shows)
+
+    def _insert(
+        self, connection: sqlite3.Connection, position: int, show: StatefullShowWrapper
+    ) -> ShowRow:
+        data = pickle.dumps(show.show)
+        cursor = connection.execute(
+            "INSERT INTO shows (session, position, name, counter, show)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (self.session, position, show.name, show.counter, data),
+        )
+        assert cursor.lastrowid is not None
+        return ShowRow(cursor.lastrowid, position, show.name, show.counter, data)
+
+    def _update(
+        self,
+        connection: sqlite3.Connection,
+        row: ShowRow,
+        position: int,
+        show: Optional[StatefullShowWrapper],
+    ) -> None:
+        updated = ShowRow(row.id, position, row.name, row.counter, row.show)
+        if show is not None:
+            updated.name = show.name
+            updated.counter = show.counter
+            updated.show = pickle.dumps(show.show)
+        if updated == row:
+            return
+        connection.execute(
+            "UPDATE shows SET position = ?, name = ?, counter = ?, show = ?"
+            " WHERE id = ?",
+            (updated.position, updated.name, updated.counter, updated.show, row.id),
+        )
+        row.position = updated.position
+        row.name = updated.name
+        row.counter = updated.counter
+        row.show = updated.show
+
+    def save(self, state: State) -> None:
+        connection = self._connect()
+        shows = state.shows
+        with connection:
+            if not isinstance(shows, LazyShowList):
+                connection.execute(
+                    "DELETE FROM shows WHERE session = ?", (self.session,)
+                )
+                self._row_ids = set()
+                shows = LazyShowList.from_shows(
+                    shows, decode=self._decode, decode_name=self._decode_name
+                )
+            kept_ids = set()
+            for position in range(len(shows)):
+                row = shows.token(position)
+                if not isinstance(row, ShowRow) or row.id not in self._row_ids:
+                    row = self._insert(connection, position, shows[position])
+                    shows.set_token(position, row)
+                else:
+                    show = shows[position] if shows.is_decoded(position) else None
+                    self._update(connection, row, position, show)
+                kept_ids.add(row.id)
+            removed_ids = self._row_ids - kept_ids
+            connection.executemany(
+                "DELETE FROM shows WHERE id = ?", ((row_id,) for row_id in removed_ids)
+            )
+            self._row_ids = kept_ids
+        state.shows = shows
+        self._report_state_size(self._get_filename())
+
+    def save_shows(self, state: State, positions: List[int]) -> None:
+        shows = state.shows
+        if not isinstance(shows, LazyShowList) or any(
+            not isinstance(shows.token(position), ShowRow)
+            or shows.token(position).id not in self._row_ids
+            for position in positions
+        ):
+            self.save(state)
+            return
+        connection = self._connect()
+        with connection:
+            for position in positions:
+                self._update(
+                    connection, shows.token(position), position, shows[position]
+                )
+        self._report_state_size(self._get_filename())
+
+    def fingerprint(self) -> Optional[Hashable]:
+        fingerprint = []
+        for filename in (self._get_filename(), f"{self._get_filename()}-wal"):
+            try:
+                stat = os.stat(filename)
+            except FileNotFoundError:
+                fingerprint.append(None)
+                continue
+            fingerprint.append((stat.st_mtime_ns, stat.st_size, stat.st_ino))
+        return tuple(fingerprint)
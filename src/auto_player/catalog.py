@@ -0,0 +1,186 @@
+import json
+import sqlite3
+import threading
+from dataclasses import dataclass
+from typing import Hashable, List, Optional, Sequence
+
+from .show.statefull import StatefullShowWrapper
+from .state import LazyShowList
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    directory TEXT NOT NULL,
+    session TEXT NOT NULL,
+    backend TEXT NOT NULL,
+    fingerprint TEXT,
+    PRIMARY KEY (directory, session)
+);
+CREATE TABLE IF NOT EXISTS shows (
+    directory TEXT NOT NULL,
+    session TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    counter INTEGER,
+    length INTEGER,
+    PRIMARY KEY (directory, session, position)
+);
+CREATE INDEX IF NOT EXISTS shows_name ON shows (name);
+"""
+
+SQLITE_TIMEOUT = 5.0
+
+
+@dataclass
+class CatalogSource:
+    directory: str
+    session: str
+    backend: str
+    fingerprint: Optional[str] = None
+
+
+@dataclass
+class CatalogShow:
+    name: str
+    counter: Optional[int] = None
+    length: Optional[int] = None
+
+
+@dataclass
+class CatalogEntry:
+    directory: str
+    session: str
+    position: int
+    name: str
+    counter: Optional[int]
+    length: Optional[int]
+
+
+def encode_fingerprint(fingerprint: Optional[Hashable]) -> Optional[str]:
+    if fingerprint is None:
+        return None
+    return json.dumps(fingerprint)
+
+
+def catalog_shows(shows: Sequence[StatefullShowWrapper]) -> List[CatalogShow]:
+    # Shows nobody decoded are unchanged since the last save, so their counter
+    # and length stay whatever the catalog already has. Lengths are only taken
+    # from groups that were scanned anyway; saving never walks a directory.
+    result = []
+    for index in range(len(shows)):
+        if isinstance(shows, LazyShowList) and not shows.is_decoded(index):
+            result.append(CatalogShow(name=shows.name(index)))
+            continue
+        show = shows[index]
+        result.append(
+            CatalogShow(
+                name=show.name,
+                counter=show.counter,
+                length=show.video_group.cached_length(),
+            )
+        )
+    return result
+
+
+class Catalog:
+    def __init__(self, path: str):
+        self.path = path
+        self._initialized = False
+        self._lock = threading.Lock()
+
+    def same_settings(self, other: "Catalog") -> bool:
+        return self.path == other.path
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per call: saves also happen on background threads.
+        connection = sqlite3.connect(self.path, timeout=SQLITE_TIMEOUT)
+        with self._lock:
+            if not self._initialized:
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.executescript(SCHEMA)
+                self._initialized = True
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def update(self, source: CatalogSource, shows: List[CatalogShow]) -> None:
+        connection = self._connect()
+        try:
+            with connection:
+                key = (source.directory, source.session)
+                previous = {
+                    name: (counter, length)
+                    for name, counter, length in connection.execute(
+                        "SELECT name, counter, length FROM shows"
+                        " WHERE directory = ? AND session = ?",
+                        key,
+                    )
+                }
+                connection.execute(
+                    "DELETE FROM shows WHERE directory = ? AND session = ?", key
+                )
+                if not shows:
+                    connection.execute(
+                        "DELETE FROM sources WHERE directory = ? AND session = ?", key
+                    )
+                    return
+                rows = []
+                for position, show in enumerate(shows):
+                    counter, length = previous.get(show.name, (None, None))
+                    if show.counter is not None:
+                        counter = show.counter
+                    if show.length is not None:
+                        length = show.length
+                    rows.append(key + (position, show.name, counter, length))
+                connection.executemany(
+                    "INSERT INTO shows"
+                    " (directory, session, position, name, counter, length)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+                connection.execute(
+                    "INSERT OR REPLACE INTO sources"
+                    " (directory, session, backend, fingerprint) VALUES (?, ?, ?, ?)",
+                    key + (source.backend, source.fingerprint),
+                )
+        finally:
+            connection.close()
+
+    def remove(self, directory: str, session: str) -> None:
+        self.update(CatalogSource(directory, session, backend=""), [])
+
+    def sources(self) -> List[CatalogSource]:
+        connection = self._connect()
+        try:
+            cursor = connection.execute(
+                "SELECT directory, session, backend, fingerprint FROM sources"
+                " ORDER BY directory, session"
+            )
+            return [CatalogSource(*row) for row in cursor]
+        finally:
+            connection.close()
+
+    def search(self, text: Optional[str] = None) -> List[CatalogEntry]:
+        query = "SELECT directory, session, position, name, counter, length FROM shows"
+        parameters: List[str] = []
+        if text:
+            escaped = text.replace("\\", "\\\\").replace("%", "\\%")
+            escaped = escaped.replace("_", "\\_")
+            query += " WHERE name LIKE ? ESCAPE '\\'"
+            parameters.append(f"%{escaped}%")
+        query += " ORDER BY directory, session, position"
+        connection = self._connect()
+        try:
+            return [CatalogEntry(*row) for row in connection.execute(query, parameters)]
+        finally:
+            connection.close()
+
+
+_catalog: Optional[Catalog] = None
+
+
+def get_catalog() -> Optional[Catalog]:
+    return _catalog
+
+
+def set_catalog(catalog: Optional[Catalog]) -> None:
+    global _catalog
+    _catalog = catalog
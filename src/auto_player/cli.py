@@ -1,13 +1,42 @@
 from pathlib import Path
+import os
 import sys
-from typing import Any, Dict, TypeVar, Union
+import time
+from typing import Any, Callable, Dict, List, Optional, TypeVar, Union
 
 import click
 from click.core import Context, Option, Parameter
 
-from .app import DEFAULT_CONFIG_PATH, AutoPlayer, Error, Rezult, create_auto_player
+from .app import (
+    DEFAULT_CONFIG_PATH,
+    DEFAULT_REINDEX_JOBS,
+    AutoPlayer,
+    ConfigError,
+    Error,
+    Rezult,
+    create_auto_player,
+    reindex,
+)
+from .app.base import DEFAULT_SCAN_JOBS, DEFAULT_SCAN_TIMEOUT
+from .app.file_group_factory import (
+    DEFAULT_AUDIO_REGEX,
+    DEFAULT_SUBTITLES_REGEX,
+    DEFAULT_VIDEO_REGEX,
+)
+from .app.importer import DEFAULT_IMPORT_JOBS
+from .catalog import CatalogEntry, CatalogSource, get_catalog
+from .client import default_socket_path
+from .file_group.ordering import ORDERINGS
+from .probe import MediaInfo
+from .profiling import (
+    PROFILE_ENVIRONMENT_VARIABLE_NAME,
+    PROFILE_OUTPUT_ENVIRONMENT_VARIABLE_NAME,
+    Profiler,
+    set_profiler,
+)
 
 DEFAULT_SESSION = "default"
+PROGRESS_INTERVAL = 0.2
 
 
 def abort_if_false(ctx: Context, _: Union[Option, Parameter], value: Any) -> Any:
@@ -15,32 +44,128 @@ def abort_if_false(ctx: Context, _: Union[Option, Parameter], value: Any) -> Any
         ctx.abort()
 
 
+def format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(round(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02}:{seconds:02}"
+    return f"{minutes}:{seconds:02}"
+
+
+def format_media_info(media: Optional[MediaInfo]) -> str:
+    if media is None:
+        return "[?]"
+    parts = []
+    if media.duration is not None:
+        parts.append(format_duration(media.duration))
+    if media.width is not None:
+        parts.append(f"{media.width}x{media.height}")
+    parts.append(f"audio: {media.audio_tracks}")
+    parts.append(f"subtitles: {media.subtitle_tracks}")
+    return f"[{', '.join(parts)}]"
+
+
 def print_files_group(files_group_info: Dict[str, Any], name: str) -> None:
     capitalized_name = name.capitalize()
     print(f"{capitalized_name} files:")
+    if not files_group_info:
+        # Imported shows often have no audio or subtitles group.
+        print("\tNone")
+        return
     print(f"\tClass: {files_group_info['class'].__name__}")
 
     print("\tFiles (may be generated):")
-    if len(files_group_info["files"]) == 0:
-        print("\t\tNone")
+    empty = True
     for file_info in files_group_info["files"]:
-        print(f"\t\t{file_info['relative_path']}")
+        if "media" in file_info:
+            media = format_media_info(file_info["media"])
+            print(f"\t\t{file_info['relative_path']}  {media}", flush=True)
+        else:
+            print(f"\t\t{file_info['relative_path']}", flush=True)
+        empty = False
+    if empty:
+        print("\t\tNone")
 
 
 def print_show_info(show_info: Dict[str, Any], full: bool) -> None:
     print(f"Name: {show_info['name']}")
-    print(f"Watched: {show_info['watched']}/{show_info['length']}")
     if full:
         print_files_group(show_info["video_group"], "video")
         print_files_group(show_info["audio_group"], "audio")
         print_files_group(show_info["subtitles_group"], "subtitles")
+    # Streamed infos only know the length after the files were printed.
+    print(f"Watched: {show_info['watched']}/{show_info['length']}")
+    if show_info.get("duration") is not None:
+        print(f"Duration: {format_duration(show_info['duration'])}")
+
+
+def print_catalog_entries(entries: List[CatalogEntry]) -> None:
+    current = None
+    for entry in entries:
+        if (entry.directory, entry.session) != current:
+            current = (entry.directory, entry.session)
+            print(f"{entry.directory} [{entry.session}]")
+        counter = "?" if entry.counter is None else entry.counter
+        length = "?" if entry.length is None else entry.length
+        print(f"  {entry.position + 1}. {entry.name} [{counter}/{length}]")
 
 
 def get_current_dir_normalized_name() -> str:
     return Path(".").resolve().name
 
 
+def complete_show_name(context: Context, _: Parameter, incomplete: str) -> List[str]:
+    root_params = context.find_root().params
+    try:
+        app = create_auto_player(
+            config_path=root_params.get("config_path") or DEFAULT_CONFIG_PATH,
+            session=root_params.get("session") or DEFAULT_SESSION,
+        )
+    except ConfigError:
+        return []
+    return app.find_show_names(incomplete)
+
+
+def start_profiling(
+    context: Context, print_tree: bool, output_path: Optional[str]
+) -> None:
+    profiler = Profiler()
+    set_profiler(profiler)
+
+    def report() -> None:
+        set_profiler(None)
+        if print_tree:
+            profiler.print_tree(sys.stderr)
+        if output_path:
+            with open(output_path, "w") as file:
+                file.write(profiler.to_json())
+
+    context.call_on_close(report)
+
+
 T = TypeVar("T")
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def files_group_options(function: F) -> F:
+    for group in ["subtitles", "audio", "video"]:
+        function = click.option(
+            f"--{group}_order",
+            type=click.Choice(list(ORDERINGS)),
+            default=None,
+            help=f"Order of {group} files (default: name, natural when recursive)",
+        )(function)
+        function = click.option(
+            f"--{group}_exclude",
+            default=None,
+            help=f"Regex for {group} subdirectories to skip",
+        )(function)
+        function = click.option(
+            f"--{group}_recursive",
+            is_flag=True,
+            help=f"Look for {group} files in subdirectories too",
+        )(function)
+    return function
 
 
 def command_rezult_handler(rezult: Rezult[T]) -> T:
@@ -59,29 +184,114 @@ def command_rezult_handler(rezult: Rezult[T]) -> T:
     default=DEFAULT_SESSION,
     help="Session to use. Data in sessions are isolated",
 )
+@click.option(
+    "--profile",
+    is_flag=True,
+    envvar=PROFILE_ENVIRONMENT_VARIABLE_NAME,
+    help="Print how long each phase took to stderr",
+)
+@click.option(
+    "--profile_output",
+    default=None,
+    envvar=PROFILE_OUTPUT_ENVIRONMENT_VARIABLE_NAME,
+    help="Write phase timings to this file as JSON",
+)
 @click.pass_context
-def cli(context: Context, config_path: str, session: str):
-    context.obj = create_auto_player(config_path=config_path, session=session)
+def cli(
+    context: Context,
+    config_path: str,
+    session: str,
+    profile: bool,
+    profile_output: Optional[str],
+):
+    if profile or profile_output:
+        start_profiling(context, profile, profile_output)
+    app_factory = context.obj or create_auto_player
+    try:
+        context.obj = app_factory(config_path=config_path, session=session)
+    except ConfigError as e:
+        command_rezult_handler(Error(f"Invalid config {e}"))
+    context.call_on_close(context.obj.flush_state)
 
 
 @cli.command("list", help="List shows")
+@click.option(
+    "-j",
+    "--jobs",
+    default=DEFAULT_SCAN_JOBS,
+    help="How many show directories to scan at once",
+)
+@click.option(
+    "--timeout",
+    default=DEFAULT_SCAN_TIMEOUT,
+    help="Seconds to wait for one show's directories",
+)
+@click.option(
+    "--all",
+    "all_directories",
+    is_flag=True,
+    help="List shows of every directory from the catalog",
+)
+@click.option(
+    "--search", default=None, help="Only catalog shows whose name contains this"
+)
 @click.pass_obj
-def list_command(obj: AutoPlayer):
+def list_command(
+    obj: AutoPlayer,
+    jobs: int,
+    timeout: float,
+    all_directories: bool,
+    search: Optional[str],
+):
     app = obj
-    shows = app.list_shows()
-    for number, show in zip(range(1, len(shows) + 1), shows):
-        print(f"{number}. {show.name} [{show.counter}/{len(show)}]")
-
-
-@cli.command("info", help="Show info about show")
+    if all_directories or search is not None:
+        entries = command_rezult_handler(app.search_catalog(search))
+        if not entries and search is None:
+            print("Catalog is empty, run `auto-player reindex DIRECTORY...`")
+        print_catalog_entries(entries)
+        return
+    show_lengths = app.show_lengths(jobs=jobs, timeout=timeout)
+    for number, (show, length) in enumerate(show_lengths, start=1):
+        if isinstance(length, Error):
+            print(
+                f"{number}. {show.name} [{show.counter}/?] Error: {length.msg}",
+                flush=True,
+            )
+        else:
+            print(f"{number}. {show.name} [{show.counter}/{length}]", flush=True)
+
+
+@cli.command("info", help="Show info about shows")
 @click.option("--full", is_flag=True, help="Show more info")
-@click.argument("name_or_number", default="1", required=False)
+@click.option(
+    "-j",
+    "--jobs",
+    default=DEFAULT_SCAN_JOBS,
+    help="How many show directories to scan (with --full: files to probe) at once",
+)
+@click.argument("names_or_numbers", nargs=-1, shell_complete=complete_show_name)
 @click.pass_obj
-def info_command(obj: AutoPlayer, full: bool, name_or_number: str):
+def info_command(obj: AutoPlayer, full: bool, jobs: int, names_or_numbers: List[str]):
     app = obj
-    show = command_rezult_handler(app.get_show(name_or_number))
-    info = command_rezult_handler(show.info())
-    print_show_info(info, full=full)
+    show_wrappers = [
+        command_rezult_handler(app.get_show(name_or_number))
+        for name_or_number in names_or_numbers or ["1"]
+    ]
+    if full:
+        # Printed while the files are found, scanning ahead would delay it.
+        for index, show_wrapper in enumerate(show_wrappers):
+            if index > 0:
+                print()
+            info = show_wrapper.info(stream=True, media=True, jobs=jobs)
+            print_show_info(command_rezult_handler(info), full=True)
+        return
+    shows = [show_wrapper.show for show_wrapper in show_wrappers]
+    show_lengths = app.show_lengths(shows, jobs=jobs, timeout=None)
+    for index, (show_wrapper, _) in enumerate(zip(show_wrappers, show_lengths)):
+        if index > 0:
+            print()
+        info = command_rezult_handler(show_wrapper.info())
+        print_show_info(info, full=False)
 
 
 @cli.command("play", help="Play next episode in show")
@@ -93,7 +303,9 @@ def info_command(obj: AutoPlayer, full: bool, name_or_number: str):
     help="Number of episode to play. Won't change state",
 )
 @click.option("--continuous", is_flag=True, help="Play next episode automatically")
-@click.argument("name_or_number", default="1", required=False)
+@click.argument(
+    "name_or_number", default="1", required=False, shell_complete=complete_show_name
+)
 @click.pass_obj
 def play_command(obj: AutoPlayer, continuous: bool, name_or_number: str, episode: int):
     app = obj
@@ -101,8 +313,17 @@ def play_command(obj: AutoPlayer, continuous: bool, name_or_number: str, episode
     info = command_rezult_handler(show.info())
     episode_number_str = "next" if episode == -1 else str(episode)
     show_name = info["name"]
-    print(f"Playing {episode_number_str} episode...")
-    command_rezult_handler(show.play(episode))
+    if continuous:
+        if episode != -1:
+            command_rezult_handler(Error("--continuous can't be used with --episode"))
+        command_rezult_handler(
+            show.play_continuous(
+                on_episode=lambda number: print(f"Playing episode {number}...")
+            )
+        )
+    else:
+        print(f"Playing {episode_number_str} episode...")
+        command_rezult_handler(show.play(episode))
     info = command_rezult_handler(show.info())
     print(f"Watched {info['watched']} episodes out of {info['length']}.")
     if info["length"] == info["watched"] and episode != -1:
@@ -112,13 +333,13 @@ def play_command(obj: AutoPlayer, continuous: bool, name_or_number: str, episode
 @cli.command("add", help="Add show")
 @click.option("-v", "--video_dir", "--vd", default=".", help="video root directory")
 @click.option(
-    "--video_regex", "--vx", default=r".+\.(mkv|mp4)", help="Regex for video files"
+    "--video_regex", "--vx", default=DEFAULT_VIDEO_REGEX, help="Regex for video files"
 )
 @click.option("-a", "--audio_dir", "--ad", default=".", help="audio root directory")
 @click.option(
     "--audio_regex",
     "--ax",
-    default=r".+\.(i don't remember audio resolutions)",
+    default=DEFAULT_AUDIO_REGEX,
     help="Regex for audio files",
 )
 @click.option(
@@ -127,12 +348,24 @@ def play_command(obj: AutoPlayer, continuous: bool, name_or_number: str, episode
 @click.option(
     "--subtitles_regex",
     "--sx",
-    default=r".+\.(ass|srt)",
+    default=DEFAULT_SUBTITLES_REGEX,
     help="Regex for subtitles files",
 )
+@files_group_options
 @click.option(
     "-w", "--watched", default=0, help="How many episodes you have already watched"
 )
+@click.option(
+    "--align",
+    is_flag=True,
+    help="Pair audio and subtitles with videos by episode number",
+)
+@click.option(
+    "--episode_regex",
+    "--ex",
+    default=None,
+    help="Regex extracting the episode number (implies --align)",
+)
 @click.option(
     "-t",
     "--test",
@@ -146,20 +379,20 @@ def add_command(obj: AutoPlayer, test: bool, name: str, **kwargs):
     app = obj
     rezult = app.add_show(test=test, name=name, **kwargs)
     show = command_rezult_handler(rezult)
-    info = command_rezult_handler(show.info())
+    info = command_rezult_handler(show.info(stream=True))
     print_show_info(info, full=True)
 
 
 @cli.command("edit", help="Edit show")
 @click.option("-v", "--video_dir", "--vd", default=".", help="video root directory")
 @click.option(
-    "--video_regex", "--vx", default=r".+\.(mkv|mp4)", help="Regex for video files"
+    "--video_regex", "--vx", default=DEFAULT_VIDEO_REGEX, help="Regex for video files"
 )
 @click.option("-a", "--audio_dir", "--ad", default=".", help="audio root directory")
 @click.option(
     "--audio_regex",
     "--ax",
-    default=r".+\.(i don't remember audio resolutions)",
+    default=DEFAULT_AUDIO_REGEX,
     help="Regex for audio files",
 )
 @click.option(
@@ -168,12 +401,24 @@ def add_command(obj: AutoPlayer, test: bool, name: str, **kwargs):
 @click.option(
     "--subtitles_regex",
     "--sx",
-    default=r".+\.(ass|srt)",
+    default=DEFAULT_SUBTITLES_REGEX,
     help="Regex for subtitles files",
 )
+@files_group_options
 @click.option(
     "-w", "--watched", default=0, help="How many episodes you have already watched"
 )
+@click.option(
+    "--align",
+    is_flag=True,
+    help="Pair audio and subtitles with videos by episode number",
+)
+@click.option(
+    "--episode_regex",
+    "--ex",
+    default=None,
+    help="Regex extracting the episode number (implies --align)",
+)
 @click.option(
     "-t",
     "--test",
@@ -181,14 +426,18 @@ def add_command(obj: AutoPlayer, test: bool, name: str, **kwargs):
     is_flag=True,
     help="Print finded files but not add to state",
 )
-@click.argument("name_or_number", default="1", required=False)
+@click.argument(
+    "name_or_number", default="1", required=False, shell_complete=complete_show_name
+)
 @click.pass_obj
 def edit_command(obj: AutoPlayer, name_or_number: str, test: bool, **kwargs):
     raise Exception(" Not implemented")
 
 
 @cli.command("delete", help="Delete show")
-@click.argument("name_or_number", default="1", required=False)
+@click.argument(
+    "name_or_number", default="1", required=False, shell_complete=complete_show_name
+)
 @click.option(
     "--yes",
     is_flag=True,
@@ -203,5 +452,118 @@ def delete_command(obj: AutoPlayer, name_or_number: str):
     show.delete()
 
 
+def import_progress() -> Callable[[int, int], None]:
+    last_report = 0.0
+
+    def report(directories: int, shows: int) -> None:
+        nonlocal last_report
+        now = time.monotonic()
+        if now - last_report < PROGRESS_INTERVAL or not sys.stderr.isatty():
+            return
+        last_report = now
+        print(
+            f"\rScanned {directories} directories, found {shows} shows",
+            end="",
+            file=sys.stderr,
+            flush=True,
+        )
+
+    return report
+
+
+@cli.command("import", help="Add every show directory found under ROOT")
+@click.option(
+    "--video_regex", "--vx", default=DEFAULT_VIDEO_REGEX, help="Regex for video files"
+)
+@click.option(
+    "--audio_regex",
+    "--ax",
+    default=DEFAULT_AUDIO_REGEX,
+    help="Regex for audio files",
+)
+@click.option(
+    "--subtitles_regex",
+    "--sx",
+    default=DEFAULT_SUBTITLES_REGEX,
+    help="Regex for subtitles files",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    default=DEFAULT_IMPORT_JOBS,
+    help="How many directories to scan at once",
+)
+@click.option(
+    "-t",
+    "--test",
+    default=False,
+    is_flag=True,
+    help="Print found shows but not add them to state",
+)
+@click.argument("root", default=".", type=click.Path(exists=True, file_okay=False))
+@click.pass_obj
+def import_command(obj: AutoPlayer, test: bool, jobs: int, root: str, **kwargs):
+    app = obj
+    result = app.import_shows(
+        root, test=test, jobs=jobs, on_progress=import_progress(), **kwargs
+    )
+    if sys.stderr.isatty():
+        print(file=sys.stderr)
+    verb = "Found" if test else "Added"
+    for show in result.added:
+        directory = show.show.video_group.directory
+        print(f"{verb} {show.show.name} [{len(show.show)}] {directory}")
+    for name, reason in result.skipped:
+        print(f"Skipped {name}: {reason}")
+    print(f"{verb} {len(result.added)} shows, skipped {len(result.skipped)}")
+
+
+@cli.command("reindex", help="Rebuild the catalog used by list --all")
+@click.option(
+    "-j",
+    "--jobs",
+    default=DEFAULT_REINDEX_JOBS,
+    help="How many directories to index at once",
+)
+@click.option("--force", is_flag=True, help="Reload state files that look unchanged")
+@click.argument("directories", nargs=-1, type=click.Path(exists=True, file_okay=False))
+@click.pass_context
+def reindex_command(context: Context, jobs: int, force: bool, directories: List[str]):
+    catalog = get_catalog()
+    if catalog is None:
+        command_rezult_handler(Error("Catalog is disabled, set catalog.path in config"))
+        return
+    root_params = context.find_root().params
+    sources = catalog.sources()
+    known = {(source.directory, source.session) for source in sources}
+    for directory in directories:
+        directory = os.path.abspath(directory)
+        if (directory, root_params["session"]) not in known:
+            sources.append(CatalogSource(directory, root_params["session"], backend=""))
+    results = reindex(root_params["config_path"], catalog, sources, jobs, force)
+    for source, rezult in results:
+        label = f"{source.directory} [{source.session}]"
+        if isinstance(rezult, Error):
+            print(f"{label} Error: {rezult.msg}", flush=True)
+        elif rezult is None:
+            print(f"{label} unchanged", flush=True)
+        else:
+            print(f"{label} {rezult} shows", flush=True)
+
+
+@cli.command("daemon", help="Serve list and info commands from a resident process")
+@click.option(
+    "--socket",
+    "socket_path",
+    default=default_socket_path,
+    help="Path to the daemon's unix socket",
+)
+def daemon_command(socket_path: str):
+    from .daemon import serve
+
+    print(f"Serving on {socket_path}")
+    serve(socket_path)
+
+
 if __name__ == "__main__":
     cli()
@@ -0,0 +1,110 @@
+# Kept free of click, typing and the app imports so forwarding to a running
+# daemon costs little more than the interpreter startup. The low level _socket
+# module is used because socket pulls in enum and selectors.
+import _socket
+import os
+import sys
+
+SOCKET_ENVIRONMENT_VARIABLE_NAME = "AUTO_PLAYER_SOCKET"
+
+DAEMON_COMMANDS = {"list", "info"}
+GLOBAL_OPTIONS_WITH_VALUE = {"--config", "--session", "--profile_output"}
+PROFILE_OPTIONS = {"--profile", "--profile_output"}
+PROFILE_ENVIRONMENT_VARIABLE_NAMES = {
+    "AUTO_PLAYER_PROFILE",
+    "AUTO_PLAYER_PROFILE_OUTPUT",
+}
+
+CLIENT_TIMEOUT = 5.0
+MAX_RESPONSE_SIZE = 64 * 1024 * 1024
+
+
+def default_socket_path() -> str:
+    path = os.environ.get(SOCKET_ENVIRONMENT_VARIABLE_NAME)
+    if path:
+        return path
+    directory = os.environ.get("XDG_RUNTIME_DIR") or os.environ.get("TMPDIR", "/tmp")
+    return os.path.join(directory, f"auto_player-{os.getuid()}.sock")
+
+
+def find_command(argv: list[str]) -> str | None:
+    arguments = iter(argv)
+    for argument in arguments:
+        if argument in GLOBAL_OPTIONS_WITH_VALUE:
+            next(arguments, None)
+        elif not argument.startswith("-"):
+            return argument
+    return None
+
+
+def can_forward(argv: list[str]) -> bool:
+    if any(key.endswith("_COMPLETE") for key in os.environ):
+        return False
+    if "--help" in argv:
+        return False
+    # Profiling is about this process, the daemon's timings would mislead.
+    if PROFILE_OPTIONS.intersection(argv):
+        return False
+    if any(os.environ.get(name) for name in PROFILE_ENVIRONMENT_VARIABLE_NAMES):
+        return False
+    return find_command(argv) in DAEMON_COMMANDS
+
+
+def receive_all(connection: _socket.socket, max_size: int = MAX_RESPONSE_SIZE) -> bytes:
+    chunks = []
+    size = 0
+    while True:
+        chunk = connection.recv(65536)
+        if not chunk:
+            return b"".join(chunks)
+        size += len(chunk)
+        if size > max_size:
+            raise OSError("Message is too big")
+        chunks.append(chunk)
+
+
+def encode_request(cwd: str, argv: list[str]) -> bytes:
+    return "\0".join([cwd, *argv]).encode()
+
+
+def decode_request(data: bytes) -> tuple[str, list[str]]:
+    cwd, *argv = data.decode().split("\0")
+    return cwd, argv
+
+
+def encode_response(exit_code: int, output: str) -> bytes:
+    return f"{exit_code}\n{output}".encode()
+
+
+def decode_response(data: bytes) -> tuple[int, str]:
+    exit_code, output = data.decode().split("\n", 1)
+    return int(exit_code), output
+
+
+def forward(argv: list[str], socket_path: str) -> tuple[int, str] | None:
+    connection = _socket.socket(_socket.AF_UNIX, _socket.SOCK_STREAM)
+    try:
+        connection.settimeout(CLIENT_TIMEOUT)
+        connection.connect(socket_path)
+        connection.sendall(encode_request(os.getcwd(), argv))
+        connection.shutdown(_socket.SHUT_WR)
+        return decode_response(receive_all(connection))
+    except (OSError, ValueError):
+        return None
+    finally:
+        connection.close()
+
+
+def main(prog_name: str | None = None) -> None:
+    argv = sys.argv[1:]
+    if can_forward(argv):
+        response = forward(argv, default_socket_path())
+        if response is not None:
+            exit_code, output = response
+            sys.stdout.write(output)
+            sys.stdout.flush()
+            sys.exit(exit_code)
+
+    from .cli import cli
+
+    cli(prog_name=prog_name)
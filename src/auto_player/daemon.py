@@ -0,0 +1,161 @@
+import io
+import os
+import signal
+import socket
+import socketserver
+from contextlib import redirect_stderr, redirect_stdout
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, Iterator, List, Optional, Tuple
+
+import click
+
+from .app import AutoPlayer, create_auto_player
+from .client import (
+    DAEMON_COMMANDS,
+    decode_request,
+    encode_response,
+    find_command,
+    receive_all,
+)
+from .file_group import FilesGroup
+from .file_group.watcher import create_watcher
+
+MAX_REQUEST_SIZE = 1024 * 1024
+
+
+@dataclass
+class PooledApp:
+    app: AutoPlayer
+    config_mtime: Optional[int]
+    fingerprint: Optional[Hashable]
+
+
+def file_mtime(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def app_files_groups(app: AutoPlayer) -> Iterator[FilesGroup]:
+    for show in app.state.shows:
+        for files_group in (show.video_group, show.audio_group, show.subtitles_group):
+            if files_group is not None:
+                yield files_group
+
+
+class AppPool:
+    def __init__(self):
+        self._apps: Dict[Tuple[str, str, str], PooledApp] = {}
+        self.watcher = create_watcher()
+
+    def get(self, config_path: str, session: str) -> AutoPlayer:
+        config_path = os.path.abspath(config_path)
+        key = (config_path, session, os.getcwd())
+        pooled = self._apps.get(key)
+        config_mtime = file_mtime(config_path)
+        if (
+            pooled is None
+            or pooled.config_mtime != config_mtime
+            or pooled.fingerprint != pooled.app.backend.fingerprint()
+        ):
+            if pooled is not None:
+                for files_group in app_files_groups(pooled.app):
+                    files_group.detach_watcher()
+            app = create_auto_player(config_path=config_path, session=session)
+            for files_group in app_files_groups(app):
+                files_group.attach_watcher(self.watcher)
+            pooled = PooledApp(
+                app=app,
+                config_mtime=file_mtime(config_path),
+                fingerprint=app.backend.fingerprint(),
+            )
+            self._apps[key] = pooled
+        return pooled.app
+
+
+class DaemonRequestHandler(socketserver.StreamRequestHandler):
+    server: "DaemonServer"
+
+    def handle(self) -> None:
+        try:
+            cwd, argv = decode_request(receive_all(self.connection, MAX_REQUEST_SIZE))
+            exit_code, output = self.server.run_command(argv, cwd)
+        except (OSError, ValueError) as e:
+            exit_code, output = 1, f"Error: bad request to daemon: {e}\n"
+        self.wfile.write(encode_response(exit_code, output))
+
+
+class DaemonServer(socketserver.UnixStreamServer):
+    def __init__(self, socket_path: str):
+        self.socket_path = socket_path
+        self.pool = AppPool()
+        remove_stale_socket(socket_path)
+        old_umask = os.umask(0o177)
+        try:
+            super().__init__(socket_path, DaemonRequestHandler)
+        finally:
+            os.umask(old_umask)
+
+    def run_command(self, argv: List[str], cwd: str) -> Tuple[int, str]:
+        from .cli import cli
+
+        if find_command(argv) not in DAEMON_COMMANDS:
+            return 1, "Error: command is not served by the daemon\n"
+        os.chdir(cwd)
+        output = io.StringIO()
+        exit_code: Any = 0
+        with redirect_stdout(output), redirect_stderr(output):
+            try:
+                cli.main(
+                    args=argv,
+                    prog_name="auto-player",
+                    obj=self.pool.get,
+                    standalone_mode=False,
+                )
+            except SystemExit as e:
+                exit_code = e.code
+            except click.ClickException as e:
+                e.show(file=output)
+                exit_code = e.exit_code
+            except click.Abort:
+                exit_code = 1
+            except Exception as e:
+                print("Error:", e)
+                exit_code = 1
+        if not isinstance(exit_code, int):
+            exit_code = 0 if exit_code is None else 1
+        return exit_code, output.getvalue()
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.pool.watcher.close()
+        try:
+            os.remove(self.socket_path)
+        except FileNotFoundError:
+            pass
+
+
+def remove_stale_socket(socket_path: str) -> None:
+    if not os.path.exists(socket_path):
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        try:
+            connection.connect(socket_path)
+        except ConnectionRefusedError:
+            os.remove(socket_path)
+            return
+    raise Exception(f"Daemon is already running on {socket_path}")
+
+
+def exit_on_signal(signal_number: int, _: Any) -> None:
+    raise SystemExit(128 + signal_number)
+
+
+def serve(socket_path: str) -> None:
+    with DaemonServer(socket_path) as server:
+        signal.signal(signal.SIGTERM, exit_on_signal)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
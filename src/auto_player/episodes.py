@@ -0,0 +1,38 @@
+import re
+from pathlib import Path
+from typing import Hashable, Optional, Pattern, Sequence, Tuple
+
+# Shared by file_group (episode ordering) and show (alignment), so it must
+# not import either of them.
+DEFAULT_EPISODE_PATTERNS = [
+    re.compile(r"[Ss](\d+)[ ._-]?[Ee](\d+)"),
+    # Season x episode; resolutions like 1920x1080 don't fit the digit counts.
+    re.compile(r"(?<![\dx])(\d{1,2})x(\d{2,3})(?![\dp])"),
+    re.compile(r"\s-\s(\d+)(?:v\d+)?(?:\s|\.|\[|\(|$)"),
+    re.compile(r"\[(\d+)(?:v\d+)?\]"),
+    re.compile(r"(?:^|[ ._-])[Ee][Pp]?[ ._]?(\d+)"),
+]
+
+EpisodeKey = Tuple[Hashable, ...]
+
+
+def normalize_key(groups: Sequence[Optional[str]]) -> EpisodeKey:
+    return tuple(
+        int(group) if group.isdigit() else group.lower()
+        for group in groups
+        if group is not None
+    )
+
+
+def episode_key(
+    path: Path, regex: Optional[Pattern[str]] = None
+) -> Optional[EpisodeKey]:
+    patterns = [regex] if regex is not None else DEFAULT_EPISODE_PATTERNS
+    for pattern in patterns:
+        match = pattern.search(path.stem)
+        if match is None:
+            continue
+        if "episode" in pattern.groupindex:
+            return normalize_key([match.group("episode")])
+        return normalize_key(match.groups() or [match.group(0)])
+    return None
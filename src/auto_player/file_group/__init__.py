@@ -1,6 +1,12 @@
+import os
 from enum import Enum
 from pathlib import Path
-from typing import Iterator
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+from ..metrics import count, gauge, timed
+from ..profiling import span
+from .scan_cache import StatKey, get_scan_cache
+from .watcher import DirectoryWatcher
 
 
 class FilesGroupType(Enum):
@@ -9,14 +15,60 @@ class FilesGroupType(Enum):
     SUBTITLES = 3
 
 
+def directory_stat_key(directory: Path) -> StatKey:
+    stat = os.stat(directory)
+    return (stat.st_mtime_ns, stat.st_ino)
+
+
 class FilesGroup:
+    KIND = "undefined"
+
     def __init__(self, group_type: FilesGroupType):
         self.group_type = group_type
 
+    def to_options(self) -> Dict[str, Any]:
+        raise Exception("Not implemeted")
+
+    @classmethod
+    def from_options(cls, options: Dict[str, Any]) -> "FilesGroup":
+        raise Exception("Not implemeted")
+
     @property
     def directory(self) -> Path:
         raise Exception("Not implemeted")
 
+    def attach_watcher(self, watcher: DirectoryWatcher) -> None:
+        pass
+
+    def detach_watcher(self) -> None:
+        pass
+
+    def _cached_scan(
+        self, token: str, key: StatKey, scan: Callable[[], List[str]]
+    ) -> List[str]:
+        directory = os.path.abspath(self.directory)
+        with span(f"scan {directory} {token}"):
+            cache = get_scan_cache()
+            if cache is not None:
+                names = cache.get(directory, token, key)
+                result = "miss" if names is None else "hit"
+                count("scan_cache_requests", result=result)
+                if names is not None:
+                    return names
+            with timed("scan_seconds", directory=directory):
+                names = scan()
+            count("scans", directory=directory)
+            gauge("files_matched", len(names), directory=directory, group=token)
+            if cache is not None:
+                cache.put(directory, token, key, names)
+            return names
+
+    def files(self) -> Sequence[Path]:
+        return list(self)
+
+    def cached_length(self) -> Optional[int]:
+        return None
+
     def __getitem__(self, key: int) -> Path:
         raise Exception("Not implemeted")
 
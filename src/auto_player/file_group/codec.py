@@ -0,0 +1,27 @@
+from typing import Any, Dict, Optional, Type
+
+from . import FilesGroup
+from .recursive_file_group import RecursiveFileGroup
+from .regex_file_group import RegexFileGroup
+
+FILES_GROUPS_KINDS: Dict[str, Type[FilesGroup]] = {
+    RegexFileGroup.KIND: RegexFileGroup,
+    RecursiveFileGroup.KIND: RecursiveFileGroup,
+}
+
+
+def encode_files_group(files_group: Optional[FilesGroup]) -> Optional[Dict[str, Any]]:
+    if files_group is None:
+        return None
+    if FILES_GROUPS_KINDS.get(files_group.KIND) is not type(files_group):
+        raise Exception(f"Files group {type(files_group).__name__} is not encodable")
+    return {"kind": files_group.KIND, "options": files_group.to_options()}
+
+
+def decode_files_group(data: Optional[Dict[str, Any]]) -> Optional[FilesGroup]:
+    if data is None:
+        return None
+    files_group_class = FILES_GROUPS_KINDS.get(data["kind"])
+    if files_group_class is None:
+        raise Exception(f"Unknown files group kind '{data['kind']}'")
+    return files_group_class.from_options(data["options"])
@@ -0,0 +1,95 @@
+import bisect
+import os
+import re
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from ..episodes import episode_key
+
+NATURAL_CHUNKS = re.compile(r"(\d+)")
+
+NaturalKey = List[Tuple[int, Union[int, str]]]
+
+
+def natural_key(name: str) -> NaturalKey:
+    # "ep2" sorts before "ep10"; numbers and text never compare directly.
+    return [
+        (0, int(chunk)) if chunk.isdigit() else (1, chunk.casefold())
+        for chunk in NATURAL_CHUNKS.split(name)
+        if chunk
+    ]
+
+
+class Ordering:
+    NAME = "name"
+
+    def key(self, path: Path) -> Any:
+        return path
+
+
+class NaturalOrdering(Ordering):
+    NAME = "natural"
+
+    def key(self, path: Path) -> Any:
+        return [natural_key(part) for part in path.parts]
+
+
+class MtimeOrdering(NaturalOrdering):
+    NAME = "mtime"
+
+    def key(self, path: Path) -> Any:
+        return (os.stat(path).st_mtime_ns, super().key(path))
+
+
+class EpisodeOrdering(NaturalOrdering):
+    NAME = "episode"
+
+    def key(self, path: Path) -> Any:
+        # Names without an episode number go last, in natural order.
+        episode = episode_key(path)
+        if episode is None:
+            return (1, (), super().key(path))
+        parts = tuple(
+            (0, part) if isinstance(part, int) else (1, part) for part in episode
+        )
+        return (0, parts, super().key(path))
+
+
+ORDERINGS: Dict[str, Ordering] = {
+    ordering.NAME: ordering
+    for ordering in [Ordering(), NaturalOrdering(), MtimeOrdering(), EpisodeOrdering()]
+}
+
+
+class SortKeys:
+    # Keys are computed once per item and survive rescans for as long as the
+    # item stays in the group. Items are paths, or names that to_path turns
+    # into paths; by name order an item is its own key and nothing is kept.
+    def __init__(self, order: str, to_path: Optional[Callable[[Any], Path]] = None):
+        self.ordering = ORDERINGS[order]
+        self.to_path = to_path
+        self._by_item = type(self.ordering) is Ordering
+        self._keys: Dict[Any, Any] = {}
+
+    def key(self, item: Any) -> Any:
+        if self._by_item:
+            return item
+        key = self._keys.get(item)
+        if key is None:
+            path = item if self.to_path is None else self.to_path(item)
+            key = self.ordering.key(path)
+            self._keys[item] = key
+        return key
+
+    def sort(self, items: Iterable[Any]) -> List[Any]:
+        if self._by_item:
+            return sorted(items)
+        self._keys = {item: self.key(item) for item in items}
+        return sorted(self._keys, key=self._keys.__getitem__)
+
+    def insert(self, items: List[Any], item: Any) -> bool:
+        index = bisect.bisect_left(items, self.key(item), key=self.key)
+        if index < len(items) and items[index] == item:
+            return False
+        items.insert(index, item)
+        return True
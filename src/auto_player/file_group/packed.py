@@ -0,0 +1,68 @@
+import os
+from array import array
+from pathlib import Path
+from typing import Any, Iterable, Iterator, List, Sequence, Union, overload
+
+
+class PackedPaths(Sequence[Path]):
+    # File names of one directory in a single bytes buffer plus an offset
+    # array: a few bytes per file instead of a Path object per file. Paths
+    # are built on access, only where a caller needs one.
+    __slots__ = ("directory", "_data", "_offsets")
+
+    def __init__(self, directory: Path, names: Iterable[str] = ()):
+        self.directory = directory
+        data = bytearray()
+        offsets = array("Q", [0])
+        for name in names:
+            data += os.fsencode(name)
+            offsets.append(len(data))
+        self._data = bytes(data)
+        self._offsets = offsets
+
+    def name(self, index: int) -> str:
+        index = range(len(self))[index]
+        start, end = self._offsets[index], self._offsets[index + 1]
+        return os.fsdecode(self._data[start:end])
+
+    def names(self) -> Iterator[str]:
+        data = self._data
+        offsets = self._offsets
+        for index in range(len(offsets) - 1):
+            start, end = offsets[index], offsets[index + 1]
+            yield os.fsdecode(data[start:end])
+
+    @overload
+    def __getitem__(self, index: int) -> Path:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[Path]:
+        ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Path, List[Path]]:
+        if isinstance(index, slice):
+            return [self.directory / self.name(i) for i in range(len(self))[index]]
+        return self.directory / self.name(index)
+
+    def __iter__(self) -> Iterator[Path]:
+        directory = self.directory
+        for name in self.names():
+            yield directory / name
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, PackedPaths):
+            return (self.directory, self._data, self._offsets) == (
+                other.directory,
+                other._data,
+                other._offsets,
+            )
+        if isinstance(other, Sequence) and not isinstance(other, str):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return repr(list(self))
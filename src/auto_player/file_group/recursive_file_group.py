@@ -0,0 +1,223 @@
+import os
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import (
+    Any,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Pattern,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from ..metrics import count, gauge, timed
+from ..profiling import span
+from . import FilesGroup, FilesGroupType
+from .ordering import NaturalOrdering, SortKeys, natural_key
+from .scan_cache import StatKey
+
+DEFAULT_WALK_JOBS = 4
+
+
+class VisitedDirectories:
+    # Shared by the parallel subtree walks: a directory reachable twice (bind
+    # mount, symlink) must be listed by only one of them.
+    def __init__(self):
+        self._seen: Set[Tuple[int, int]] = set()
+        self._lock = threading.Lock()
+
+    def add(self, key: Tuple[int, int]) -> bool:
+        with self._lock:
+            if key in self._seen:
+                return False
+            self._seen.add(key)
+            return True
+
+
+class RecursiveFileGroup(FilesGroup):
+    KIND = "recursive"
+
+    def __init__(
+        self,
+        group_type: FilesGroupType,
+        directory: Path,
+        regex: Pattern[str],
+        exclude: Optional[Pattern[str]] = None,
+        jobs: int = DEFAULT_WALK_JOBS,
+        order: str = NaturalOrdering.NAME,
+    ):
+        super().__init__(group_type=group_type)
+        self._directory = directory
+        self.regex = regex
+        self.exclude = exclude
+        self.jobs = jobs
+        self.order = order
+        self._reset_snapshot()
+
+    @property
+    def directory(self) -> Path:
+        return self._directory
+
+    def to_options(self) -> Dict[str, Any]:
+        return {
+            "group_type": self.group_type.value,
+            "directory": str(self.directory),
+            "regex": self.regex.pattern,
+            "flags": self.regex.flags,
+            "exclude": self.exclude.pattern if self.exclude is not None else None,
+            "exclude_flags": self.exclude.flags if self.exclude is not None else 0,
+            "jobs": self.jobs,
+            "order": self.order,
+        }
+
+    @classmethod
+    def from_options(cls, options: Dict[str, Any]) -> "RecursiveFileGroup":
+        exclude = options.get("exclude")
+        return cls(
+            group_type=FilesGroupType(options["group_type"]),
+            directory=Path(options["directory"]),
+            regex=re.compile(options["regex"], options.get("flags", 0)),
+            exclude=re.compile(exclude, options.get("exclude_flags", 0))
+            if exclude is not None
+            else None,
+            jobs=options.get("jobs", DEFAULT_WALK_JOBS),
+            order=options.get("order", NaturalOrdering.NAME),
+        )
+
+    def _reset_snapshot(self) -> None:
+        self._snapshot: List[Path] = []
+        self._directory_keys: Optional[Dict[str, StatKey]] = None
+        self._sort_keys = SortKeys(self.order)
+
+    def _snapshot_is_valid(self) -> bool:
+        if self._directory_keys is None:
+            return False
+        for directory, key in self._directory_keys.items():
+            try:
+                stat = os.stat(directory)
+            except OSError:
+                return False
+            if (stat.st_mtime_ns, stat.st_ino) != key:
+                return False
+        return True
+
+    def _list(
+        self, directory: str, keys: Dict[str, StatKey], visited: "VisitedDirectories"
+    ) -> List[os.DirEntry]:
+        stat = os.stat(directory)
+        if not visited.add((stat.st_dev, stat.st_ino)):
+            return []
+        keys[directory] = (stat.st_mtime_ns, stat.st_ino)
+        with os.scandir(directory) as entries:
+            return sorted(entries, key=lambda entry: natural_key(entry.name))
+
+    def _is_subtree(self, entry: os.DirEntry) -> bool:
+        if not entry.is_dir():
+            return False
+        return self.exclude is None or not self.exclude.search(entry.name)
+
+    def _visit(
+        self,
+        entry: os.DirEntry,
+        keys: Dict[str, StatKey],
+        visited: "VisitedDirectories",
+    ) -> Iterator[Path]:
+        if self._is_subtree(entry):
+            for child in self._list(entry.path, keys, visited):
+                yield from self._visit(child, keys, visited)
+        elif entry.is_file() and self.regex.match(entry.name):
+            yield Path(entry.path)
+
+    def _walk(self, keys: Dict[str, StatKey]) -> Iterator[Path]:
+        visited = VisitedDirectories()
+        entries = self._list(str(self.directory), keys, visited)
+        subtrees = sum(1 for entry in entries if self._is_subtree(entry))
+        if self.jobs <= 1 or subtrees <= 1:
+            for entry in entries:
+                yield from self._visit(entry, keys, visited)
+            return
+        # Top-level subtrees (seasons, discs) are walked in parallel, results
+        # are still yielded in order as soon as the next subtree is done.
+        executor = ThreadPoolExecutor(max_workers=min(self.jobs, subtrees))
+        try:
+            walks: List[Optional[Future]] = [
+                executor.submit(lambda e: list(self._visit(e, keys, visited)), entry)
+                if self._is_subtree(entry)
+                else None
+                for entry in entries
+            ]
+            for entry, walk in zip(entries, walks):
+                if walk is None:
+                    yield from self._visit(entry, keys, visited)
+                else:
+                    yield from walk.result()
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+    def _stream(self) -> Iterator[Path]:
+        keys: Dict[str, StatKey] = {}
+        if self.order != NaturalOrdering.NAME:
+            # Walk order is natural order; any other order needs every file.
+            self._snapshot = self._sort_keys.sort(self._walk(keys))
+            self._directory_keys = keys
+            yield from self._snapshot
+            return
+        files = []
+        for path in self._walk(keys):
+            files.append(path)
+            yield path
+        self._snapshot = files
+        self._directory_keys = keys
+
+    def _files(self) -> List[Path]:
+        if not self._snapshot_is_valid():
+            directory = os.path.abspath(self.directory)
+            with span(f"walk {directory}"), timed("scan_seconds", directory=directory):
+                for _ in self._stream():
+                    pass
+            count("scans", directory=directory)
+            gauge(
+                "files_matched",
+                len(self._snapshot),
+                directory=directory,
+                group=self.KIND,
+            )
+        return self._snapshot
+
+    def files(self) -> Sequence[Path]:
+        return self._files()
+
+    def cached_length(self) -> Optional[int]:
+        if self._directory_keys is None:
+            return None
+        return len(self._snapshot)
+
+    def __getitem__(self, key: int) -> Path:
+        return self._files()[key]
+
+    def __iter__(self) -> Iterator[Path]:
+        if self._snapshot_is_valid():
+            return iter(self._snapshot)
+        return self._stream()
+
+    def __len__(self) -> int:
+        return len(self._files())
+
+    def __str__(self):
+        return str(self._files())
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state.pop("_snapshot", None)
+        state.pop("_directory_keys", None)
+        state.pop("_sort_keys", None)
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._reset_snapshot()
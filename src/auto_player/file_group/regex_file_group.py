@@ -1,31 +1,148 @@
+import os
+import re
 from pathlib import Path
-from typing import Iterator, Pattern
+from typing import Any, Dict, Iterator, List, Optional, Pattern, Sequence
 
-from . import FilesGroup, FilesGroupType
+from . import FilesGroup, FilesGroupType, directory_stat_key
+from .ordering import Ordering, SortKeys
+from .packed import PackedPaths
+from .scan_cache import StatKey
+from .scanner import get_directory_scanner
+from .watcher import DirectoryChanges, DirectoryWatcher
 
 
 class RegexFileGroup(FilesGroup):
-    def __init__(self, group_type: FilesGroupType, directory: Path, regex=Pattern[str]):
+    KIND = "regex"
+
+    def __init__(
+        self,
+        group_type: FilesGroupType,
+        directory: Path,
+        regex=Pattern[str],
+        order: str = Ordering.NAME,
+    ):
         super().__init__(group_type=group_type)
         self._directory = directory
         self.regex = regex
+        self.order = order
+        self._watcher: Optional[DirectoryWatcher] = None
+        self._watched_directory: Optional[Path] = None
+        self._reset_snapshot()
+        self._register()
 
     @property
     def directory(self) -> Path:
         return self._directory
 
+    def to_options(self) -> Dict[str, Any]:
+        return {
+            "group_type": self.group_type.value,
+            "directory": str(self.directory),
+            "regex": self.regex.pattern,
+            "flags": self.regex.flags,
+            "order": self.order,
+        }
+
+    @classmethod
+    def from_options(cls, options: Dict[str, Any]) -> "RegexFileGroup":
+        return cls(
+            group_type=FilesGroupType(options["group_type"]),
+            directory=Path(options["directory"]),
+            regex=re.compile(options["regex"], options.get("flags", 0)),
+            order=options.get("order", Ordering.NAME),
+        )
+
+    def _reset_snapshot(self) -> None:
+        self._snapshot = PackedPaths(self.directory)
+        self._snapshot_key: Optional[StatKey] = None
+        self._sort_keys = SortKeys(self.order, to_path=self._path)
+
+    def _path(self, name: str) -> Path:
+        # A watcher may call back while the process is in another cwd.
+        directory = self._watched_directory or self.directory
+        return directory / name
+
+    def _register(self) -> None:
+        directory = os.path.abspath(self.directory)
+        get_directory_scanner().register(directory, self.regex)
+
+    def _scan(self, key: StatKey) -> List[str]:
+        directory = os.path.abspath(self.directory)
+        return get_directory_scanner().scan(directory, key, self.regex)
+
+    def attach_watcher(self, watcher: DirectoryWatcher) -> None:
+        self.detach_watcher()
+        self._watched_directory = Path(os.path.abspath(self.directory))
+        watcher.watch(self._watched_directory, self._apply_changes)
+        self._watcher = watcher
+        self._snapshot_key = None
+
+    def detach_watcher(self) -> None:
+        if self._watcher is not None:
+            assert self._watched_directory is not None
+            self._watcher.unwatch(self._watched_directory, self._apply_changes)
+            self._watcher = None
+            self._watched_directory = None
+
+    def _apply_changes(self, changes: DirectoryChanges) -> None:
+        if self._snapshot_key is None:
+            return
+        if changes.overflow:
+            self._snapshot_key = None
+            return
+        names = [name for name in self._snapshot.names() if name not in changes.removed]
+        for name in changes.added:
+            if self.regex.match(name) and self._path(name).is_file():
+                self._sort_keys.insert(names, name)
+        self._snapshot = PackedPaths(self.directory, names)
+
+    def _files(self) -> PackedPaths:
+        if self._watcher is not None and self._snapshot_key is not None:
+            self._watcher.poll()
+            if self._snapshot_key is not None:
+                return self._snapshot
+        key = directory_stat_key(self.directory)
+        if key != self._snapshot_key:
+            names = self._cached_scan(
+                f"regex:{self.regex.pattern}", key, lambda: self._scan(key)
+            )
+            self._snapshot = PackedPaths(self.directory, self._sort_keys.sort(names))
+            self._snapshot_key = key
+        return self._snapshot
+
+    def files(self) -> Sequence[Path]:
+        return self._files()
+
+    def cached_length(self) -> Optional[int]:
+        if self._snapshot_key is None:
+            return None
+        return len(self._snapshot)
+
     def __getitem__(self, key: int) -> Path:
-        iterator = iter(self)
-        for _ in range(key + 1):
-            item = next(iterator)
-        return item
+        return self._files()[key]
 
     def __iter__(self) -> Iterator[Path]:
-        files = self.directory.iterdir()
-        return (x for x in files if x.is_file() and self.regex.match(x.name))
+        return iter(self._files())
 
     def __len__(self) -> int:
-        return len([*iter(self)])
+        return len(self._files())
 
     def __str__(self):
-        return str([*iter(self)])
+        return str(self._files())
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state.pop("_snapshot", None)
+        state.pop("_snapshot_key", None)
+        state.pop("_watcher", None)
+        state.pop("_watched_directory", None)
+        state.pop("_sort_keys", None)
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self.__dict__.setdefault("order", Ordering.NAME)
+        self._watcher = None
+        self._watched_directory = None
+        self._reset_snapshot()
+        self._register()
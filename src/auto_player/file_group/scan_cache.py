@@ -0,0 +1,94 @@
+import atexit
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+StatKey = Tuple[int, int]
+
+SCAN_CACHE_VERSION = 1
+DEFAULT_MAX_ENTRIES = 1024
+
+CacheEntries = OrderedDict[Tuple[str, str], Tuple[StatKey, List[str]]]
+
+
+class ScanCache:
+    def __init__(self, path: str, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._entries: Optional[CacheEntries] = None
+        self._dirty = False
+        self._save_registered = False
+        self._lock = threading.Lock()
+
+    def same_settings(self, other: "ScanCache") -> bool:
+        return (self.path, self.max_entries) == (other.path, other.max_entries)
+
+    def _load(self) -> CacheEntries:
+        if self._entries is not None:
+            return self._entries
+        entries: CacheEntries = OrderedDict()
+        try:
+            with open(self.path, "r") as file:
+                data = json.load(file)
+            if data.get("version") == SCAN_CACHE_VERSION:
+                for directory, token, mtime, inode, names in data["entries"]:
+                    entries[(directory, token)] = ((mtime, inode), names)
+        except (OSError, ValueError, KeyError, TypeError):
+            entries.clear()
+        self._entries = entries
+        return entries
+
+    def get(self, directory: str, token: str, key: StatKey) -> Optional[List[str]]:
+        with self._lock:
+            entries = self._load()
+            entry = entries.get((directory, token))
+            if entry is None or entry[0] != key:
+                return None
+            entries.move_to_end((directory, token))
+            return entry[1]
+
+    def put(self, directory: str, token: str, key: StatKey, names: List[str]) -> None:
+        with self._lock:
+            entries = self._load()
+            entries[(directory, token)] = (key, names)
+            entries.move_to_end((directory, token))
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+            self._dirty = True
+            if not self._save_registered:
+                atexit.register(self.save)
+                self._save_registered = True
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty or self._entries is None:
+                return
+            data = {
+                "version": SCAN_CACHE_VERSION,
+                "entries": [
+                    [directory, token, key[0], key[1], names]
+                    for (directory, token), (key, names) in self._entries.items()
+                ],
+            }
+            temporary_path = f"{self.path}.{os.getpid()}.tmp"
+            try:
+                with open(temporary_path, "w") as file:
+                    json.dump(data, file)
+                os.replace(temporary_path, self.path)
+            except OSError:
+                return
+            self._dirty = False
+
+
+_scan_cache: Optional[ScanCache] = None
+
+
+def get_scan_cache() -> Optional[ScanCache]:
+    return _scan_cache
+
+
+def set_scan_cache(cache: Optional[ScanCache]) -> None:
+    global _scan_cache
+    _scan_cache = cache
@@ -0,0 +1,90 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Pattern, Tuple
+
+from .scan_cache import StatKey
+
+DEFAULT_MAX_DIRECTORIES = 256
+
+PatternKey = Tuple[str, int]
+Classified = Dict[PatternKey, List[str]]
+
+
+def pattern_key(regex: Pattern[str]) -> PatternKey:
+    return (regex.pattern, regex.flags)
+
+
+def list_files(directory: str) -> List[str]:
+    # DirEntry.is_file() answers from the d_type returned by readdir, so only
+    # symlinks and filesystems without d_type cost an extra stat.
+    with os.scandir(directory) as entries:
+        return [entry.name for entry in entries if entry.is_file()]
+
+
+def classify(names: List[str], patterns: Dict[PatternKey, Pattern[str]]) -> Classified:
+    classified: Classified = {key: [] for key in patterns}
+    matchers = [(classified[key], regex.match) for key, regex in patterns.items()]
+    for name in sorted(names):
+        for matched, match in matchers:
+            if match(name):
+                matched.append(name)
+    return classified
+
+
+class DirectoryScanner:
+    # Groups of one show usually share a directory: the first group to scan
+    # it lists the directory once and classifies the names for every regex
+    # registered there, the others pick up their result for the same StatKey.
+    def __init__(self, max_directories: int = DEFAULT_MAX_DIRECTORIES):
+        self.max_directories = max_directories
+        self._patterns: Dict[str, Dict[PatternKey, Pattern[str]]] = {}
+        self._results: OrderedDict[str, Tuple[StatKey, Classified]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def register(self, directory: str, regex: Pattern[str]) -> None:
+        with self._lock:
+            patterns = self._patterns.setdefault(directory, {})
+            patterns.setdefault(pattern_key(regex), regex)
+
+    def _cached(
+        self, directory: str, key: StatKey, regex_key: PatternKey
+    ) -> Optional[List[str]]:
+        result = self._results.get(directory)
+        if result is None or result[0] != key or regex_key not in result[1]:
+            return None
+        self._results.move_to_end(directory)
+        return result[1][regex_key]
+
+    def scan(self, directory: str, key: StatKey, regex: Pattern[str]) -> List[str]:
+        regex_key = pattern_key(regex)
+        with self._lock:
+            names = self._cached(directory, key, regex_key)
+            if names is not None:
+                return names
+            patterns = self._patterns.setdefault(directory, {})
+            patterns.setdefault(regex_key, regex)
+            patterns = dict(patterns)
+        classified = classify(list_files(directory), patterns)
+        self._store(directory, key, classified)
+        return classified[regex_key]
+
+    def prime(self, directory: str, key: StatKey, names: List[str]) -> None:
+        # For callers that listed the directory anyway, e.g. while walking.
+        with self._lock:
+            patterns = dict(self._patterns.get(directory, {}))
+        self._store(directory, key, classify(names, patterns))
+
+    def _store(self, directory: str, key: StatKey, classified: Classified) -> None:
+        with self._lock:
+            self._results[directory] = (key, classified)
+            self._results.move_to_end(directory)
+            while len(self._results) > self.max_directories:
+                self._results.popitem(last=False)
+
+
+_directory_scanner = DirectoryScanner()
+
+
+def get_directory_scanner() -> DirectoryScanner:
+    return _directory_scanner
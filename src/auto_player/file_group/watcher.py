@@ -0,0 +1,216 @@
+import ctypes
+import ctypes.util
+import os
+import struct
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set
+
+from .scan_cache import StatKey
+
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = (
+    IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF
+)
+LOST_MASK = IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED
+
+EVENT_HEADER = struct.Struct("iIII")
+READ_SIZE = 64 * 1024
+
+
+@dataclass
+class DirectoryChanges:
+    added: Set[str] = field(default_factory=set)
+    removed: Set[str] = field(default_factory=set)
+    overflow: bool = False
+
+    def add(self, name: str) -> None:
+        self.removed.discard(name)
+        self.added.add(name)
+
+    def remove(self, name: str) -> None:
+        self.added.discard(name)
+        self.removed.add(name)
+
+
+ChangesCallback = Callable[[DirectoryChanges], None]
+
+
+class DirectoryWatcher:
+    def __init__(self):
+        self._callbacks: Dict[str, List[ChangesCallback]] = defaultdict(list)
+
+    def watch(self, directory: Path, callback: ChangesCallback) -> None:
+        key = os.path.abspath(directory)
+        if not self._callbacks[key]:
+            self._add_directory(key)
+        self._callbacks[key].append(callback)
+
+    def unwatch(self, directory: Path, callback: ChangesCallback) -> None:
+        key = os.path.abspath(directory)
+        callbacks = self._callbacks.get(key, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+        if not callbacks and key in self._callbacks:
+            del self._callbacks[key]
+            self._remove_directory(key)
+
+    def _dispatch(self, directory: str, changes: DirectoryChanges) -> None:
+        for callback in list(self._callbacks.get(directory, [])):
+            callback(changes)
+
+    def _add_directory(self, directory: str) -> None:
+        ...
+
+    def _remove_directory(self, directory: str) -> None:
+        ...
+
+    def poll(self) -> None:
+        ...
+
+    def close(self) -> None:
+        ...
+
+
+class PollingWatcher(DirectoryWatcher):
+    def __init__(self):
+        super().__init__()
+        self._listings: Dict[str, Optional[Set[str]]] = {}
+        self._keys: Dict[str, Optional[StatKey]] = {}
+
+    def _stat_key(self, directory: str) -> Optional[StatKey]:
+        try:
+            stat = os.stat(directory)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_ino)
+
+    def _add_directory(self, directory: str) -> None:
+        self._keys[directory] = self._stat_key(directory)
+        try:
+            self._listings[directory] = set(os.listdir(directory))
+        except OSError:
+            self._listings[directory] = None
+
+    def _remove_directory(self, directory: str) -> None:
+        self._keys.pop(directory, None)
+        self._listings.pop(directory, None)
+
+    def poll(self) -> None:
+        for directory in list(self._keys):
+            key = self._stat_key(directory)
+            if key == self._keys[directory]:
+                continue
+            previous = self._listings[directory]
+            self._add_directory(directory)
+            current = self._listings[directory]
+            if previous is None or current is None:
+                changes = DirectoryChanges(overflow=True)
+            else:
+                changes = DirectoryChanges(
+                    added=current - previous, removed=previous - current
+                )
+            self._dispatch(directory, changes)
+
+
+class InotifyWatcher(DirectoryWatcher):
+    def __init__(self):
+        super().__init__()
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self._directories: Dict[int, str] = {}
+        self._descriptors: Dict[str, int] = {}
+        self._fallback = PollingWatcher()
+
+    def _add_directory(self, directory: str) -> None:
+        descriptor = self._libc.inotify_add_watch(
+            self._fd, os.fsencode(directory), WATCH_MASK | IN_ONLYDIR
+        )
+        if descriptor < 0:
+            self._fallback._add_directory(directory)
+            self._fallback._callbacks[directory] = self._callbacks[directory]
+            return
+        self._directories[descriptor] = directory
+        self._descriptors[directory] = descriptor
+
+    def _remove_directory(self, directory: str) -> None:
+        descriptor = self._descriptors.pop(directory, None)
+        if descriptor is None:
+            self._fallback._callbacks.pop(directory, None)
+            self._fallback._remove_directory(directory)
+            return
+        del self._directories[descriptor]
+        self._libc.inotify_rm_watch(self._fd, descriptor)
+
+    def _read_events(self) -> bytes:
+        chunks = []
+        while True:
+            try:
+                chunk = os.read(self._fd, READ_SIZE)
+            except BlockingIOError:
+                break
+            if not chunk:
+                break
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    def poll(self) -> None:
+        self._fallback.poll()
+        data = self._read_events()
+        if not data:
+            return
+        pending: Dict[str, DirectoryChanges] = defaultdict(DirectoryChanges)
+        offset = 0
+        while offset < len(data):
+            descriptor, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            end = offset + length
+            name = os.fsdecode(data[offset:end].rstrip(b"\0"))
+            offset = end
+            if mask & IN_Q_OVERFLOW:
+                for directory in self._descriptors:
+                    pending[directory].overflow = True
+                continue
+            directory = self._directories.get(descriptor)
+            if directory is None:
+                continue
+            if mask & LOST_MASK:
+                pending[directory].overflow = True
+                del self._directories[descriptor]
+                del self._descriptors[directory]
+                self._fallback._add_directory(directory)
+                self._fallback._callbacks[directory] = self._callbacks[directory]
+            elif mask & IN_ISDIR:
+                continue
+            elif mask & (IN_CREATE | IN_MOVED_TO):
+                pending[directory].add(name)
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                pending[directory].remove(name)
+        for directory, changes in pending.items():
+            self._dispatch(directory, changes)
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def create_watcher() -> DirectoryWatcher:
+    try:
+        return InotifyWatcher()
+    except (OSError, AttributeError):
+        return PollingWatcher()
@@ -0,0 +1,279 @@
+import atexit
+import bisect
+import json
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from typing import Any, ContextManager, Dict, Iterator, List, Optional, Tuple
+
+METRICS_PREFIX = "auto_player_"
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+Key = Tuple[str, Labels]
+
+
+@dataclass
+class Histogram:
+    buckets: List[int] = field(default_factory=lambda: [0] * len(DEFAULT_BUCKETS))
+    sum: float = 0.0
+    count: int = 0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(DEFAULT_BUCKETS, value)
+        if index < len(self.buckets):
+            self.buckets[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, other: "Histogram") -> None:
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+        self.sum += other.sum
+        self.count += other.count
+
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels: Labels, extra: Labels = ()) -> str:
+    if not labels and not extra:
+        return ""
+    pairs = ",".join(
+        f'{name}="{escape_label(value)}"' for name, value in labels + extra
+    )
+    return "{" + pairs + "}"
+
+
+class Metrics:
+    def __init__(self):
+        self.counters: Dict[Key, float] = {}
+        self.gauges: Dict[Key, float] = {}
+        self.histograms: Dict[Key, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def count(self, name: str, value: float, labels: Labels) -> None:
+        with self._lock:
+            key = (name, labels)
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def gauge(self, name: str, value: float, labels: Labels) -> None:
+        with self._lock:
+            self.gauges[(name, labels)] = value
+
+    def observe(self, name: str, value: float, labels: Labels) -> None:
+        with self._lock:
+            self.histograms.setdefault((name, labels), Histogram()).observe(value)
+
+    def merge(self, other: "Metrics") -> None:
+        with self._lock:
+            for key, value in other.counters.items():
+                self.counters[key] = self.counters.get(key, 0) + value
+            self.gauges.update(other.gauges)
+            for key, histogram in other.histograms.items():
+                self.histograms.setdefault(key, Histogram()).merge(histogram)
+
+    def is_empty(self) -> bool:
+        return not (self.counters or self.gauges or self.histograms)
+
+    def to_dict(self) -> Dict[str, Any]:
+        def entries(values: Dict[Key, Any]) -> List[Any]:
+            return [
+                [name, list(map(list, labels)), value]
+                for (name, labels), value in values.items()
+            ]
+
+        with self._lock:
+            return {
+                "counters": entries(self.counters),
+                "gauges": entries(self.gauges),
+                "histograms": [
+                    [name, list(map(list, labels)), h.buckets, h.sum, h.count]
+                    for (name, labels), h in self.histograms.items()
+                ],
+            }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Metrics":
+        def key(name: str, labels: List[List[str]]) -> Key:
+            return (name, tuple((label, value) for label, value in labels))
+
+        metrics = cls()
+        for name, labels, value in data["counters"]:
+            metrics.counters[key(name, labels)] = value
+        for name, labels, value in data["gauges"]:
+            metrics.gauges[key(name, labels)] = value
+        for name, labels, buckets, total, count in data["histograms"]:
+            metrics.histograms[key(name, labels)] = Histogram(buckets, total, count)
+        return metrics
+
+    def to_openmetrics(self) -> str:
+        lines = []
+        with self._lock:
+            families: Dict[str, List[str]] = {}
+            for (name, labels), value in sorted(self.counters.items()):
+                family = families.setdefault(f"{name} counter", [])
+                family.append(
+                    f"{METRICS_PREFIX}{name}_total{format_labels(labels)} {value}"
+                )
+            for (name, labels), value in sorted(self.gauges.items()):
+                family = families.setdefault(f"{name} gauge", [])
+                family.append(f"{METRICS_PREFIX}{name}{format_labels(labels)} {value}")
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                family = families.setdefault(f"{name} histogram", [])
+                cumulative = 0
+                for bound, bucket in zip(DEFAULT_BUCKETS, histogram.buckets):
+                    cumulative += bucket
+                    le = (("le", str(bound)),)
+                    family.append(
+                        f"{METRICS_PREFIX}{name}_bucket{format_labels(labels, le)}"
+                        f" {cumulative}"
+                    )
+                infinity = (("le", "+Inf"),)
+                family.append(
+                    f"{METRICS_PREFIX}{name}_bucket{format_labels(labels, infinity)}"
+                    f" {histogram.count}"
+                )
+                family.append(
+                    f"{METRICS_PREFIX}{name}_sum{format_labels(labels)} {histogram.sum}"
+                )
+                family.append(
+                    f"{METRICS_PREFIX}{name}_count{format_labels(labels)}"
+                    f" {histogram.count}"
+                )
+        for family, samples in families.items():
+            name, metric_type = family.split(" ")
+            lines.append(f"# TYPE {METRICS_PREFIX}{name} {metric_type}")
+            lines.extend(samples)
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsSink:
+    def same_settings(self, other: "MetricsSink") -> bool:
+        return type(self) is type(other) and vars(self) == vars(other)
+
+    def flush(self, metrics: Metrics) -> None:
+        ...
+
+
+def lock_file(file: Any) -> None:
+    # Imported here so the CLI still loads where fcntl doesn't exist; runs
+    # there can lose each other's updates to the totals.
+    try:
+        import fcntl
+    except ImportError:
+        return
+    fcntl.flock(file, fcntl.LOCK_EX)
+
+
+class TextfileSink(MetricsSink):
+    # Totals of earlier runs live in a JSON file next to the textfile, so
+    # counters keep growing across the many short runs of the CLI.
+    def __init__(self, path: str):
+        self.path = path
+
+    def flush(self, metrics: Metrics) -> None:
+        with open(f"{self.path}.json", "a+") as totals_file:
+            lock_file(totals_file)
+            totals_file.seek(0)
+            data = totals_file.read()
+            try:
+                totals = Metrics.from_dict(json.loads(data)) if data else Metrics()
+            except (ValueError, KeyError, TypeError):
+                totals = Metrics()
+            totals.merge(metrics)
+            totals_file.seek(0)
+            totals_file.truncate()
+            json.dump(totals.to_dict(), totals_file)
+            totals_file.flush()
+            temporary_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(temporary_path, "w") as file:
+                file.write(totals.to_openmetrics())
+            os.replace(temporary_path, self.path)
+
+
+class SocketSink(MetricsSink):
+    def __init__(self, path: str, timeout: float = 1.0):
+        self.path = path
+        self.timeout = timeout
+
+    def flush(self, metrics: Metrics) -> None:
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            connection.settimeout(self.timeout)
+            connection.connect(self.path)
+            connection.sendall(metrics.to_openmetrics().encode())
+        finally:
+            connection.close()
+
+
+class MetricsRecorder:
+    def __init__(self, sink: MetricsSink):
+        self.sink = sink
+        self.metrics = Metrics()
+        self._flush_registered = False
+
+    def register_flush(self) -> None:
+        if not self._flush_registered:
+            atexit.register(self.flush)
+            self._flush_registered = True
+
+    def flush(self) -> None:
+        metrics, self.metrics = self.metrics, Metrics()
+        if metrics.is_empty():
+            return
+        try:
+            self.sink.flush(metrics)
+        except OSError:
+            pass
+
+
+_recorder: Optional[MetricsRecorder] = None
+_disabled_timer = nullcontext()
+
+
+def get_metrics_recorder() -> Optional[MetricsRecorder]:
+    return _recorder
+
+
+def set_metrics_recorder(recorder: Optional[MetricsRecorder]) -> None:
+    global _recorder
+    _recorder = recorder
+
+
+def make_labels(labels: Dict[str, Any]) -> Labels:
+    return tuple((name, str(value)) for name, value in sorted(labels.items()))
+
+
+def count(name: str, value: float = 1, **labels: Any) -> None:
+    if _recorder is not None:
+        _recorder.metrics.count(name, value, make_labels(labels))
+
+
+def gauge(name: str, value: float, **labels: Any) -> None:
+    if _recorder is not None:
+        _recorder.metrics.gauge(name, value, make_labels(labels))
+
+
+def observe(name: str, value: float, **labels: Any) -> None:
+    if _recorder is not None:
+        _recorder.metrics.observe(name, value, make_labels(labels))
+
+
+@contextmanager
+def _timed(name: str, labels: Dict[str, Any]) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+
+def timed(name: str, **labels: Any) -> ContextManager[Any]:
+    if _recorder is None:
+        return _disabled_timer
+    return _timed(name, labels)
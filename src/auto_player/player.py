@@ -1,8 +1,11 @@
 import os
+import string
 import subprocess
 from dataclasses import dataclass
-from typing import List, Union
+from operator import attrgetter
+from typing import Any, Callable, List, Optional, Tuple, Union
 
+from .profiling import span
 from .show import EpisodeSet
 
 
@@ -13,6 +16,71 @@ class PlayStatus:
     error: Union[Exception, None] = None
 
 
+FORMATTER = string.Formatter()
+CONVERSIONS = {"s": str, "r": repr, "a": ascii}
+
+Field = Callable[[EpisodeSet], str]
+
+
+def compile_field(
+    field_name: str, format_spec: str, conversion: Optional[str]
+) -> Optional[Field]:
+    root, _, attributes = field_name.partition(".")
+    if root != "episode" or "[" in field_name or "{" in format_spec:
+        return None
+    get: Callable[[EpisodeSet], Any] = (
+        attrgetter(attributes) if attributes else lambda episode: episode
+    )
+    convert = CONVERSIONS.get(conversion) if conversion else None
+
+    def field(episode: EpisodeSet) -> str:
+        value = get(episode)
+        if convert is not None:
+            value = convert(value)
+        return format(value, format_spec)
+
+    return field
+
+
+class CommandTemplate:
+    # Parsed once; templates the fast path does not cover (indexing, nested
+    # specs, unknown names) fall back to str.format with identical results.
+    def __init__(self, template: str):
+        self.template = template
+        self._parts: Optional[List[Tuple[str, Optional[Field]]]] = []
+        try:
+            parsed = list(FORMATTER.parse(template))
+        except ValueError:
+            self._parts = None
+            return
+        for literal, field_name, format_spec, conversion in parsed:
+            field = None
+            if field_name is not None:
+                field = compile_field(field_name, format_spec or "", conversion)
+                if field is None:
+                    self._parts = None
+                    return
+            self._parts.append((literal, field))
+
+    def format(self, episode: EpisodeSet) -> str:
+        if self._parts is None:
+            return self.template.format(episode=episode)
+        return "".join(
+            literal if field is None else literal + field(episode)
+            for literal, field in self._parts
+        )
+
+
+def compile_templates(templates: List[str]) -> List[CommandTemplate]:
+    return [CommandTemplate(template) for template in templates]
+
+
+def format_templates(
+    templates: List[CommandTemplate], episode: EpisodeSet
+) -> List[str]:
+    return [template.format(episode) for template in templates]
+
+
 class Player:
     def play(self, episode_set: EpisodeSet) -> PlayStatus:
         ...
@@ -26,6 +94,7 @@ class EnvironmentPlayer(Player):
         self, environment_variable_name: str = DEFAULT_ENVIRONMENT_VARIABLE_NAME
     ):
         self.environment_variable_name = environment_variable_name
+        self._template: Optional[CommandTemplate] = None
 
     def _get_player_string(self) -> str:
         player_string = os.environ.get(self.environment_variable_name, None)
@@ -35,14 +104,21 @@ class EnvironmentPlayer(Player):
             )
         return player_string
 
+    def _get_template(self) -> CommandTemplate:
+        player_string = self._get_player_string()
+        if self._template is None or self._template.template != player_string:
+            self._template = CommandTemplate(player_string)
+        return self._template
+
     def play(self, episode_set: EpisodeSet) -> PlayStatus:
         try:
-            player_string = self._get_player_string()
+            template = self._get_template()
         except Exception as e:
             status = PlayStatus(failed=True, error=e)
             return status
-        command = player_string.format(episode=episode_set)
-        process = subprocess.run(command, shell=True)
+        command = template.format(episode_set)
+        with span("subprocess"):
+            process = subprocess.run(command, shell=True)
         failed = process.returncode != 0
         status = PlayStatus(failed=failed, return_code=process.returncode)
         return status
@@ -62,27 +138,28 @@ class CunstuctorPlayer(Player):
         self.audio_file_wrapper = audio_file_wrapper
         self.subtitles_file_wrapper = subtitles_file_wrapper
         self.appendix = appendix
+        self._base = compile_templates(base)
+        self._video_file_wrapper = compile_templates(video_file_wrapper)
+        self._audio_file_wrapper = compile_templates(audio_file_wrapper)
+        self._subtitles_file_wrapper = compile_templates(subtitles_file_wrapper)
+        self._appendix = compile_templates(appendix)
 
     def _construct_command(self, episode_set: EpisodeSet) -> List[str]:
-        command = []
-
-        def list_format(templates: list[str]) -> list[str]:
-            return list(
-                map(lambda x: x.format(episode=episode_set.fix_simlinks()), templates)
-            )
-
-        command += list_format(self.base)
-        command += list_format(self.video_file_wrapper)
+        with span("fix_simlinks"):
+            episode = episode_set.fix_simlinks()
+        command = format_templates(self._base, episode)
+        command += format_templates(self._video_file_wrapper, episode)
         if episode_set.audio_file is not None:
-            command += list_format(self.audio_file_wrapper)
+            command += format_templates(self._audio_file_wrapper, episode)
         if episode_set.subtitles_file is not None:
-            command += list_format(self.subtitles_file_wrapper)
-        command += list_format(self.appendix)
+            command += format_templates(self._subtitles_file_wrapper, episode)
+        command += format_templates(self._appendix, episode)
         return command
 
     def play(self, episode_set: EpisodeSet) -> PlayStatus:
         command = self._construct_command(episode_set)
-        process = subprocess.run(command)
+        with span("subprocess"):
+            process = subprocess.run(command)
         failed = process.returncode != 0
         status = PlayStatus(failed=failed, return_code=process.returncode)
         return status
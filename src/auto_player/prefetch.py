@@ -0,0 +1,44 @@
+import os
+from pathlib import Path
+from typing import Optional
+
+from .show import EpisodeSet
+from .show.statefull import StatefullShowWrapper
+
+DEFAULT_PREFETCH_BYTES = 8 * 1024 * 1024
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+def warm_page_cache(path: Optional[Path], size: int = DEFAULT_PREFETCH_BYTES) -> None:
+    if path is None:
+        return
+    file_descriptor = os.open(path, os.O_RDONLY)
+    try:
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(file_descriptor, 0, size, os.POSIX_FADV_WILLNEED)
+            return
+        remaining = size
+        while remaining > 0 and os.read(file_descriptor, READ_CHUNK_SIZE):
+            remaining -= READ_CHUNK_SIZE
+    finally:
+        os.close(file_descriptor)
+
+
+def prefetch_episode(
+    show: StatefullShowWrapper, index: int, size: int = DEFAULT_PREFETCH_BYTES
+) -> EpisodeSet:
+    episode_set = show[index]
+    try:
+        episode_set = episode_set.fix_simlinks()
+    except ValueError:
+        pass
+    for path in (
+        episode_set.video_file,
+        episode_set.audio_file,
+        episode_set.subtitles_file,
+    ):
+        try:
+            warm_page_cache(path, size)
+        except OSError:
+            pass
+    return episode_set
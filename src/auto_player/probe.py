@@ -0,0 +1,463 @@
+import atexit
+import json
+import mmap
+import os
+import struct
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import astuple, dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .processes import process_pool_context
+from .profiling import span
+
+PROBE_CACHE_VERSION = 1
+DEFAULT_MAX_ENTRIES = 16384
+DEFAULT_PROBE_JOBS = os.cpu_count() or 1
+# Below this many uncached files starting worker processes costs more than
+# probing them here.
+PARALLEL_THRESHOLD = 8
+MAX_BATCH_SIZE = 256
+
+FileKey = Tuple[int, int]
+
+EBML_ID = 0x1A45DFA3
+SEGMENT_ID = 0x18538067
+SEEK_HEAD_ID = 0x114D9B74
+SEEK_ID = 0x4DBB
+SEEK_ELEMENT_ID = 0x53AB
+SEEK_POSITION_ID = 0x53AC
+INFO_ID = 0x1549A966
+TIMESTAMP_SCALE_ID = 0x2AD7B1
+DURATION_ID = 0x4489
+TRACKS_ID = 0x1654AE6B
+TRACK_ENTRY_ID = 0xAE
+TRACK_TYPE_ID = 0x83
+VIDEO_ID = 0xE0
+PIXEL_WIDTH_ID = 0xB0
+PIXEL_HEIGHT_ID = 0xBA
+CLUSTER_ID = 0x1F43B675
+
+MATROSKA_VIDEO = 1
+MATROSKA_AUDIO = 2
+MATROSKA_SUBTITLES = 0x11
+
+MP4_SUBTITLE_HANDLERS = {b"sbtl", b"subt", b"text", b"clcp"}
+
+
+@dataclass
+class MediaInfo:
+    container: str
+    duration: Optional[float] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    audio_tracks: int = 0
+    subtitle_tracks: int = 0
+
+
+class UnknownSize(ValueError):
+    pass
+
+
+def read_vint(data: mmap.mmap, offset: int, keep_marker: bool) -> Tuple[int, int]:
+    first = data[offset]
+    length = 1
+    while length <= 8 and not first & (0x80 >> (length - 1)):
+        length += 1
+    if length > 8:
+        raise ValueError(f"Invalid EBML number at {offset}")
+    end = offset + length
+    if end > len(data):
+        raise ValueError(f"Truncated EBML number at {offset}")
+    value = first if keep_marker else first & (0xFF >> length)
+    rest = offset + 1
+    for byte in data[rest:end]:
+        value = (value << 8) | byte
+    return value, end
+
+
+def ebml_elements(
+    data: mmap.mmap, start: int, end: int
+) -> Iterator[Tuple[int, int, int]]:
+    # Yields (id, data start, data end); only headers are read, the payload
+    # of skipped elements is never touched.
+    offset = start
+    while offset < end:
+        element_id, offset = read_vint(data, offset, keep_marker=True)
+        size_start = offset
+        size, offset = read_vint(data, offset, keep_marker=False)
+        if size == (1 << (7 * (offset - size_start))) - 1:
+            yield element_id, offset, end
+            raise UnknownSize()
+        yield element_id, offset, min(offset + size, end)
+        offset += size
+
+
+def ebml_uint(data: mmap.mmap, start: int, end: int) -> int:
+    return int.from_bytes(data[start:end], "big")
+
+
+def ebml_float(data: mmap.mmap, start: int, end: int) -> float:
+    if end - start == 4:
+        return struct.unpack_from(">f", data, start)[0]
+    return struct.unpack_from(">d", data, start)[0]
+
+
+def read_matroska_info(data: mmap.mmap, start: int, end: int, info: MediaInfo) -> None:
+    scale = 1_000_000
+    duration = None
+    for element_id, element_start, element_end in ebml_elements(data, start, end):
+        if element_id == TIMESTAMP_SCALE_ID:
+            scale = ebml_uint(data, element_start, element_end)
+        elif element_id == DURATION_ID:
+            duration = ebml_float(data, element_start, element_end)
+    if duration is not None:
+        info.duration = duration * scale / 1e9
+
+
+def read_matroska_track(data: mmap.mmap, start: int, end: int, info: MediaInfo) -> None:
+    track_type = None
+    size = None
+    for element_id, element_start, element_end in ebml_elements(data, start, end):
+        if element_id == TRACK_TYPE_ID:
+            track_type = ebml_uint(data, element_start, element_end)
+        elif element_id == VIDEO_ID:
+            width = height = None
+            for video_id, video_start, video_end in ebml_elements(
+                data, element_start, element_end
+            ):
+                if video_id == PIXEL_WIDTH_ID:
+                    width = ebml_uint(data, video_start, video_end)
+                elif video_id == PIXEL_HEIGHT_ID:
+                    height = ebml_uint(data, video_start, video_end)
+            size = (width, height)
+    if track_type == MATROSKA_VIDEO and size is not None and info.width is None:
+        info.width, info.height = size
+    elif track_type == MATROSKA_AUDIO:
+        info.audio_tracks += 1
+    elif track_type == MATROSKA_SUBTITLES:
+        info.subtitle_tracks += 1
+
+
+def read_matroska_tracks(
+    data: mmap.mmap, start: int, end: int, info: MediaInfo
+) -> None:
+    for element_id, element_start, element_end in ebml_elements(data, start, end):
+        if element_id == TRACK_ENTRY_ID:
+            read_matroska_track(data, element_start, element_end, info)
+
+
+def read_seek_head(data: mmap.mmap, start: int, end: int) -> Dict[int, int]:
+    positions = {}
+    for element_id, element_start, element_end in ebml_elements(data, start, end):
+        if element_id != SEEK_ID:
+            continue
+        seek_id = seek_position = None
+        for seek_element, seek_start, seek_end in ebml_elements(
+            data, element_start, element_end
+        ):
+            if seek_element == SEEK_ELEMENT_ID:
+                seek_id = ebml_uint(data, seek_start, seek_end)
+            elif seek_element == SEEK_POSITION_ID:
+                seek_position = ebml_uint(data, seek_start, seek_end)
+        if seek_id is not None and seek_position is not None:
+            positions[seek_id] = seek_position
+    return positions
+
+
+def read_segment_element(data: mmap.mmap, offset: int, info: MediaInfo) -> None:
+    element_id, element_start, element_end = next(
+        ebml_elements(data, offset, len(data))
+    )
+    if element_id == INFO_ID:
+        read_matroska_info(data, element_start, element_end, info)
+    elif element_id == TRACKS_ID:
+        read_matroska_tracks(data, element_start, element_end, info)
+
+
+def probe_matroska(data: mmap.mmap) -> MediaInfo:
+    info = MediaInfo(container="matroska")
+    elements = ebml_elements(data, 0, len(data))
+    element_id, _, header_end = next(elements)
+    if element_id != EBML_ID:
+        raise ValueError("Not an EBML file")
+    element_id, segment_start, segment_end = next(
+        ebml_elements(data, header_end, len(data))
+    )
+    if element_id != SEGMENT_ID:
+        raise ValueError("No Matroska segment")
+    found = set()
+    seek_positions: Dict[int, int] = {}
+    try:
+        for element_id, start, end in ebml_elements(data, segment_start, segment_end):
+            if element_id == SEEK_HEAD_ID and not seek_positions:
+                seek_positions = read_seek_head(data, start, end)
+            elif element_id == INFO_ID:
+                read_matroska_info(data, start, end, info)
+                found.add(INFO_ID)
+            elif element_id == TRACKS_ID:
+                read_matroska_tracks(data, start, end, info)
+                found.add(TRACKS_ID)
+            elif element_id == CLUSTER_ID:
+                break
+            if found == {INFO_ID, TRACKS_ID}:
+                return info
+    except UnknownSize:
+        pass
+    # Whatever is behind the first cluster is only reachable through the
+    # seek head, walking the clusters would read the whole file.
+    for element_id in (INFO_ID, TRACKS_ID):
+        if element_id not in found and element_id in seek_positions:
+            position = segment_start + seek_positions[element_id]
+            read_segment_element(data, position, info)
+    return info
+
+
+def mp4_boxes(
+    data: mmap.mmap, start: int, end: int
+) -> Iterator[Tuple[bytes, int, int]]:
+    offset = start
+    while offset + 8 <= end:
+        size, box_type = struct.unpack_from(">I4s", data, offset)
+        header = 8
+        if size == 1:
+            (size,) = struct.unpack_from(">Q", data, offset + 8)
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header:
+            raise ValueError(f"Invalid MP4 box size at {offset}")
+        yield box_type, offset + header, min(offset + size, end)
+        offset += size
+
+
+def read_mp4_track(data: mmap.mmap, start: int, end: int, info: MediaInfo) -> None:
+    size = None
+    handler = None
+    for box_type, box_start, box_end in mp4_boxes(data, start, end):
+        if box_type == b"tkhd":
+            # Width and height are the last two 16.16 fixed point fields.
+            width, height = struct.unpack_from(">II", data, box_end - 8)
+            size = (width >> 16, height >> 16)
+        elif box_type == b"mdia":
+            for mdia_type, mdia_start, _ in mp4_boxes(data, box_start, box_end):
+                if mdia_type == b"hdlr":
+                    handler_start = mdia_start + 8
+                    handler_end = handler_start + 4
+                    handler = data[handler_start:handler_end]
+    if handler == b"vide" and size is not None and info.width is None:
+        info.width, info.height = size
+    elif handler == b"soun":
+        info.audio_tracks += 1
+    elif handler in MP4_SUBTITLE_HANDLERS:
+        info.subtitle_tracks += 1
+
+
+def probe_mp4(data: mmap.mmap) -> MediaInfo:
+    info = MediaInfo(container="mp4")
+    for box_type, start, end in mp4_boxes(data, 0, len(data)):
+        if box_type != b"moov":
+            continue
+        for moov_type, moov_start, moov_end in mp4_boxes(data, start, end):
+            if moov_type == b"mvhd":
+                if data[moov_start] == 1:
+                    timescale, duration = struct.unpack_from(
+                        ">IQ", data, moov_start + 20
+                    )
+                else:
+                    timescale, duration = struct.unpack_from(
+                        ">II", data, moov_start + 12
+                    )
+                if timescale:
+                    info.duration = duration / timescale
+            elif moov_type == b"trak":
+                read_mp4_track(data, moov_start, moov_end, info)
+        return info
+    raise ValueError("No moov box")
+
+
+def probe_file(path: Path) -> Optional[MediaInfo]:
+    try:
+        with open(path, "rb") as file:
+            if os.fstat(file.fileno()).st_size < 16:
+                return None
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                if data[:4] == b"\x1a\x45\xdf\xa3":
+                    return probe_matroska(data)
+                if data[4:8] in (b"ftyp", b"moov", b"mdat", b"free", b"wide"):
+                    return probe_mp4(data)
+    except (OSError, ValueError, IndexError, StopIteration, struct.error):
+        pass
+    return None
+
+
+def file_key(path: Path) -> FileKey:
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+CacheEntries = OrderedDict[str, Tuple[FileKey, Optional[MediaInfo]]]
+
+
+class ProbeCache:
+    def __init__(self, path: str, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._entries: Optional[CacheEntries] = None
+        self._dirty = False
+        self._save_registered = False
+        self._lock = threading.Lock()
+
+    def same_settings(self, other: "ProbeCache") -> bool:
+        return (self.path, self.max_entries) == (other.path, other.max_entries)
+
+    def _load(self) -> CacheEntries:
+        if self._entries is not None:
+            return self._entries
+        entries: CacheEntries = OrderedDict()
+        try:
+            with open(self.path, "r") as file:
+                data = json.load(file)
+            if data.get("version") == PROBE_CACHE_VERSION:
+                for path, size, mtime, info in data["entries"]:
+                    media = MediaInfo(*info) if info is not None else None
+                    entries[path] = ((size, mtime), media)
+        except (OSError, ValueError, KeyError, TypeError):
+            entries.clear()
+        self._entries = entries
+        return entries
+
+    def get(self, path: str, key: FileKey) -> Tuple[bool, Optional[MediaInfo]]:
+        with self._lock:
+            entries = self._load()
+            entry = entries.get(path)
+            if entry is None or entry[0] != key:
+                return False, None
+            entries.move_to_end(path)
+            return True, entry[1]
+
+    def put(self, path: str, key: FileKey, info: Optional[MediaInfo]) -> None:
+        with self._lock:
+            entries = self._load()
+            entries[path] = (key, info)
+            entries.move_to_end(path)
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+            self._dirty = True
+            if not self._save_registered:
+                atexit.register(self.save)
+                self._save_registered = True
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty or self._entries is None:
+                return
+            data = {
+                "version": PROBE_CACHE_VERSION,
+                "entries": [
+                    [path, key[0], key[1], astuple(info) if info else None]
+                    for path, (key, info) in self._entries.items()
+                ],
+            }
+            temporary_path = f"{self.path}.{os.getpid()}.tmp"
+            try:
+                with open(temporary_path, "w") as file:
+                    json.dump(data, file)
+                os.replace(temporary_path, self.path)
+            except OSError:
+                return
+            self._dirty = False
+
+
+_probe_cache: Optional[ProbeCache] = None
+
+
+def get_probe_cache() -> Optional[ProbeCache]:
+    return _probe_cache
+
+
+def set_probe_cache(cache: Optional[ProbeCache]) -> None:
+    global _probe_cache
+    _probe_cache = cache
+
+
+class Prober:
+    # Probes batches of files; the process pool is started on the first
+    # batch that needs it and reused by the following ones.
+    def __init__(self, jobs: int = DEFAULT_PROBE_JOBS):
+        self.jobs = jobs
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _probe_missing(self, paths: List[Path]) -> List[Optional[MediaInfo]]:
+        if self.jobs <= 1 or len(paths) < PARALLEL_THRESHOLD:
+            return [probe_file(path) for path in paths]
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.jobs, mp_context=process_pool_context()
+            )
+        chunksize = max(len(paths) // (self.jobs * 4), 1)
+        return list(self._executor.map(probe_file, paths, chunksize=chunksize))
+
+    def probe(self, paths: Sequence[Path]) -> List[Optional[MediaInfo]]:
+        cache = get_probe_cache()
+        results: List[Optional[MediaInfo]] = [None] * len(paths)
+        missing: List[Tuple[int, str, FileKey]] = []
+        for index, path in enumerate(paths):
+            absolute_path = os.path.abspath(path)
+            try:
+                key = file_key(path)
+            except OSError:
+                continue
+            if cache is not None:
+                found, info = cache.get(absolute_path, key)
+                if found:
+                    results[index] = info
+                    continue
+            missing.append((index, absolute_path, key))
+        if not missing:
+            return results
+        with span("probe.files"):
+            probed = self._probe_missing([Path(path) for _, path, _ in missing])
+        for (index, absolute_path, key), info in zip(missing, probed):
+            results[index] = info
+            if cache is not None:
+                cache.put(absolute_path, key, info)
+        return results
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+def probe_files(
+    paths: Sequence[Path], jobs: int = DEFAULT_PROBE_JOBS
+) -> List[Optional[MediaInfo]]:
+    prober = Prober(jobs)
+    try:
+        return prober.probe(paths)
+    finally:
+        prober.close()
+
+
+def probe_stream(
+    paths: Iterable[Path], jobs: int = DEFAULT_PROBE_JOBS
+) -> Iterator[Tuple[Path, Optional[MediaInfo]]]:
+    # Batches start small so the first results show up while a recursive
+    # group is still walking, and grow so the pool has work to spread.
+    prober = Prober(jobs)
+    batch_size = 1
+    batch: List[Path] = []
+    try:
+        for path in paths:
+            batch.append(path)
+            if len(batch) >= batch_size:
+                yield from zip(batch, prober.probe(batch))
+                batch = []
+                batch_size = min(batch_size * 2, MAX_BATCH_SIZE)
+        if batch:
+            yield from zip(batch, prober.probe(batch))
+    finally:
+        prober.close()
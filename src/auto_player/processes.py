@@ -0,0 +1,11 @@
+import multiprocessing
+from multiprocessing.context import BaseContext
+
+
+def process_pool_context() -> BaseContext:
+    # Forking a process that runs threads (watcher, timers, the daemon's
+    # request handlers) copies their locks in whatever state they are in,
+    # so pool workers start from a fresh interpreter instead.
+    methods = multiprocessing.get_all_start_methods()
+    method = "forkserver" if "forkserver" in methods else "spawn"
+    return multiprocessing.get_context(method)
@@ -0,0 +1,88 @@
+import json
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from typing import Any, ContextManager, Dict, Iterator, List, Optional, TextIO
+
+PROFILE_ENVIRONMENT_VARIABLE_NAME = "AUTO_PLAYER_PROFILE"
+PROFILE_OUTPUT_ENVIRONMENT_VARIABLE_NAME = "AUTO_PLAYER_PROFILE_OUTPUT"
+
+
+@dataclass
+class Span:
+    name: str
+    start: float
+    duration: Optional[float] = None
+    children: List["Span"] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "ms": (self.duration or 0) * 1000,
+            "children": [child.to_dict() for child in self.children],
+        }
+
+
+class Profiler:
+    def __init__(self):
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self) -> List[Span]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = []
+            self._local.stack = stack
+        return stack
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[Span]:
+        stack = self._stack()
+        current = Span(name=name, start=time.perf_counter())
+        if stack:
+            stack[-1].children.append(current)
+        else:
+            # Top level spans of worker threads land next to the main ones.
+            with self._lock:
+                self.spans.append(current)
+        stack.append(current)
+        try:
+            yield current
+        finally:
+            current.duration = time.perf_counter() - current.start
+            stack.pop()
+
+    def to_json(self) -> str:
+        return json.dumps([span.to_dict() for span in self.spans], indent=2)
+
+    def print_tree(self, file: TextIO) -> None:
+        def print_span(span: Span, depth: int) -> None:
+            milliseconds = (span.duration or 0) * 1000
+            label = "  " * depth + span.name
+            print(f"{label:<60} {milliseconds:10.3f} ms", file=file)
+            for child in span.children:
+                print_span(child, depth + 1)
+
+        for span in self.spans:
+            print_span(span, 0)
+
+
+_profiler: Optional[Profiler] = None
+_disabled_span = nullcontext()
+
+
+def get_profiler() -> Optional[Profiler]:
+    return _profiler
+
+
+def set_profiler(profiler: Optional[Profiler]) -> None:
+    global _profiler
+    _profiler = profiler
+
+
+def span(name: str) -> ContextManager[Any]:
+    if _profiler is None:
+        return _disabled_span
+    return _profiler.span(name)
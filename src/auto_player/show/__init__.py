@@ -1,8 +1,9 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
 from ..file_group import FilesGroup
+from .alignment import EpisodeAlignment, EpisodeTable
 
 # class PShow(Protocol):
 #     name: str
@@ -22,23 +23,24 @@ from ..file_group import FilesGroup
 #         return len(self.video_group)
 
 
-@dataclass
+@dataclass(slots=True)
 class EpisodeSet:
     video_file: Path
     audio_file: Optional[Path] = None
     subtitles_file: Optional[Path] = None
 
     @staticmethod
-    def _fix_simlink_for_path(path: Path) -> Path:
-        return path.resolve().relative_to(Path(".").resolve())
+    def _fix_simlink_for_path(path: Path, directory: Path) -> Path:
+        return Path(path).resolve().relative_to(directory)
 
     def fix_simlinks(self) -> "EpisodeSet":
+        directory = Path(".").resolve()
         return EpisodeSet(
-            video_file=self._fix_simlink_for_path(self.video_file),
-            audio_file=self._fix_simlink_for_path(self.audio_file)
+            video_file=self._fix_simlink_for_path(self.video_file, directory),
+            audio_file=self._fix_simlink_for_path(self.audio_file, directory)
             if self.audio_file
             else None,
-            subtitles_file=self._fix_simlink_for_path(self.subtitles_file)
+            subtitles_file=self._fix_simlink_for_path(self.subtitles_file, directory)
             if self.subtitles_file
             else None,
         )
@@ -50,8 +52,27 @@ class Show:
     video_group: FilesGroup
     audio_group: Optional[FilesGroup] = None
     subtitles_group: Optional[FilesGroup] = None
+    alignment: Optional[EpisodeAlignment] = None
+    _table: Optional[EpisodeTable] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    def _episodes(self, alignment: EpisodeAlignment) -> List[EpisodeSet]:
+        sources = (
+            self.video_group.files(),
+            self.audio_group.files() if self.audio_group else None,
+            self.subtitles_group.files() if self.subtitles_group else None,
+        )
+        table = self._table
+        if table is None or not table.built_from(sources):
+            episodes = [EpisodeSet(*files) for files in alignment.join(sources)]
+            table = EpisodeTable(sources=sources, episodes=episodes)
+            self._table = table
+        return table.episodes
 
     def __getitem__(self, key: int) -> EpisodeSet:
+        if self.alignment is not None:
+            return self._episodes(self.alignment)[key]
         episode_set = EpisodeSet(
             video_file=self.video_group[key],
             audio_file=self.audio_group[key] if self.audio_group else None,
@@ -61,3 +82,8 @@ class Show:
 
     def __len__(self) -> int:
         return len(self.video_group)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state.pop("_table", None)
+        return state
@@ -0,0 +1,41 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Pattern, Sequence, Tuple
+
+from ..episodes import EpisodeKey, episode_key
+
+EpisodeFiles = Tuple[Path, Optional[Path], Optional[Path]]
+Sources = Tuple[Sequence[Path], Optional[Sequence[Path]], Optional[Sequence[Path]]]
+
+
+@dataclass
+class EpisodeAlignment:
+    regex: Optional[Pattern[str]] = None
+
+    def key(self, path: Path) -> Optional[EpisodeKey]:
+        return episode_key(path, self.regex)
+
+    def index(self, files: Optional[Sequence[Path]]) -> Dict[EpisodeKey, Path]:
+        index: Dict[EpisodeKey, Path] = {}
+        for position, path in enumerate(files or []):
+            index.setdefault(self.key(path) or ("position", position), path)
+        return index
+
+    def join(self, sources: Sources) -> List[EpisodeFiles]:
+        video_files, audio_files, subtitles_files = sources
+        audio_index = self.index(audio_files)
+        subtitles_index = self.index(subtitles_files)
+        rows = []
+        for position, video_file in enumerate(video_files):
+            key = self.key(video_file) or ("position", position)
+            rows.append((video_file, audio_index.get(key), subtitles_index.get(key)))
+        return rows
+
+
+@dataclass
+class EpisodeTable:
+    sources: Sources
+    episodes: List[Any]
+
+    def built_from(self, sources: Sources) -> bool:
+        return all(a is b for a, b in zip(sources, self.sources))
@@ -1,5 +1,5 @@
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
 
 from ..file_group import FilesGroup
 from . import EpisodeSet, Show
@@ -9,6 +9,22 @@ from . import EpisodeSet, Show
 class StatefullShowWrapper:
     show: Show
     counter: int = 0
+    _dirty: bool = field(default=False, init=False, repr=False, compare=False)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name in ("show", "counter"):
+            object.__setattr__(self, "_dirty", True)
+        object.__setattr__(self, name, value)
+
+    @property
+    def is_dirty(self) -> bool:
+        return self._dirty
+
+    def mark_dirty(self) -> None:
+        self._dirty = True
+
+    def mark_clean(self) -> None:
+        self._dirty = False
 
     def _increase_counter(self, increment_value: int = 1) -> None:
         self.counter += increment_value
@@ -43,3 +59,8 @@ class StatefullShowWrapper:
     @property
     def subtitles_group(self) -> Optional[FilesGroup]:
         return self.show.subtitles_group
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state.pop("_dirty", None)
+        return state
@@ -1,12 +1,150 @@
+import bisect
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    MutableSequence,
+    Optional,
+    Tuple,
+    Union,
+)
 
 from .show.statefull import StatefullShowWrapper
 
 
+class LazyShowList(MutableSequence[StatefullShowWrapper]):
+    def __init__(
+        self,
+        tokens: Iterable[Any],
+        decode: Callable[[Any], StatefullShowWrapper],
+        decode_name: Callable[[Any], str],
+    ):
+        self._tokens: List[Any] = list(tokens)
+        self._items: List[Optional[StatefullShowWrapper]] = [None] * len(self._tokens)
+        self._decode = decode
+        self._decode_name = decode_name
+
+    @classmethod
+    def from_shows(
+        cls,
+        shows: Iterable[StatefullShowWrapper],
+        decode: Callable[[Any], StatefullShowWrapper],
+        decode_name: Callable[[Any], str],
+    ) -> "LazyShowList":
+        lazy_shows = cls(tokens=[], decode=decode, decode_name=decode_name)
+        lazy_shows.extend(shows)
+        return lazy_shows
+
+    def name(self, index: int) -> str:
+        item = self._items[index]
+        if item is not None:
+            return item.name
+        return self._decode_name(self._tokens[index])
+
+    def token(self, index: int) -> Any:
+        return self._tokens[index]
+
+    def set_token(self, index: int, token: Any) -> None:
+        self._tokens[index] = token
+
+    def is_decoded(self, index: int) -> bool:
+        return self._items[index] is not None
+
+    def _get(self, index: int) -> StatefullShowWrapper:
+        item = self._items[index]
+        if item is None:
+            item = self._decode(self._tokens[index])
+            self._items[index] = item
+        return item
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            return [self._get(i) for i in range(len(self))[index]]
+        return self._get(range(len(self))[index])
+
+    def __setitem__(self, index: Any, item: Any) -> None:
+        if isinstance(index, slice):
+            raise TypeError("LazyShowList does not support slice assignment")
+        self._items[index] = item
+        self._tokens[index] = None
+
+    def __delitem__(self, index: Any) -> None:
+        del self._items[index]
+        del self._tokens[index]
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    def insert(self, index: int, item: StatefullShowWrapper) -> None:
+        self._items.insert(index, item)
+        self._tokens.insert(index, None)
+
+    def index(self, value: Any, start: int = 0, stop: Optional[int] = None) -> int:
+        stop = len(self) if stop is None else stop
+        for i in range(start, min(stop, len(self))):
+            if self._items[i] is value:
+                return i
+        return super().index(value, start, stop)
+
+
+class ShowIndex:
+    def __init__(self, names: Iterable[str]):
+        self.positions: Dict[str, int] = {}
+        self.sorted_names: List[str] = []
+        self.size = 0
+        for position, name in enumerate(names):
+            self.add(name, position)
+
+    def add(self, name: str, position: int) -> None:
+        self.size += 1
+        if name in self.positions:
+            return
+        self.positions[name] = position
+        bisect.insort(self.sorted_names, name)
+
+    def find_prefix(self, prefix: str) -> List[str]:
+        start = bisect.bisect_left(self.sorted_names, prefix)
+        names = []
+        for name in self.sorted_names[start:]:
+            if not name.startswith(prefix):
+                break
+            names.append(name)
+        return names
+
+
 @dataclass
 class State:
-    shows: List[StatefullShowWrapper] = field(default_factory=list)
+    shows: MutableSequence[StatefullShowWrapper] = field(default_factory=list)
+    _index: Optional[ShowIndex] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _structure_changed: bool = field(
+        default=True, init=False, repr=False, compare=False
+    )
+    _clean_length: Optional[int] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    def _get_index(self) -> ShowIndex:
+        if self._index is None or self._index.size != len(self.shows):
+            names = (self.show_name(i) for i in range(len(self.shows)))
+            self._index = ShowIndex(names)
+        return self._index
+
+    def add_show(self, show: StatefullShowWrapper) -> None:
+        self.shows.append(show)
+        self._structure_changed = True
+        if self._index is not None and self._index.size == len(self.shows) - 1:
+            self._index.add(show.name, len(self.shows) - 1)
+
+    def remove_show(self, show: StatefullShowWrapper) -> None:
+        self.shows.remove(show)
+        self._index = None
+        self._structure_changed = True
 
     def get_show_by_number(
         self, number: int, correct_zero: bool = True
@@ -16,9 +154,58 @@ class State:
         show = self.shows[number] if number < len(self.shows) else None
         return show
 
+    def show_name(self, index: int) -> str:
+        if isinstance(self.shows, LazyShowList):
+            return self.shows.name(index)
+        return self.shows[index].name
+
     def get_show_by_name(self, name: str) -> Optional[StatefullShowWrapper]:
-        show = next((show for show in self.shows if show.name == name), None)
-        return show
+        position = self._get_index().positions.get(name)
+        return self.shows[position] if position is not None else None
+
+    def find_show_names(self, prefix: str) -> List[str]:
+        return self._get_index().find_prefix(prefix)
 
     def is_empty(self) -> bool:
         return len(self.shows) == 0
+
+    def _decoded_shows(self) -> Iterator[Tuple[int, StatefullShowWrapper]]:
+        shows = self.shows
+        for index in range(len(shows)):
+            if isinstance(shows, LazyShowList) and not shows.is_decoded(index):
+                continue
+            yield index, shows[index]
+
+    def is_dirty(self) -> bool:
+        if self._structure_changed or self._clean_length != len(self.shows):
+            return True
+        return any(show.is_dirty for _, show in self._decoded_shows())
+
+    def mark_changed(self) -> None:
+        self._structure_changed = True
+
+    def take_changes(self) -> Optional[List[int]]:
+        # Positions of the changed shows, or None when shows were added or
+        # removed. The marks are cleared first, so changes made while a save
+        # runs on another thread go to the next save.
+        structure_changed = self._structure_changed or self._clean_length != len(
+            self.shows
+        )
+        self._structure_changed = False
+        self._clean_length = len(self.shows)
+        positions = []
+        for index, show in self._decoded_shows():
+            if show.is_dirty:
+                show.mark_clean()
+                positions.append(index)
+        return None if structure_changed else positions
+
+    def mark_clean(self) -> None:
+        self.take_changes()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state.pop("_index", None)
+        state.pop("_structure_changed", None)
+        state.pop("_clean_length", None)
+        return state
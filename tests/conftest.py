@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+from auto_player.app.config import DEFAULT_CONFIG
+
+
+@pytest.fixture(autouse=True)
+def isolated_home(tmp_path_factory, monkeypatch):
+    # Defaults point into HOME; tests must never touch the user's caches.
+    home = tmp_path_factory.mktemp("home")
+    monkeypatch.setenv("HOME", str(home))
+    monkeypatch.setenv("XDG_CACHE_HOME", str(home / ".cache"))
+    for key in ("scan_cache", "probe_cache"):
+        section = dict(DEFAULT_CONFIG[key], path=str(home / f".autoplayer_{key}"))
+        monkeypatch.setitem(DEFAULT_CONFIG, key, section)
+    return home
+
+
+@pytest.fixture
+def config_file(tmp_path):
+    path = tmp_path / "config.json"
+    config = {
+        "backend": {
+            "class": "auto_player.backend.localfilebackend.LocalfileBackend",
+            "params": {},
+        },
+        "player": {
+            "class": "auto_player.player.CunstuctorPlayer",
+            "params": {
+                "base": ["echo"],
+                "video_file_wrapper": ["{episode.video_file}"],
+                "audio_file_wrapper": ["{episode.audio_file}"],
+                "subtitles_file_wrapper": ["{episode.subtitles_file}"],
+                "appendix": [],
+            },
+        },
+        "scan_cache": None,
+        "probe_cache": None,
+        "catalog": None,
+    }
+    path.write_text(json.dumps(config))
+    return path
@@ -1,35 +1,189 @@
 import json
+import threading
+import time
 
 import pytest
 
-from auto_player.app import AutoPlayer, create_auto_player
+from auto_player.app import AutoPlayer, Error, create_auto_player
+from auto_player.app.parallel import DaemonWorkers
+from auto_player.backend.localfilebackend import LocalfileBackend
+from auto_player.player import PlayStatus
+
+
+def test_app_creation(config_file):
+    app = create_auto_player(config_path=config_file)
+    assert app is not None
+    assert isinstance(app, AutoPlayer)
 
 
 @pytest.fixture
-def config_file(tmpdir):
-    path = tmpdir.join("config.json")
-    config = {
-        "backend": {
-            "class": "auto_player.backend.localfilebackend.LocalfileBackend",
-            "params": {},
-        },
-        "player": {
-            "class": "auto_player.player.CunstuctorPlayer",
-            "params": {
-                "base": ["echo"],
-                "video_file_wrapper": ["{episode.video_file}"],
-                "audio_file_wrapper": ["{episode.audio_file}"],
-                "subtitles_file_wrapper": ["{episode.subtitles_file}"],
-                "appendix": [],
-            },
-        },
-    }
-    with open(path, "w") as file:
+def app(config_file, tmpdir) -> AutoPlayer:
+    with tmpdir.as_cwd():
+        app = create_auto_player(config_path=config_file)
+        for name in ["Breaking Bad", "Better Call Saul", "Bleach"]:
+            show = app.add_show(
+                name=name, test=True, video_dir=str(tmpdir), video_regex=".+"
+            )
+            app.state.add_show(show.show)
+    return app
+
+
+def test_get_show_by_prefix(app):
+    assert app.get_show("Blea").show.name == "Bleach"
+    assert app.get_show("Breaking Bad").show.name == "Breaking Bad"
+    assert app.get_show("2").show.name == "Better Call Saul"
+    assert app.get_show("B").msg.startswith("Ambiguous show name")
+    assert app.find_show_names("B") == ["Better Call Saul", "Bleach", "Breaking Bad"]
+    assert isinstance(app.get_show("Dexter"), Error)
+
+
+def test_show_index_follows_deletions(app):
+    app.state.remove_show(app.get_show("Bleach").show)
+    assert isinstance(app.get_show("Bleach"), Error)
+    assert app.get_show("Bl").msg == "No such show"
+
+
+def test_show_lengths_keep_order_and_time_out(app, monkeypatch):
+    release = threading.Event()
+    slow_show = app.get_show("Better Call Saul").show
+    monkeypatch.setattr(
+        type(slow_show),
+        "__len__",
+        lambda show: release.wait() and 0 if show is slow_show else 5,
+    )
+    try:
+        lengths = list(app.show_lengths(jobs=2, timeout=0.2))
+    finally:
+        release.set()
+    assert [show.name for show, _ in lengths] == [
+        "Breaking Bad",
+        "Better Call Saul",
+        "Bleach",
+    ]
+    assert lengths[0][1] == 5 and lengths[2][1] == 5
+    assert isinstance(lengths[1][1], Error)
+
+
+def test_daemon_workers_replace_a_stuck_worker():
+    release = threading.Event()
+    workers = DaemonWorkers(
+        lambda item: release.wait() if item == 0 else item, [0, 1], 1
+    )
+    try:
+        with pytest.raises(TimeoutError):
+            workers.result(0, timeout=0.2)
+        results = []
+        waiter = threading.Thread(
+            target=lambda: results.append(workers.result(1, timeout=0.5)), daemon=True
+        )
+        waiter.start()
+        waiter.join(timeout=5)
+        assert results == [1]
+    finally:
+        release.set()
+
+
+def test_play_continuous_plays_remaining_episodes(config_file, tmpdir, monkeypatch):
+    for name in ["e1.mkv", "e2.mkv", "e3.mkv"]:
+        tmpdir.join(name).write("")
+    monkeypatch.chdir(tmpdir)
+    app = create_auto_player(config_path=config_file)
+    show = app.add_show(name="show", video_dir=".", video_regex=r".+\.mkv", watched=1)
+    played = []
+    monkeypatch.setattr(
+        app.player,
+        "play",
+        lambda episode_set: played.append(episode_set.video_file) or PlayStatus(),
+    )
+    announced = []
+    assert show.play_continuous(on_episode=announced.append) is None
+    assert announced == [2, 3]
+    assert [str(path) for path in played] == ["e2.mkv", "e3.mkv"]
+    assert (
+        create_auto_player(config_path=config_file).get_show("show").show.counter == 3
+    )
+
+
+def test_play_continuous_reports_failed_saves(config_file, tmpdir, monkeypatch):
+    for name in ["e1.mkv", "e2.mkv", "e3.mkv"]:
+        tmpdir.join(name).write("")
+    monkeypatch.chdir(tmpdir)
+    app = create_auto_player(config_path=config_file)
+    show = app.add_show(name="show", video_dir=".", video_regex=r".+\.mkv")
+    played = []
+    monkeypatch.setattr(
+        app.player,
+        "play",
+        lambda episode_set: played.append(episode_set.video_file) or PlayStatus(),
+    )
+
+    def save(state):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(app.backend, "save", save)
+    monkeypatch.setattr(app.backend, "save_shows", lambda state, positions: save(state))
+    rezult = show.play_continuous()
+    assert isinstance(rezult, Error)
+    assert rezult.msg == "Failed to save state: No space left on device"
+    assert len(played) == 2
+
+
+def write_behind_config(config_file, write_behind):
+    with open(config_file) as file:
+        config = json.load(file)
+    config["write_behind"] = write_behind
+    with open(config_file, "w") as file:
         json.dump(config, file)
-    return path
 
 
-def test_app_creation(config_file):
+def record_saves(monkeypatch):
+    saves = []
+    original_save = LocalfileBackend.save
+
+    def save(backend, state):
+        saves.append([show.name for show in state.shows])
+        original_save(backend, state)
+
+    monkeypatch.setattr(LocalfileBackend, "save", save)
+    return saves
+
+
+def test_write_behind_flushes_once(config_file, tmpdir, monkeypatch):
+    write_behind_config(config_file, {})
+    monkeypatch.chdir(tmpdir)
+    saves = record_saves(monkeypatch)
     app = create_auto_player(config_path=config_file)
-    assert app is not None
-    assert isinstance(app, AutoPlayer)
+    for name in ["Bleach", "Naruto"]:
+        app.add_show(name=name, video_dir=".", video_regex=".+")
+    app.get_show("Bleach").edit(watched=1)
+    assert saves == []
+
+    app.flush_state()
+    app.flush_state()
+    assert saves == [["Bleach", "Naruto"]]
+    reloaded = create_auto_player(config_path=config_file)
+    assert reloaded.get_show("Bleach").show.counter == 1
+
+
+def test_write_behind_debounces(config_file, tmpdir, monkeypatch):
+    write_behind_config(config_file, {"delay": 0.05})
+    monkeypatch.chdir(tmpdir)
+    saves = record_saves(monkeypatch)
+    app = create_auto_player(config_path=config_file)
+    app.add_show(name="Bleach", video_dir=".", video_regex=".+")
+    deadline = time.monotonic() + 5
+    while not saves and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert saves == [["Bleach"]]
+
+
+def test_unchanged_state_is_not_saved(config_file, tmpdir, monkeypatch):
+    monkeypatch.chdir(tmpdir)
+    app = create_auto_player(config_path=config_file)
+    app.add_show(name="Bleach", video_dir=".", video_regex=".+")
+    saves = record_saves(monkeypatch)
+    app.save_state()
+    assert saves == []
+    app.get_show("Bleach").show.set_counter(1)
+    app.save_state()
+    assert saves == [["Bleach"]]
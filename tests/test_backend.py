@@ -0,0 +1,232 @@
+import os
+import re
+
+import pytest
+
+from auto_player.backend.compactbackend import CompactBackend
+from auto_player.backend.journalbackend import (
+    COUNTER,
+    JOURNAL_MAGIC,
+    RECORD_HEADER,
+    SNAPSHOT,
+    JournalBackend,
+)
+from auto_player.backend.localfilebackend import LocalfileBackend
+from auto_player.backend.sqlitebackend import SqliteBackend
+from auto_player.file_group import FilesGroupType
+from auto_player.file_group.regex_file_group import RegexFileGroup
+from auto_player.show import Show
+from auto_player.show.alignment import EpisodeAlignment
+from auto_player.show.statefull import StatefullShowWrapper
+from auto_player.state import State
+
+
+def make_show(name: str, directory, counter: int = 0) -> StatefullShowWrapper:
+    video_group = RegexFileGroup(
+        group_type=FilesGroupType.VIDEO, directory=directory, regex=re.compile(".+")
+    )
+    return StatefullShowWrapper(
+        show=Show(name=name, video_group=video_group), counter=counter
+    )
+
+
+@pytest.fixture
+def state(tmp_path) -> State:
+    return State(shows=[make_show(f"show {i}", tmp_path, i) for i in range(3)])
+
+
+@pytest.fixture
+def sqlite_backend(tmp_path, monkeypatch) -> SqliteBackend:
+    monkeypatch.chdir(tmp_path)
+    return SqliteBackend(session="default")
+
+
+def test_sqlite_backend_round_trip(sqlite_backend, state):
+    sqlite_backend.save(state)
+    loaded = SqliteBackend(session="default").load()
+    assert [show.name for show in loaded.shows] == ["show 0", "show 1", "show 2"]
+    assert [show.counter for show in loaded.shows] == [0, 1, 2]
+    assert SqliteBackend(session="other").load().is_empty()
+
+
+def test_sqlite_backend_decodes_lazily(sqlite_backend, state):
+    sqlite_backend.save(state)
+    loaded = SqliteBackend(session="default").load()
+    show = loaded.get_show_by_name("show 2")
+    assert show is not None and show.counter == 2
+    assert [loaded.shows.is_decoded(i) for i in range(3)] == [False, False, True]
+
+
+def test_sqlite_backend_writes_only_changed_rows(sqlite_backend, state):
+    sqlite_backend.save(state)
+    backend = SqliteBackend(session="default")
+    loaded = backend.load()
+    connection = backend._connect()
+    changes = connection.total_changes
+
+    loaded.get_show_by_number(2).counter += 1
+    backend.save(loaded)
+    assert connection.total_changes - changes == 1
+
+    loaded.shows.remove(loaded.get_show_by_number(1))
+    backend.save(loaded)
+    reloaded = SqliteBackend(session="default").load()
+    assert [(show.name, show.counter) for show in reloaded.shows] == [
+        ("show 1", 2),
+        ("show 2", 2),
+    ]
+
+
+def test_sqlite_backend_migrates_localfile(sqlite_backend, state):
+    LocalfileBackend(session="default").save(state)
+    loaded = sqlite_backend.load()
+    assert [show.name for show in loaded.shows] == ["show 0", "show 1", "show 2"]
+
+    loaded.shows.clear()
+    sqlite_backend.save(loaded)
+    assert SqliteBackend(session="default").load().is_empty()
+
+
+def test_sqlite_backend_saves_only_given_shows(sqlite_backend, state):
+    sqlite_backend.save(state)
+    backend = SqliteBackend(session="default")
+    loaded = backend.load()
+    connection = backend._connect()
+    changes = connection.total_changes
+
+    loaded.shows[0].counter = 7
+    loaded.shows[2].counter = 9
+    backend.save_shows(loaded, [2])
+    assert connection.total_changes - changes == 1
+    reloaded = SqliteBackend(session="default").load()
+    assert [show.counter for show in reloaded.shows] == [0, 1, 9]
+
+
+@pytest.fixture
+def journal_backend(tmp_path, monkeypatch) -> JournalBackend:
+    monkeypatch.chdir(tmp_path)
+    return JournalBackend(session="default")
+
+
+def test_journal_backend_appends_small_records(journal_backend, state, tmp_path):
+    journal_backend.load()
+    journal_backend.save(state)
+    size = os.path.getsize(journal_backend._get_filename())
+
+    state.shows[0].counter = 5
+    state.shows.remove(state.shows[1])
+    state.shows.append(make_show("show 3", tmp_path))
+    journal_backend.save(state)
+    assert os.path.getsize(journal_backend._get_filename()) - size < size
+
+    loaded = JournalBackend(session="default").load()
+    assert [(show.name, show.counter) for show in loaded.shows] == [
+        ("show 0", 5),
+        ("show 2", 2),
+        ("show 3", 0),
+    ]
+
+
+def test_journal_backend_ignores_torn_tail(journal_backend, state):
+    journal_backend.load()
+    journal_backend.save(state)
+    state.shows[2].counter = 7
+    journal_backend.save(state)
+    with open(journal_backend._get_filename(), "ab") as file:
+        file.write(b"\x04\x00\x00")
+
+    backend = JournalBackend(session="default")
+    loaded = backend.load()
+    assert loaded.shows[2].counter == 7
+    loaded.shows[2].counter = 8
+    backend.save(loaded)
+    assert JournalBackend(session="default").load().shows[2].counter == 8
+
+
+@pytest.mark.parametrize("partial", [False, True])
+def test_journal_backend_keeps_alignment_edits(journal_backend, state, partial):
+    journal_backend.load()
+    journal_backend.save(state)
+    backend = JournalBackend(session="default")
+    loaded = backend.load()
+    loaded.shows[1].show.alignment = EpisodeAlignment()
+    if partial:
+        backend.save_shows(loaded, [1])
+    else:
+        backend.save(loaded)
+    reloaded = JournalBackend(session="default").load()
+    assert reloaded.shows[1].show.alignment == EpisodeAlignment()
+    assert reloaded.shows[0].show.alignment is None
+
+
+def test_journal_backend_compacts(journal_backend, state):
+    journal_backend.compact_threshold = 0
+    journal_backend.load()
+    journal_backend.save(state)
+    for counter in range(3):
+        state.shows[0].counter = counter + 10
+        journal_backend.save(state)
+    with open(journal_backend._get_filename(), "rb") as file:
+        data = file.read()
+    assert data.count(JOURNAL_MAGIC) == 1
+    assert data[len(JOURNAL_MAGIC)] == SNAPSHOT
+    assert JournalBackend(session="default").load().shows[0].counter == 12
+
+
+@pytest.fixture
+def compact_backend(tmp_path, monkeypatch) -> CompactBackend:
+    monkeypatch.chdir(tmp_path)
+    return CompactBackend(session="default")
+
+
+def test_compact_backend_round_trip(compact_backend, state):
+    compact_backend.save(state)
+    loaded = CompactBackend(session="default").load()
+    assert [(show.name, show.counter) for show in loaded.shows] == [
+        ("show 0", 0),
+        ("show 1", 1),
+        ("show 2", 2),
+    ]
+    assert loaded.shows[0].video_group.regex.pattern == ".+"
+
+
+def test_compact_backend_decodes_lazily(compact_backend, state):
+    compact_backend.save(state)
+    loaded = CompactBackend(session="default").load()
+    assert loaded.get_show_by_name("show 1").counter == 1
+    assert [loaded.shows.is_decoded(i) for i in range(3)] == [False, True, False]
+
+    loaded.shows[1].counter = 4
+    compact_backend.save(loaded)
+    reloaded = CompactBackend(session="default").load()
+    assert [show.counter for show in reloaded.shows] == [0, 4, 2]
+
+
+def test_compact_backend_converts_localfile(compact_backend, state):
+    LocalfileBackend(session="default").save(state)
+    assert len(compact_backend.load().shows) == 3
+    assert os.path.exists(compact_backend._get_filename())
+
+    compact_backend.save(State())
+    assert CompactBackend(session="default").load().is_empty()
+
+
+def test_compact_backend_keeps_alignment(compact_backend, state):
+    alignment = EpisodeAlignment(regex=re.compile(r"(\d+)", re.IGNORECASE))
+    state.shows[0].show.alignment = alignment
+    compact_backend.save(state)
+    assert compact_backend.load().shows[0].show.alignment == alignment
+
+
+def test_journal_backend_appends_given_shows(journal_backend, state):
+    journal_backend.load()
+    journal_backend.save(state)
+    size = os.path.getsize(journal_backend._get_filename())
+
+    state.shows[1].counter = 4
+    journal_backend.save_shows(state, [1])
+    appended = os.path.getsize(journal_backend._get_filename()) - size
+    assert appended == RECORD_HEADER.size + COUNTER.size
+
+    loaded = JournalBackend(session="default").load()
+    assert [show.counter for show in loaded.shows] == [0, 4, 2]
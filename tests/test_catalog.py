@@ -0,0 +1,108 @@
+import json
+import shutil
+
+import pytest
+from click.testing import CliRunner
+
+from auto_player.app import Error, create_auto_player, reindex
+from auto_player.catalog import Catalog, CatalogShow, CatalogSource, set_catalog
+from auto_player.cli import cli
+
+
+@pytest.fixture
+def config_path(tmp_path):
+    path = tmp_path / "config.json"
+    config = {
+        "scan_cache": None,
+        "catalog": {"path": str(tmp_path / "catalog.sqlite3")},
+    }
+    path.write_text(json.dumps(config))
+    yield str(path)
+    set_catalog(None)
+
+
+def make_library(root, names, episodes=3):
+    root.mkdir()
+    for name in names:
+        for episode in range(1, episodes + 1):
+            (root / f"{name} - {episode:02}.mkv").touch()
+
+
+def add_shows(config_path, directory, names, monkeypatch):
+    monkeypatch.chdir(directory)
+    app = create_auto_player(config_path=config_path)
+    for name in names:
+        app.add_show(name=name, video_dir=".", video_regex=f"{name} - .+")
+    return app
+
+
+def test_save_registers_directory_in_catalog(config_path, tmp_path, monkeypatch):
+    make_library(tmp_path / "anime", ["Bleach", "Naruto"])
+    make_library(tmp_path / "series", ["Dexter"])
+    app = add_shows(config_path, tmp_path / "anime", ["Bleach", "Naruto"], monkeypatch)
+    add_shows(config_path, tmp_path / "series", ["Dexter"], monkeypatch)
+
+    monkeypatch.chdir(tmp_path / "anime")
+    show = app.get_show("Bleach")
+    assert show.play() is None
+
+    entries = app.search_catalog()
+    assert [(entry.name, entry.counter, entry.length) for entry in entries] == [
+        ("Bleach", 1, 3),
+        ("Naruto", 0, None),
+        ("Dexter", 0, None),
+    ]
+    assert entries[0].directory == str(tmp_path / "anime")
+    assert [entry.name for entry in app.search_catalog("ru")] == ["Naruto"]
+
+
+def test_update_keeps_values_of_untouched_shows(tmp_path):
+    catalog = Catalog(str(tmp_path / "catalog.sqlite3"))
+    source = CatalogSource("/library", "default", backend="compact")
+    catalog.update(source, [CatalogShow("Bleach", 5, 10), CatalogShow("Naruto", 1)])
+    catalog.update(source, [CatalogShow("Naruto", 2, 7), CatalogShow("Bleach")])
+    entries = catalog.search()
+    assert [(entry.name, entry.counter, entry.length) for entry in entries] == [
+        ("Naruto", 2, 7),
+        ("Bleach", 5, 10),
+    ]
+    assert catalog.search("100%") == []
+    catalog.update(source, [])
+    assert catalog.sources() == [] and catalog.search() == []
+
+
+def test_reindex_builds_missing_catalog(config_path, tmp_path, monkeypatch):
+    make_library(tmp_path / "anime", ["Bleach"], episodes=4)
+    make_library(tmp_path / "series", ["Dexter"], episodes=2)
+    add_shows(config_path, tmp_path / "anime", ["Bleach"], monkeypatch)
+    add_shows(config_path, tmp_path / "series", ["Dexter"], monkeypatch)
+    catalog = Catalog(str(tmp_path / "rebuilt.sqlite3"))
+    sources = [
+        CatalogSource(str(tmp_path / directory), "default", backend="")
+        for directory in ("anime", "series")
+    ]
+
+    results = list(reindex(config_path, catalog, sources, jobs=2))
+    assert [rezult for _, rezult in results] == [1, 1]
+    assert [(entry.name, entry.length) for entry in catalog.search()] == [
+        ("Bleach", 4),
+        ("Dexter", 2),
+    ]
+
+    results = list(reindex(config_path, catalog, catalog.sources(), jobs=2))
+    assert [rezult for _, rezult in results] == [None, None]
+
+    monkeypatch.chdir(tmp_path)
+    shutil.rmtree(tmp_path / "series")
+    results = list(reindex(config_path, catalog, catalog.sources(), jobs=2))
+    assert isinstance(results[1][1], Error)
+    assert [entry.name for entry in catalog.search()] == ["Bleach"]
+
+
+def test_list_all_prints_catalog(config_path, tmp_path, monkeypatch):
+    make_library(tmp_path / "anime", ["Bleach"])
+    add_shows(config_path, tmp_path / "anime", ["Bleach"], monkeypatch)
+    monkeypatch.chdir(tmp_path)
+    result = CliRunner().invoke(cli, ["--config", config_path, "list", "--all"])
+    assert result.exit_code == 0
+    assert result.output == f"{tmp_path / 'anime'} [default]\n  1. Bleach [0/?]\n"
@@ -0,0 +1,68 @@
+import json
+import os
+
+import pytest
+from click.testing import CliRunner
+
+from auto_player.app.config import DEFAULT_CONFIG, ConfigError, load_config
+from auto_player.cli import cli
+from auto_player.player import CunstuctorPlayer, EnvironmentPlayer
+
+
+def write_config(path, config):
+    path.write_text(json.dumps(config))
+    stat = os.stat(path)
+    # Rewrites within one clock tick must still look like a new file.
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+    return str(path)
+
+
+def test_config_deep_merges_defaults(tmp_path):
+    path = write_config(
+        tmp_path / "config.json", {"player": {"params": {"base": ["mpv"]}}}
+    )
+    config = load_config(path)
+    assert config.player_class is CunstuctorPlayer
+    assert config.player_params["base"] == ["mpv"]
+    assert config.player_params["appendix"] == []
+    assert config.data["scan_cache"] == DEFAULT_CONFIG["scan_cache"]
+
+
+def test_other_class_does_not_inherit_default_params(tmp_path):
+    player = {"class": "auto_player.player.EnvironmentPlayer"}
+    config = load_config(write_config(tmp_path / "config.json", {"player": player}))
+    assert config.player_class is EnvironmentPlayer
+    assert config.player_params == {}
+
+
+def test_config_snapshot_is_reused_until_file_changes(tmp_path):
+    path = write_config(tmp_path / "config.json", {})
+    config = load_config(path)
+    assert load_config(path) is config
+    write_config(tmp_path / "config.json", {"scan_cache": None})
+    assert load_config(path).data["scan_cache"] is None
+
+
+@pytest.mark.parametrize(
+    "config, location",
+    [
+        ({"backend": {"class": "auto_player.missing.Backend"}}, "backend.class"),
+        ({"backend": {"class": "auto_player.player.Player"}}, "backend.class"),
+        ({"player": {"params": {"bass": ["mpv"]}}}, "player.params"),
+        ({"scan_cache": {"path": "x", "max_entries": "10"}}, "scan_cache.max_entries"),
+        ({"metrics": {"textfile": "a", "socket": "b"}}, "metrics"),
+        ({"metrics": {"file": "a"}}, "metrics"),
+    ],
+)
+def test_config_errors_name_the_location(config, location, tmp_path):
+    path = write_config(tmp_path / "config.json", config)
+    with pytest.raises(ConfigError) as error:
+        load_config(path)
+    assert error.value.location == f"{path}: {location}"
+
+
+def test_cli_reports_config_error(tmp_path):
+    path = write_config(tmp_path / "config.json", {"backend": []})
+    result = CliRunner().invoke(cli, ["--config", path, "list"])
+    assert result.exit_code == 1
+    assert f"{path}: backend: expected an object" in result.output
@@ -0,0 +1,76 @@
+import threading
+
+import pytest
+
+from auto_player.app import create_auto_player
+from auto_player.client import can_forward, find_command, forward
+from auto_player.daemon import DaemonServer
+
+
+@pytest.fixture
+def daemon(tmp_path, monkeypatch):
+    work_directory = tmp_path / "shows"
+    work_directory.mkdir()
+    monkeypatch.chdir(work_directory)
+    socket_path = str(tmp_path / "daemon.sock")
+    server = DaemonServer(socket_path)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield socket_path
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def test_find_command_skips_global_options():
+    assert find_command(["--config", "list", "info"]) == "info"
+    assert find_command(["--session", "x", "list"]) == "list"
+    assert find_command(["--help"]) is None
+
+
+def test_can_forward_only_read_commands():
+    assert can_forward(["list"])
+    assert can_forward(["info", "--full", "2"])
+    assert not can_forward(["play"])
+    assert not can_forward(["list", "--help"])
+    assert not can_forward(["--profile", "list"])
+
+
+def test_forward_without_daemon(tmp_path):
+    assert forward(["list"], str(tmp_path / "missing.sock")) is None
+
+
+def test_daemon_serves_list_and_info(daemon, config_file):
+    exit_code, output = forward(["--config", str(config_file), "list"], daemon)
+    assert exit_code == 0
+    assert output == ""
+
+    exit_code, output = forward(["--config", str(config_file), "info"], daemon)
+    assert exit_code == 1
+    assert output == "Error: No such show\n"
+
+
+def test_daemon_refuses_other_commands(daemon, config_file):
+    exit_code, output = forward(["--config", str(config_file), "play"], daemon)
+    assert exit_code == 1
+    assert "not served" in output
+
+
+def test_daemon_watcher_ignores_request_cwd(daemon, config_file, tmp_path, monkeypatch):
+    directories = [tmp_path / "a", tmp_path / "b"]
+    for directory in directories:
+        directory.mkdir()
+        (directory / "e1.mkv").touch()
+        monkeypatch.chdir(directory)
+        app = create_auto_player(config_path=str(config_file))
+        app.add_show(name="Show", video_dir=".", video_regex=r".+\.mkv")
+    config = ["--config", str(config_file)]
+    for directory in directories:
+        monkeypatch.chdir(directory)
+        assert forward(config + ["list"], daemon) == (0, "1. Show [0/1]\n")
+
+    (directories[0] / "e2.mkv").touch()
+    # The watcher reports the new file while the daemon is in the other cwd.
+    assert forward(config + ["list"], daemon) == (0, "1. Show [0/1]\n")
+    monkeypatch.chdir(directories[0])
+    assert forward(config + ["list"], daemon) == (0, "1. Show [0/2]\n")
@@ -0,0 +1,223 @@
+import os
+import pickle
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from auto_player.file_group import FilesGroupType, scanner
+from auto_player.file_group.packed import PackedPaths
+from auto_player.file_group.regex_file_group import RegexFileGroup
+from auto_player.file_group.scan_cache import ScanCache, get_scan_cache, set_scan_cache
+
+
+@pytest.fixture
+def show_directory(tmp_path) -> Path:
+    for name in ["ep3.mkv", "ep1.mkv", "ep2.mkv", "ep1.srt"]:
+        (tmp_path / name).touch()
+    (tmp_path / "extras.mkv").mkdir()
+    return tmp_path
+
+
+def bump_mtime(directory):
+    stat = os.stat(directory)
+    os.utime(directory, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+
+
+@pytest.fixture
+def video_group(show_directory) -> RegexFileGroup:
+    return RegexFileGroup(
+        group_type=FilesGroupType.VIDEO,
+        directory=show_directory,
+        regex=re.compile(r".+\.mkv"),
+    )
+
+
+def test_regex_file_group_is_sorted(video_group, show_directory):
+    assert [*video_group] == [show_directory / f"ep{i}.mkv" for i in (1, 2, 3)]
+    assert len(video_group) == 3
+    assert video_group[1] == show_directory / "ep2.mkv"
+
+
+def test_regex_file_group_reuses_snapshot(video_group, monkeypatch):
+    len(video_group)
+    calls = []
+    monkeypatch.setattr(video_group, "_scan", lambda _: calls.append(1) or [])
+    video_group[0]
+    len(video_group)
+    assert calls == []
+
+
+def test_regex_file_group_invalidates_on_directory_change(video_group, show_directory):
+    assert len(video_group) == 3
+    (show_directory / "ep4.mkv").touch()
+    bump_mtime(show_directory)
+    assert len(video_group) == 4
+    assert video_group[-1] == show_directory / "ep4.mkv"
+
+
+def test_regex_file_group_pickle_drops_snapshot(video_group):
+    len(video_group)
+    restored = pickle.loads(pickle.dumps(video_group))
+    assert restored._snapshot_key is None
+    assert len(restored) == 3
+
+
+def test_scan_cache_round_trip(video_group, tmp_path_factory, monkeypatch):
+    cache_path = str(tmp_path_factory.mktemp("cache") / "scan_cache")
+    set_scan_cache(ScanCache(cache_path))
+    try:
+        len(video_group)
+        get_scan_cache().save()
+
+        set_scan_cache(ScanCache(cache_path))
+        fresh_group = pickle.loads(pickle.dumps(video_group))
+        monkeypatch.setattr(fresh_group, "_scan", lambda _: pytest.fail("rescanned"))
+        assert len(fresh_group) == 3
+    finally:
+        set_scan_cache(None)
+
+
+def test_scan_cache_evicts_least_recently_used(tmp_path):
+    cache = ScanCache(str(tmp_path / "scan_cache"), max_entries=2)
+    cache.put("a", "regex:x", (1, 1), ["a1"])
+    cache.put("b", "regex:x", (1, 1), ["b1"])
+    cache.get("a", "regex:x", (1, 1))
+    cache.put("c", "regex:x", (1, 1), ["c1"])
+    assert cache.get("a", "regex:x", (1, 1)) == ["a1"]
+    assert cache.get("b", "regex:x", (1, 1)) is None
+    assert cache.get("a", "regex:x", (2, 1)) is None
+
+
+def test_groups_in_one_directory_share_a_scan(show_directory, monkeypatch):
+    listed = []
+    list_files = scanner.list_files
+
+    def counting_list_files(directory):
+        listed.append(directory)
+        return list_files(directory)
+
+    monkeypatch.setattr(scanner, "list_files", counting_list_files)
+    video_group = RegexFileGroup(
+        group_type=FilesGroupType.VIDEO,
+        directory=show_directory,
+        regex=re.compile(r".+\.mkv"),
+    )
+    subtitles_group = RegexFileGroup(
+        group_type=FilesGroupType.SUBTITLES,
+        directory=show_directory,
+        regex=re.compile(r".+\.srt"),
+    )
+    assert len(video_group) == 3
+    assert [path.name for path in subtitles_group] == ["ep1.srt"]
+    assert listed == [str(show_directory)]
+
+
+@pytest.mark.parametrize(
+    "order, expected",
+    [
+        ("name", ["Another - 03.mkv", "Ep1.mkv", "Ep10.mkv", "Ep2.mkv"]),
+        ("natural", ["Another - 03.mkv", "Ep1.mkv", "Ep2.mkv", "Ep10.mkv"]),
+        ("episode", ["Ep1.mkv", "Ep2.mkv", "Another - 03.mkv", "Ep10.mkv"]),
+    ],
+)
+def test_regex_file_group_orders(order, expected, tmp_path):
+    for name in ["Ep10.mkv", "Ep2.mkv", "Ep1.mkv", "Another - 03.mkv"]:
+        (tmp_path / name).touch()
+    group = RegexFileGroup(
+        group_type=FilesGroupType.VIDEO,
+        directory=tmp_path,
+        regex=re.compile(r".+\.mkv"),
+        order=order,
+    )
+    assert [path.name for path in group] == expected
+
+
+def test_episode_order_ignores_resolution_tags(tmp_path):
+    names = ["Show - 10 (1280x720).mkv", "Show - 2 [1920x1080].mkv", "Show - 1.mkv"]
+    for name in names:
+        (tmp_path / name).touch()
+    group = RegexFileGroup(
+        group_type=FilesGroupType.VIDEO,
+        directory=tmp_path,
+        regex=re.compile(r".+\.mkv"),
+        order="episode",
+    )
+    assert [path.name for path in group] == names[::-1]
+
+
+def test_regex_file_group_orders_by_mtime(tmp_path):
+    for mtime, name in enumerate(["b.mkv", "c.mkv", "a.mkv"]):
+        (tmp_path / name).touch()
+        os.utime(tmp_path / name, ns=(0, mtime))
+    group = RegexFileGroup(
+        group_type=FilesGroupType.VIDEO,
+        directory=tmp_path,
+        regex=re.compile(r".+\.mkv"),
+        order="mtime",
+    )
+    assert [path.name for path in group] == ["b.mkv", "c.mkv", "a.mkv"]
+
+
+def test_sort_keys_are_computed_once(tmp_path, monkeypatch):
+    for name in ["ep1.mkv", "ep2.mkv"]:
+        (tmp_path / name).touch()
+    group = RegexFileGroup(
+        group_type=FilesGroupType.VIDEO,
+        directory=tmp_path,
+        regex=re.compile(r".+\.mkv"),
+        order="natural",
+    )
+    keyed = []
+    key = group._sort_keys.ordering.key
+    monkeypatch.setattr(
+        group._sort_keys.ordering,
+        "key",
+        lambda path: keyed.append(path.name) or key(path),
+    )
+    len(group)
+    (tmp_path / "ep10.mkv").touch()
+    bump_mtime(tmp_path)
+    assert [path.name for path in group] == ["ep1.mkv", "ep2.mkv", "ep10.mkv"]
+    assert sorted(keyed) == ["ep1.mkv", "ep10.mkv", "ep2.mkv"]
+
+
+def test_packed_paths_build_paths_on_access(tmp_path):
+    names = ["ep1.mkv", "épisode 2.mkv", os.fsdecode(b"ep3-\xff.mkv")]
+    packed = PackedPaths(tmp_path, names)
+    assert len(packed) == 3
+    assert packed[1] == tmp_path / "épisode 2.mkv"
+    assert packed[-1].name == names[2]
+    assert packed[1:] == [tmp_path / name for name in names[1:]]
+    assert list(packed.names()) == names
+    assert packed == [tmp_path / name for name in names]
+    assert PackedPaths(tmp_path) == []
+    with pytest.raises(IndexError):
+        packed[3]
+
+
+def test_regex_file_group_keeps_names_packed(video_group, show_directory):
+    files = video_group.files()
+    assert isinstance(files, PackedPaths)
+    assert files.directory == show_directory
+    assert list(files.names()) == ["ep1.mkv", "ep2.mkv", "ep3.mkv"]
+
+
+def test_file_group_does_not_import_show():
+    code = (
+        "import sys, auto_player.file_group.ordering, "
+        "auto_player.file_group.recursive_file_group, "
+        "auto_player.file_group.regex_file_group; "
+        "print(sorted(m for m in sys.modules if m.startswith('auto_player.show')))"
+    )
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=env,
+    ).stdout
+    assert output == "[]\n"
@@ -0,0 +1,121 @@
+import threading
+
+import pytest
+
+from auto_player.backend.httpbackend import HttpBackend
+from auto_player.backend.httpserver import SyncRequestHandler, SyncServer, SyncStore
+from auto_player.state import State
+
+from .test_backend import make_show
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = SyncServer(("127.0.0.1", 0), SyncStore())
+    server.requests = []
+    server.connections = 0
+    original_log_request = SyncRequestHandler.log_request
+    original_setup = SyncRequestHandler.setup
+
+    def log_request(handler, code="-", size="-"):
+        handler.server.requests.append((handler.command, int(code)))
+        original_log_request(handler, code, size)
+
+    def setup(handler):
+        handler.server.connections += 1
+        original_setup(handler)
+
+    monkeypatch.setattr(SyncRequestHandler, "log_request", log_request)
+    monkeypatch.setattr(SyncRequestHandler, "setup", setup)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_backend(server, tmp_path, name="laptop", **params) -> HttpBackend:
+    host, port = server.server_address
+    return HttpBackend(
+        session="default",
+        url=f"http://{host}:{port}",
+        cache_path=str(tmp_path / f"{name}.json"),
+        **params,
+    )
+
+
+def test_state_is_shared_between_clients(server, tmp_path):
+    laptop = make_backend(server, tmp_path, cache_ttl=0)
+    state = laptop.load()
+    assert len(state.shows) == 0
+    state.add_show(make_show("Bleach", tmp_path, 1))
+    state.add_show(make_show("Naruto", tmp_path, 2))
+    laptop.save(state)
+
+    box = make_backend(server, tmp_path, name="box", cache_ttl=0)
+    shows = box.load().shows
+    assert [shows.name(index) for index in range(2)] == ["Bleach", "Naruto"]
+    assert shows[1].counter == 2
+    assert shows[1].video_group.directory == tmp_path
+
+
+def test_counter_updates_are_coalesced(server, tmp_path):
+    backend = make_backend(server, tmp_path, batch_delay=60)
+    state = State(shows=[make_show(f"show {i}", tmp_path) for i in range(3)])
+    backend.save(state)
+    state = backend.load()
+    for counter in (1, 2, 3):
+        state.shows[0].set_counter(counter)
+        state.shows[2].set_counter(counter)
+        backend.save(state)
+    backend.flush()
+    assert server.requests == [("PUT", 200), ("POST", 200)]
+    assert server.connections == 1
+    _, shows = server.store.get("default")
+    assert [show["counter"] for show in shows] == [3, 0, 3]
+
+
+def test_conditional_load_uses_cache(server, tmp_path):
+    backend = make_backend(server, tmp_path, cache_ttl=0)
+    backend.save(State(shows=[make_show("Bleach", tmp_path)]))
+    assert backend.load().shows.name(0) == "Bleach"
+    assert server.requests == [("PUT", 200), ("GET", 304)]
+
+    fresh_backend = make_backend(server, tmp_path)
+    assert fresh_backend.load().shows.name(0) == "Bleach"
+    assert len(server.requests) == 2
+
+
+def test_concurrent_edit_is_rejected(server, tmp_path):
+    laptop = make_backend(server, tmp_path, cache_ttl=0)
+    box = make_backend(server, tmp_path, name="box", cache_ttl=0)
+    laptop.save(State(shows=[make_show("Bleach", tmp_path)]))
+    laptop_state = laptop.load()
+    box_state = box.load()
+    laptop_state.add_show(make_show("Naruto", tmp_path))
+    laptop.save(laptop_state)
+    box_state.add_show(make_show("Dexter", tmp_path))
+    with pytest.raises(Exception, match="changed on the sync server"):
+        box.save(box_state)
+    shows = box.load().shows
+    assert [shows.name(index) for index in range(len(shows))] == ["Bleach", "Naruto"]
+
+
+def test_flushed_counters_update_cached_etag(server, tmp_path):
+    backend = make_backend(server, tmp_path, batch_delay=60)
+    backend.save(State(shows=[make_show("Bleach", tmp_path)]))
+    state = backend.load()
+    state.shows[0].set_counter(4)
+    backend.save(state)
+    backend.flush()
+
+    # A later process trusts the fresh cache, its ETag must be current.
+    next_backend = make_backend(server, tmp_path, batch_delay=60)
+    state = next_backend.load()
+    state.add_show(make_show("Naruto", tmp_path))
+    next_backend.save(state)
+    _, shows = server.store.get("default")
+    assert [(show["name"], show["counter"]) for show in shows] == [
+        ("Bleach", 4),
+        ("Naruto", 0),
+    ]
@@ -0,0 +1,108 @@
+import re
+
+import pytest
+from click.testing import CliRunner
+
+from auto_player.app import create_auto_player
+from auto_player.app.importer import discover_shows
+from auto_player.cli import cli
+from auto_player.file_group import FilesGroupType
+
+
+@pytest.fixture
+def library(tmp_path):
+    show = tmp_path / "Show"
+    (show / "Subs").mkdir(parents=True)
+    for number in [1, 2, 10]:
+        (show / f"Show {number}.mkv").touch()
+        (show / "Subs" / f"Show {number}.ass").touch()
+    for season in ["Season 10", "Season 2"]:
+        directory = tmp_path / "Other" / season
+        directory.mkdir(parents=True)
+        (directory / "01.mp4").touch()
+    (tmp_path / "Empty").mkdir()
+    return tmp_path
+
+
+REGEXES = {
+    FilesGroupType.VIDEO: re.compile(r".+\.(mkv|mp4)"),
+    FilesGroupType.AUDIO: re.compile(r".+\.mka"),
+    FilesGroupType.SUBTITLES: re.compile(r".+\.ass"),
+}
+
+
+def test_discover_shows(library):
+    progress = []
+    shows, errors = discover_shows(
+        library, REGEXES, on_progress=lambda d, s: progress.append((d, s))
+    )
+    assert errors == []
+    assert [show.name for show in shows] == [
+        "Other - Season 2",
+        "Other - Season 10",
+        "Show",
+    ]
+    show = shows[2]
+    assert len(show) == 3
+    assert show.audio_group is None
+    assert show.subtitles_group.directory == library / "Show" / "Subs"
+    assert progress[-1] == (6, 3)
+
+
+def test_import_shows(library, config_file, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    app = create_auto_player(config_path=str(config_file))
+    saves = []
+    save = app.backend.save
+    monkeypatch.setattr(app.backend, "save", lambda state: saves.append(save(state)))
+
+    result = app.import_shows(str(library), test=True, video_regex=r".+\.(mkv|mp4)")
+    assert len(result.added) == 3
+    assert app.state.shows == [] and saves == []
+
+    app.add_show(name="Show", video_dir=str(library / "Other"), video_regex=".+")
+    saves.clear()
+    result = app.import_shows(str(library), video_regex=r".+\.(mkv|mp4)")
+    assert [show.show.name for show in result.added] == [
+        "Other - Season 2",
+        "Other - Season 10",
+    ]
+    assert result.skipped == [("Show", "a show with that name exists")]
+    assert len(saves) == 1
+    assert len(app.state.shows) == 3
+
+
+def test_discover_shows_skips_directory_links(library):
+    (library / "Empty" / "loop").symlink_to("..")
+    (library / "Empty" / "parent").symlink_to(library.parent)
+    shows, errors = discover_shows(library, REGEXES)
+    assert errors == []
+    assert [show.name for show in shows] == [
+        "Other - Season 2",
+        "Other - Season 10",
+        "Show",
+    ]
+
+
+def test_import_skips_linked_show_directory(library, config_file, monkeypatch):
+    monkeypatch.chdir(library)
+    (library / "link").symlink_to(library / "Show")
+    app = create_auto_player(config_path=str(config_file))
+    app.add_show(name="Linked", video_dir="link", video_regex=r".+\.mkv")
+    result = app.import_shows(str(library), video_regex=r".+\.(mkv|mp4)")
+    assert [show.show.name for show in result.added] == [
+        "Other - Season 2",
+        "Other - Season 10",
+    ]
+    assert result.skipped == [("Show", "directory is already a show")]
+
+
+def test_info_of_imported_show_without_audio(library, config_file, monkeypatch):
+    monkeypatch.chdir(library)
+    runner = CliRunner()
+    config = ["--config", str(config_file)]
+    result = runner.invoke(cli, config + ["import", "--vx", r".+\.(mkv|mp4)", "."])
+    assert result.exit_code == 0, result.output
+    result = runner.invoke(cli, config + ["info", "--full", "Show"])
+    assert result.exit_code == 0, result.output
+    assert "Audio files:\n\tNone\n" in result.output
@@ -0,0 +1,114 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from auto_player.app import create_auto_player
+from auto_player.metrics import (
+    Metrics,
+    MetricsRecorder,
+    SocketSink,
+    TextfileSink,
+    count,
+    get_metrics_recorder,
+    set_metrics_recorder,
+    timed,
+)
+
+
+@pytest.fixture
+def recorder(tmp_path):
+    recorder = MetricsRecorder(TextfileSink(str(tmp_path / "auto_player.prom")))
+    set_metrics_recorder(recorder)
+    yield recorder
+    set_metrics_recorder(None)
+
+
+def test_metrics_are_no_ops_without_recorder():
+    assert get_metrics_recorder() is None
+    count("scans", directory="/")
+    with timed("scan_seconds"):
+        pass
+
+
+def test_openmetrics_exposition(recorder):
+    count("player_exits", code=0)
+    count("player_exits", code=0)
+    with timed("save_seconds", backend="localfile"):
+        pass
+    text = recorder.metrics.to_openmetrics()
+    assert "# TYPE auto_player_player_exits counter" in text
+    assert 'auto_player_player_exits_total{code="0"} 2' in text
+    assert 'auto_player_save_seconds_bucket{backend="localfile",le="+Inf"} 1' in text
+    assert text.endswith("# EOF\n")
+
+
+def test_textfile_sink_accumulates_runs(recorder, tmp_path):
+    for _ in range(2):
+        count("scans", directory="/shows")
+        recorder.flush()
+    text = (tmp_path / "auto_player.prom").read_text()
+    assert 'auto_player_scans_total{directory="/shows"} 2' in text
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_textfile_sink_without_fcntl(recorder, tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, "fcntl", None)
+    count("scans", directory="/shows")
+    recorder.flush()
+    text = (tmp_path / "auto_player.prom").read_text()
+    assert 'auto_player_scans_total{directory="/shows"} 1' in text
+
+
+def test_cli_imports_without_fcntl():
+    code = "import sys; sys.modules['fcntl'] = None; import auto_player.cli"
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    subprocess.run([sys.executable, "-c", code], check=True, env=env)
+
+
+def test_socket_sink_sends_exposition(tmp_path):
+    path = str(tmp_path / "metrics.sock")
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(1)
+    received = []
+
+    def accept():
+        connection, _ = server.accept()
+        with connection:
+            received.append(connection.makefile("rb").read())
+
+    thread = threading.Thread(target=accept)
+    thread.start()
+    metrics = Metrics()
+    metrics.count("scans", 1, ())
+    SocketSink(path).flush(metrics)
+    thread.join()
+    server.close()
+    assert received[0].decode() == "# TYPE auto_player_scans counter\n" + (
+        "auto_player_scans_total 1\n# EOF\n"
+    )
+
+
+def test_app_reports_scans_and_saves(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "e1.mkv").touch()
+    config_path = tmp_path / "config.json"
+    metrics_path = tmp_path / "auto_player.prom"
+    config = {"scan_cache": None, "metrics": {"textfile": str(metrics_path)}}
+    config_path.write_text(json.dumps(config))
+    try:
+        app = create_auto_player(config_path=str(config_path))
+        app.add_show(name="show", video_dir=".", video_regex=r".+\.mkv")
+        len(app.get_show("show").show)
+        get_metrics_recorder().flush()
+    finally:
+        set_metrics_recorder(None)
+    text = metrics_path.read_text()
+    assert "auto_player_scans_total" in text
+    assert 'auto_player_state_bytes{backend="localfile",session="default"}' in text
+    assert "auto_player_save_seconds_count" in text
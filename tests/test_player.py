@@ -1,6 +1,11 @@
 import pytest
 
-from auto_player.player import CunstuctorPlayer
+from auto_player.player import (
+    DEFAULT_ENVIRONMENT_VARIABLE_NAME,
+    CommandTemplate,
+    CunstuctorPlayer,
+    EnvironmentPlayer,
+)
 from auto_player.show import EpisodeSet
 
 
@@ -58,3 +63,29 @@ def test_constructor_player_on_not_full_episode(
         episode_set_without_subtitles
     )
     assert constructed_command == ["kek_exec", "video_file", "/dub", "audio_file"]
+
+
+@pytest.mark.parametrize(
+    "template",
+    [
+        "plain",
+        "{episode.video_file}",
+        "--sub-file={episode.subtitles_file!s:>20}",
+        "{episode.video_file.name}{{literal}}",
+        "{episode.audio_file!r}",
+        "{episode.video_file.parts[0]}",
+    ],
+)
+def test_command_template_matches_str_format(template, full_episode_set):
+    episode = full_episode_set.fix_simlinks()
+    expected = template.format(episode=episode)
+    assert CommandTemplate(template).format(episode) == expected
+
+
+def test_environment_player_recompiles_changed_template(monkeypatch, full_episode_set):
+    player = EnvironmentPlayer()
+    monkeypatch.setenv(DEFAULT_ENVIRONMENT_VARIABLE_NAME, "first {episode.video_file}")
+    template = player._get_template()
+    assert player._get_template() is template
+    monkeypatch.setenv(DEFAULT_ENVIRONMENT_VARIABLE_NAME, "second {episode.video_file}")
+    assert player._get_template().format(full_episode_set) == "second video_file"
@@ -0,0 +1,153 @@
+import struct
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+from click.testing import CliRunner
+
+from auto_player.app import create_auto_player
+from auto_player.cli import cli
+from auto_player.probe import (
+    PARALLEL_THRESHOLD,
+    MediaInfo,
+    ProbeCache,
+    probe_file,
+    probe_files,
+    set_probe_cache,
+)
+
+
+def element(element_id: int, data: bytes, unknown_size: bool = False) -> bytes:
+    id_bytes = element_id.to_bytes((element_id.bit_length() + 7) // 8, "big")
+    if unknown_size:
+        return id_bytes + b"\x01" + b"\xff" * 7 + data
+    return id_bytes + b"\x01" + len(data).to_bytes(7, "big") + data
+
+
+def uint(element_id: int, value: int) -> bytes:
+    return element(element_id, value.to_bytes(4, "big"))
+
+
+def track(track_type: int, video: bytes = b"") -> bytes:
+    return element(0xAE, uint(0x83, track_type) + video)
+
+
+def matroska(with_seek_head: bool = False) -> bytes:
+    info = element(
+        0x1549A966,
+        uint(0x2AD7B1, 1_000_000) + element(0x4489, struct.pack(">d", 1420500.0)),
+    )
+    tracks = element(
+        0x1654AE6B,
+        track(1, element(0xE0, uint(0xB0, 1920) + uint(0xBA, 1080)))
+        + track(2)
+        + track(2)
+        + track(0x11),
+    )
+    cluster = element(0x1F43B675, b"\0" * 64)
+    if with_seek_head:
+        # Tracks after the first cluster, only found through the seek head.
+        seek_head_size = len(element(0x114D9B74, b"")) + 2 * len(
+            element(0x4DBB, uint(0x53AB, 0) + uint(0x53AC, 0))
+        )
+        tracks_position = seek_head_size + len(info) + len(cluster)
+        seek_head = element(
+            0x114D9B74,
+            element(0x4DBB, uint(0x53AB, 0x1549A966) + uint(0x53AC, seek_head_size))
+            + element(0x4DBB, uint(0x53AB, 0x1654AE6B) + uint(0x53AC, tracks_position)),
+        )
+        segment = seek_head + info + cluster + tracks
+    else:
+        segment = info + tracks + cluster
+    header = element(0x1A45DFA3, element(0x4282, b"matroska"))
+    return header + element(0x18538067, segment, unknown_size=with_seek_head)
+
+
+def box(box_type: bytes, data: bytes) -> bytes:
+    return struct.pack(">I4s", len(data) + 8, box_type) + data
+
+
+def mp4_track(handler: bytes, width: int = 0, height: int = 0) -> bytes:
+    tkhd = box(b"tkhd", b"\0" * 76 + struct.pack(">II", width << 16, height << 16))
+    hdlr = box(b"hdlr", b"\0" * 8 + handler + b"\0" * 13)
+    return box(b"trak", tkhd + box(b"mdia", hdlr))
+
+
+def mp4() -> bytes:
+    mvhd = box(b"mvhd", b"\0" * 12 + struct.pack(">II", 1000, 1420500) + b"\0" * 80)
+    moov = box(
+        b"moov",
+        mvhd + mp4_track(b"vide", 1280, 720) + mp4_track(b"soun") + mp4_track(b"sbtl"),
+    )
+    return box(b"ftyp", b"isom\0\0\0\0") + box(b"mdat", b"\0" * 128) + moov
+
+
+EXPECTED_MATROSKA = MediaInfo("matroska", 1420.5, 1920, 1080, 2, 1)
+
+
+@pytest.mark.parametrize("with_seek_head", [False, True])
+def test_probe_matroska(tmp_path, with_seek_head):
+    path = tmp_path / "episode.mkv"
+    path.write_bytes(matroska(with_seek_head))
+    assert probe_file(path) == EXPECTED_MATROSKA
+
+
+def test_probe_mp4(tmp_path):
+    path = tmp_path / "episode.mp4"
+    path.write_bytes(mp4())
+    assert probe_file(path) == MediaInfo("mp4", 1420.5, 1280, 720, 1, 1)
+
+
+def test_probe_unknown_and_broken(tmp_path):
+    (tmp_path / "empty.mkv").touch()
+    (tmp_path / "text.mkv").write_text("not a video file at all")
+    (tmp_path / "cut.mkv").write_bytes(matroska()[:60])
+    for name in ["empty.mkv", "text.mkv", "cut.mkv", "missing.mkv"]:
+        assert probe_file(tmp_path / name) is None
+
+
+def test_probe_files_cache(tmp_path, monkeypatch):
+    paths = []
+    for number in range(10):
+        path = tmp_path / f"{number}.mkv"
+        path.write_bytes(matroska())
+        paths.append(path)
+    cache = ProbeCache(str(tmp_path / "cache"))
+    set_probe_cache(cache)
+    try:
+        assert probe_files(paths, jobs=2) == [EXPECTED_MATROSKA] * 10
+        cache.save()
+
+        cache = ProbeCache(str(tmp_path / "cache"))
+        set_probe_cache(cache)
+        probed = []
+        monkeypatch.setattr(
+            "auto_player.probe.probe_file", lambda path: probed.append(path)
+        )
+        paths[0].write_bytes(b"changed")
+        results = probe_files(paths, jobs=1)
+        assert probed == [paths[0]]
+        assert results == [None] + [EXPECTED_MATROSKA] * 9
+    finally:
+        set_probe_cache(None)
+
+
+def test_info_full_probes_with_jobs(tmp_path, config_file, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for number in range(PARALLEL_THRESHOLD):
+        (tmp_path / f"e{number}.mkv").write_bytes(matroska())
+    app = create_auto_player(config_path=str(config_file))
+    app.add_show(name="Show", video_dir=".", video_regex=r".+\.mkv")
+    pools = []
+    monkeypatch.setattr(
+        "auto_player.probe.ProcessPoolExecutor",
+        lambda **options: pools.append(options) or ProcessPoolExecutor(**options),
+    )
+    monkeypatch.setattr("auto_player.probe.MAX_BATCH_SIZE", PARALLEL_THRESHOLD)
+    monkeypatch.setattr("auto_player.probe.PARALLEL_THRESHOLD", 1)
+    result = CliRunner().invoke(
+        cli, ["--config", str(config_file), "info", "--full", "-j", "3"]
+    )
+    assert result.exit_code == 0, result.output
+    assert "Duration: 3:09:24" in result.output
+    assert [pool["max_workers"] for pool in pools] == [3]
+    assert pools[0]["mp_context"].get_start_method() != "fork"
@@ -0,0 +1,55 @@
+import json
+import threading
+
+from click.testing import CliRunner
+
+from auto_player.cli import cli
+from auto_player.profiling import Profiler, get_profiler, set_profiler, span
+
+
+def test_span_is_a_no_op_without_profiler():
+    assert get_profiler() is None
+    with span("ignored") as result:
+        assert result is None
+
+
+def work():
+    with span("worker"):
+        pass
+
+
+def test_profiler_nests_spans_per_thread():
+    profiler = Profiler()
+    set_profiler(profiler)
+    try:
+        with span("outer"):
+            with span("inner"):
+                pass
+            worker = threading.Thread(target=work)
+            worker.start()
+            worker.join()
+    finally:
+        set_profiler(None)
+    names = [(s.name, [child.name for child in s.children]) for s in profiler.spans]
+    assert names == [("outer", ["inner"]), ("worker", [])]
+
+
+def test_cli_profile_output(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps({"scan_cache": None}))
+    output_path = tmp_path / "profile.json"
+    runner = CliRunner()
+    result = runner.invoke(
+        cli,
+        ["--config", str(config_path), "--profile_output", str(output_path), "list"],
+    )
+    assert result.exit_code == 0
+    names = [span["name"] for span in json.loads(output_path.read_text())]
+    assert names[:4] == [
+        "read_config",
+        "create_backend",
+        "create_player",
+        "backend.load",
+    ]
+    assert get_profiler() is None
@@ -0,0 +1,154 @@
+import re
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+from auto_player.app import create_auto_player
+from auto_player.app.file_group_factory import make_files_group
+from auto_player.cli import cli
+from auto_player.file_group import FilesGroupType, recursive_file_group
+from auto_player.file_group.codec import decode_files_group, encode_files_group
+from auto_player.file_group.recursive_file_group import RecursiveFileGroup
+from auto_player.file_group.regex_file_group import RegexFileGroup
+
+LIBRARY = [
+    "Season 10/e01.mkv",
+    "Season 2/e10.mkv",
+    "Season 2/e2.mkv",
+    "Season 2/Extras/making of.mkv",
+    "Season 1/Disc 1/e01.mkv",
+    "Season 1/Disc 2/e02.mkv",
+    "Season 1/notes.txt",
+    "trailer.mkv",
+]
+
+
+@pytest.fixture
+def library(tmp_path) -> Path:
+    for name in LIBRARY:
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.touch()
+    return tmp_path
+
+
+def relative_names(group, library):
+    return [str(path.relative_to(library)) for path in group]
+
+
+@pytest.mark.parametrize("jobs", [1, 4])
+def test_recursive_file_group_walks_in_natural_order(library, jobs):
+    group = RecursiveFileGroup(
+        group_type=FilesGroupType.VIDEO,
+        directory=library,
+        regex=re.compile(r".+\.mkv"),
+        exclude=re.compile(r"^Extras$"),
+        jobs=jobs,
+    )
+    assert relative_names(group, library) == [
+        "Season 1/Disc 1/e01.mkv",
+        "Season 1/Disc 2/e02.mkv",
+        "Season 2/e2.mkv",
+        "Season 2/e10.mkv",
+        "Season 10/e01.mkv",
+        "trailer.mkv",
+    ]
+
+
+def test_recursive_file_group_notices_nested_changes(library):
+    group = RecursiveFileGroup(
+        group_type=FilesGroupType.VIDEO, directory=library, regex=re.compile(r".+")
+    )
+    assert len(group) == 8
+    assert group.files() is group.files()
+    (library / "Season 1" / "Disc 2" / "e03.mkv").touch()
+    assert len(group) == 9
+
+
+def test_recursive_file_group_streams(library):
+    group = RecursiveFileGroup(
+        group_type=FilesGroupType.VIDEO, directory=library, regex=re.compile(r".+")
+    )
+    files = iter(group)
+    assert next(files) == library / "Season 1" / "Disc 1" / "e01.mkv"
+    assert group._directory_keys is None
+    assert len(list(files)) == 7
+    assert group._directory_keys is not None
+
+
+def test_parallel_walks_list_shared_directory_once(tmp_path, monkeypatch):
+    shared = tmp_path / "shared"
+    shared.mkdir()
+    (shared / "e01.mkv").touch()
+    for season in ["Season 1", "Season 2"]:
+        (tmp_path / season).mkdir()
+        (tmp_path / season / "link").symlink_to(shared, target_is_directory=True)
+    shared_key = (shared.stat().st_dev, shared.stat().st_ino)
+    both_checking = threading.Barrier(2)
+
+    class RacingSet(set):
+        def __contains__(self, key):
+            seen = super().__contains__(key)
+            if key == shared_key:
+                # Hold the first walk between its check and its add until the
+                # second walk has checked too (or give up if it is kept out).
+                try:
+                    both_checking.wait(timeout=0.5)
+                except threading.BrokenBarrierError:
+                    pass
+            return seen
+
+    monkeypatch.setattr(recursive_file_group, "set", RacingSet, raising=False)
+    group = RecursiveFileGroup(
+        group_type=FilesGroupType.VIDEO,
+        directory=tmp_path,
+        regex=re.compile(r".+\.mkv"),
+        exclude=re.compile(r"^shared$"),
+        jobs=4,
+    )
+    assert len(group) == 1
+
+
+def test_factory_picks_recursive_group(library):
+    options = {"video_dir": str(library), "video_regex": r".+\.mkv"}
+    group = make_files_group(group_type=FilesGroupType.VIDEO, **options)
+    assert isinstance(group, RegexFileGroup)
+    group = make_files_group(
+        group_type=FilesGroupType.VIDEO, video_recursive=True, **options
+    )
+    assert isinstance(group, RecursiveFileGroup)
+    restored = decode_files_group(encode_files_group(group))
+    assert isinstance(restored, RecursiveFileGroup)
+    assert restored.to_options() == group.to_options()
+
+
+def test_info_full_prints_files_while_walking(library, config_file, monkeypatch):
+    monkeypatch.chdir(library)
+    app = create_auto_player(config_path=str(config_file))
+    app.add_show(
+        name="Show", video_dir=".", video_regex=r".+\.mkv", video_recursive=True
+    )
+    events = []
+    walk = RecursiveFileGroup._walk
+
+    def tracked_walk(self, keys):
+        yield from walk(self, keys)
+        events.append("walk done")
+
+    class Output:
+        def write(self, text):
+            events.extend(line for line in text.splitlines() if line)
+
+        def flush(self):
+            pass
+
+    monkeypatch.setattr(RecursiveFileGroup, "_walk", tracked_walk)
+    monkeypatch.setattr(sys, "stdout", Output())
+    cli.main(
+        args=["--config", str(config_file), "info", "--full"], standalone_mode=False
+    )
+    first_file = "\t\tSeason 1/Disc 1/e01.mkv  [?]"
+    assert events.index(first_file) < events.index("walk done")
+    assert events.index("walk done") < events.index("Watched: 0/7")
@@ -0,0 +1,83 @@
+import re
+
+import pytest
+
+from auto_player.file_group import FilesGroupType
+from auto_player.file_group.regex_file_group import RegexFileGroup
+from auto_player.show import Show
+from auto_player.show.alignment import EpisodeAlignment
+
+
+@pytest.mark.parametrize(
+    "name, key",
+    [
+        ("Show.S01E02.1080p.mkv", (1, 2)),
+        ("Show 1x02.mkv", (1, 2)),
+        ("[Group] Show - 02 [1920x1080].mkv", (2,)),
+        ("Show - 04 (1280x720 x264).mkv", (4,)),
+        ("Show 1x02 [1280x720].mkv", (1, 2)),
+        ("[Group] Show - 02 [1080p].mkv", (2,)),
+        ("[Group] Show [02].ass", (2,)),
+        ("Show EP02.mkv", (2,)),
+        ("Show.mkv", None),
+    ],
+)
+def test_default_episode_keys(name, key, tmp_path):
+    assert EpisodeAlignment().key(tmp_path / name) == key
+
+
+def make_group(group_type: FilesGroupType, directory, regex: str) -> RegexFileGroup:
+    return RegexFileGroup(
+        group_type=group_type, directory=directory, regex=re.compile(regex)
+    )
+
+
+@pytest.fixture
+def show(tmp_path) -> Show:
+    for name in ["Show - 01.mkv", "Show - 02.mkv", "Show - 03.mkv"]:
+        (tmp_path / name).touch()
+    for name in ["Show - 01.ass", "Show - 03.ass"]:
+        (tmp_path / name).touch()
+    return Show(
+        name="show",
+        video_group=make_group(FilesGroupType.VIDEO, tmp_path, r".+\.mkv"),
+        subtitles_group=make_group(FilesGroupType.SUBTITLES, tmp_path, r".+\.ass"),
+        alignment=EpisodeAlignment(),
+    )
+
+
+def test_alignment_skips_missing_files(show, tmp_path):
+    assert show[1].subtitles_file is None
+    assert show[2].subtitles_file == tmp_path / "Show - 03.ass"
+
+
+def test_alignment_table_is_cached_until_files_change(show, tmp_path):
+    assert show[0] is show[0]
+    (tmp_path / "Show - 02.ass").touch()
+    assert show[1].subtitles_file == tmp_path / "Show - 02.ass"
+
+
+def test_alignment_ignores_resolution_tags(tmp_path):
+    for number in [1, 2]:
+        (tmp_path / f"[Group] Show - {number:02} [1920x1080].mkv").touch()
+        (tmp_path / f"[Group] Show - {number:02} (1280x720).ass").touch()
+    show = Show(
+        name="show",
+        video_group=make_group(FilesGroupType.VIDEO, tmp_path, r".+\.mkv"),
+        subtitles_group=make_group(FilesGroupType.SUBTITLES, tmp_path, r".+\.ass"),
+        alignment=EpisodeAlignment(),
+    )
+    assert show[1].subtitles_file == tmp_path / "[Group] Show - 02 (1280x720).ass"
+
+
+def test_custom_episode_regex(tmp_path):
+    for name in ["a_ep1.mkv", "a_ep2.mkv", "sub_2.srt"]:
+        (tmp_path / name).touch()
+    show = Show(
+        name="show",
+        video_group=make_group(FilesGroupType.VIDEO, tmp_path, r".+\.mkv"),
+        subtitles_group=make_group(FilesGroupType.SUBTITLES, tmp_path, r".+\.srt"),
+        alignment=EpisodeAlignment(regex=re.compile(r"(?P<episode>\d+)$")),
+    )
+    assert show[0].subtitles_file is None
+    assert show[1].subtitles_file == tmp_path / "sub_2.srt"
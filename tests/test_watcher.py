@@ -0,0 +1,79 @@
+import os
+import re
+
+import pytest
+
+from auto_player.file_group import FilesGroupType
+from auto_player.file_group.regex_file_group import RegexFileGroup
+from auto_player.file_group.watcher import InotifyWatcher, PollingWatcher
+
+
+def inotify_watcher():
+    try:
+        return InotifyWatcher()
+    except (OSError, AttributeError):
+        pytest.skip("inotify is unavailable")
+
+
+@pytest.fixture(params=[inotify_watcher, PollingWatcher])
+def watcher(request):
+    watcher = request.param()
+    yield watcher
+    watcher.close()
+
+
+@pytest.fixture
+def watched_group(tmp_path, watcher, monkeypatch):
+    for name in ["ep1.mkv", "ep3.mkv", "notes.txt"]:
+        (tmp_path / name).touch()
+    group = RegexFileGroup(
+        group_type=FilesGroupType.VIDEO,
+        directory=tmp_path,
+        regex=re.compile(r".+\.mkv"),
+    )
+    group.attach_watcher(watcher)
+    assert len(group) == 2
+    monkeypatch.setattr(group, "_scan", lambda _: pytest.fail("rescanned"))
+    return group
+
+
+def bump_mtime(directory):
+    # Directory mtimes come from a coarse clock, make sure polling sees a change.
+    stat = os.stat(directory)
+    os.utime(directory, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+
+
+def test_watcher_applies_created_and_deleted_files(watched_group, tmp_path):
+    (tmp_path / "ep2.mkv").touch()
+    (tmp_path / "ep4.txt").touch()
+    (tmp_path / "ep3.mkv").unlink()
+    bump_mtime(tmp_path)
+    assert [path.name for path in watched_group] == ["ep1.mkv", "ep2.mkv"]
+
+
+def test_watcher_applies_renames(watched_group, tmp_path):
+    (tmp_path / "notes.txt").rename(tmp_path / "ep0.mkv")
+    (tmp_path / "ep3.mkv").rename(tmp_path / "ep3.bak")
+    bump_mtime(tmp_path)
+    assert [path.name for path in watched_group] == ["ep0.mkv", "ep1.mkv"]
+
+
+def test_detached_group_unregisters(watched_group, watcher):
+    watched_group.detach_watcher()
+    assert watcher._callbacks == {}
+
+
+def test_watcher_inserts_in_group_order(watcher, tmp_path):
+    for name in ["ep1.mkv", "ep10.mkv"]:
+        (tmp_path / name).touch()
+    group = RegexFileGroup(
+        group_type=FilesGroupType.VIDEO,
+        directory=tmp_path,
+        regex=re.compile(r".+\.mkv"),
+        order="natural",
+    )
+    group.attach_watcher(watcher)
+    assert len(group) == 2
+    (tmp_path / "ep2.mkv").touch()
+    bump_mtime(tmp_path)
+    assert [path.name for path in group] == ["ep1.mkv", "ep2.mkv", "ep10.mkv"]